@@ -0,0 +1,68 @@
+"""spending rollup and budget tracking
+
+Adds the daily_spending_rollup table, filled from the existing
+transactions, and the budget columns used for category budgets and
+ingest-time threshold alerts.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_spending_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('transaction_type', sa.String(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('min_amount', sa.Float(), nullable=True),
+    sa.Column('max_amount', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'day', 'category', 'transaction_type', name='uq_daily_spending_rollup_key')
+    )
+    op.create_index(op.f('ix_daily_spending_rollup_id'), 'daily_spending_rollup', ['id'], unique=False)
+    # Same aggregate as spending_rollup.rebuild; a missing created_at counts today, as at ingest
+    op.execute(
+        "INSERT INTO daily_spending_rollup "
+        "(user_id, day, category, transaction_type, total, count, min_amount, max_amount, updated_at) "
+        "SELECT user_id, date(coalesce(created_at, CURRENT_TIMESTAMP)), coalesce(category, 'uncategorized'), "
+        "transaction_type, sum(amount), count(id), min(amount), max(amount), CURRENT_TIMESTAMP "
+        "FROM transactions GROUP BY 1, 2, 3, 4"
+    )
+
+    with op.batch_alter_table('budgets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('period_start', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('period_spent', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('alerted_period_start', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key('fk_budgets_category_id_categories', 'categories', ['category_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('budgets', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_budgets_category_id_categories', type_='foreignkey')
+        batch_op.drop_column('alerted_period_start')
+        batch_op.drop_column('period_spent')
+        batch_op.drop_column('period_start')
+        batch_op.drop_column('category_id')
+
+    op.drop_index(op.f('ix_daily_spending_rollup_id'), table_name='daily_spending_rollup')
+    op.drop_table('daily_spending_rollup')
@@ -0,0 +1,37 @@
+"""composite indexes for hot query shapes
+
+Analytics, budget and AI endpoints filter transactions by user_id plus
+created_at, transaction_type or merchant_name; insights by user_id and
+created_at; budgets by user_id and is_active.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_user_created_at', 'transactions', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_transactions_user_type_created_at', 'transactions', ['user_id', 'transaction_type', 'created_at'], unique=False)
+    op.create_index('ix_transactions_user_merchant', 'transactions', ['user_id', 'merchant_name'], unique=False)
+    op.create_index('ix_ai_insights_user_created_at', 'ai_insights', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_budgets_user_active', 'budgets', ['user_id', 'is_active'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_budgets_user_active', table_name='budgets')
+    op.drop_index('ix_ai_insights_user_created_at', table_name='ai_insights')
+    op.drop_index('ix_transactions_user_merchant', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_created_at', table_name='transactions')
+    op.drop_index('ix_transactions_user_created_at', table_name='transactions')
@@ -0,0 +1,34 @@
+"""transaction fingerprint
+
+Adds transactions.fingerprint (a hash of SMS sender, normalized text and
+timestamp) with a unique (user_id, fingerprint) index used to skip
+already imported messages. Existing rows keep a NULL fingerprint.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=64), nullable=True))
+        batch_op.create_index('uq_transactions_user_fingerprint', ['user_id', 'fingerprint'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('uq_transactions_user_fingerprint')
+        batch_op.drop_column('fingerprint')
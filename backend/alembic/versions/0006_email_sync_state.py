@@ -0,0 +1,51 @@
+"""incremental email sync
+
+Adds email_sync_state (per-mailbox UIDVALIDITY and highest processed
+UID) and bank_statements.content_hash, used to skip attachments that
+were already imported. Existing statements keep a NULL hash.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('email_address', sa.String(), nullable=False),
+    sa.Column('mailbox', sa.String(), nullable=False),
+    sa.Column('uidvalidity', sa.Integer(), nullable=True),
+    sa.Column('last_uid', sa.Integer(), nullable=False),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'email_address', 'mailbox', name='uq_email_sync_state_mailbox')
+    )
+    op.create_index(op.f('ix_email_sync_state_id'), 'email_sync_state', ['id'], unique=False)
+
+    with op.batch_alter_table('bank_statements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_bank_statements_user_content_hash', ['user_id', 'content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bank_statements', schema=None) as batch_op:
+        batch_op.drop_index('ix_bank_statements_user_content_hash')
+        batch_op.drop_column('content_hash')
+
+    op.drop_index(op.f('ix_email_sync_state_id'), table_name='email_sync_state')
+    op.drop_table('email_sync_state')
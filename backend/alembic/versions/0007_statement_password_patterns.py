@@ -0,0 +1,41 @@
+"""statement password patterns
+
+Adds statement_password_patterns: the password pattern (not the
+password) that last opened each user's statements from a bank, tried
+first on the next sync.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('statement_password_patterns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bank_name', sa.String(), nullable=False),
+    sa.Column('pattern', sa.String(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'bank_name', name='uq_statement_password_pattern_bank')
+    )
+    op.create_index(op.f('ix_statement_password_patterns_id'), 'statement_password_patterns', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_statement_password_patterns_id'), table_name='statement_password_patterns')
+    op.drop_table('statement_password_patterns')
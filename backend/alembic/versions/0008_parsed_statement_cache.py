@@ -0,0 +1,58 @@
+"""parsed statement cache
+
+Adds parsed_statements (parse results per user, file SHA-256 and
+parser version) and makes bank_statements (user_id, content_hash)
+unique. Failed imports give up their hash (so the file can be imported
+again), and duplicate imports already in the table keep it on the
+oldest statement only.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('parsed_statements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('parser_version', sa.String(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'content_hash', 'parser_version', name='uq_parsed_statement_content')
+    )
+    op.create_index(op.f('ix_parsed_statements_id'), 'parsed_statements', ['id'], unique=False)
+
+    op.execute("UPDATE bank_statements SET content_hash = NULL WHERE processing_status = 'failed'")
+    op.execute(
+        "UPDATE bank_statements SET content_hash = NULL "
+        "WHERE content_hash IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM bank_statements WHERE content_hash IS NOT NULL GROUP BY user_id, content_hash)"
+    )
+    with op.batch_alter_table('bank_statements', schema=None) as batch_op:
+        batch_op.drop_index('ix_bank_statements_user_content_hash')
+        batch_op.create_index('ix_bank_statements_user_content_hash', ['user_id', 'content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bank_statements', schema=None) as batch_op:
+        batch_op.drop_index('ix_bank_statements_user_content_hash')
+        batch_op.create_index('ix_bank_statements_user_content_hash', ['user_id', 'content_hash'], unique=False)
+
+    op.drop_index(op.f('ix_parsed_statements_id'), table_name='parsed_statements')
+    op.drop_table('parsed_statements')
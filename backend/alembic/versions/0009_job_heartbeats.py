@@ -0,0 +1,42 @@
+"""job heartbeats
+
+Adds jobs.worker_id and jobs.heartbeat_at, so startup recovery only
+fails jobs whose process is gone, and bank_statements.job_id, linking
+an uploaded statement to its import job.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('worker_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('bank_statements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('job_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_bank_statements_job_id_jobs', 'jobs', ['job_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bank_statements', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_bank_statements_job_id_jobs', type_='foreignkey')
+        batch_op.drop_column('job_id')
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker_id')
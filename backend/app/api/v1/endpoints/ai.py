@@ -1,14 +1,15 @@
 # AI Coach Endpoints - Autonomous Financial Coaching
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.database import get_db
-from app.core.security import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select
+from app.database import get_async_db, AsyncSessionLocal
+from app.core.security import get_current_user, get_current_user_id
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.ai_insight import AIInsight
 from app.models.spending_pattern import SpendingPattern
 from app.services.ai_coach import AutonomousFinancialCoach
+from app.services.spending_rollup import category_totals
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
@@ -42,7 +43,7 @@ class SpendingAnalysisResponse(BaseModel):
 async def chat_with_ai(
     message: ChatMessage,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Interactive chat with AI financial coach"""
     
@@ -50,12 +51,12 @@ async def chat_with_ai(
         coach = AutonomousFinancialCoach()
         
         # Get user's recent transactions for context
-        recent_transactions = db.query(Transaction).filter(
+        recent_transactions = (await db.scalars(select(Transaction).where(
             and_(
                 Transaction.user_id == current_user.id,
                 Transaction.created_at >= datetime.now() - timedelta(days=30)
             )
-        ).all()
+        ))).all()
         
         # Prepare user context
         user_context = {
@@ -88,7 +89,7 @@ async def analyze_spending(
     request: SpendingAnalysisRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get AI-powered spending analysis and recommendations"""
     
@@ -97,12 +98,12 @@ async def analyze_spending(
         
         # Get transactions for the period
         start_date = datetime.now() - timedelta(days=request.days)
-        transactions = db.query(Transaction).filter(
+        transactions = (await db.scalars(select(Transaction).where(
             and_(
                 Transaction.user_id == current_user.id,
                 Transaction.created_at >= start_date
             )
-        ).all()
+        ))).all()
         
         # Convert to dict format
         transaction_dicts = [
@@ -132,7 +133,6 @@ async def analyze_spending(
         # Save insights to database
         background_tasks.add_task(
             save_insights,
-            db,
             current_user.id,
             analysis_result
         )
@@ -150,30 +150,30 @@ async def analyze_spending(
 async def get_ai_insights(
     days: int = 30,
     insight_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get AI-generated insights and recommendations"""
     
     start_date = datetime.now() - timedelta(days=days)
     
-    query = db.query(AIInsight).filter(
+    query = select(AIInsight).where(
         and_(
-            AIInsight.user_id == current_user.id,
+            AIInsight.user_id == current_user_id,
             AIInsight.created_at >= start_date
         )
     )
     
     if insight_type:
-        query = query.filter(AIInsight.insight_type == insight_type)
+        query = query.where(AIInsight.insight_type == insight_type)
     
-    insights = query.order_by(AIInsight.created_at.desc()).all()
+    insights = (await db.scalars(query.order_by(AIInsight.created_at.desc()))).all()
     
     return [
         InsightResponse(
             id=i.id,
             title=i.title,
-            description=i.description,
+            description=i.content,
             insight_type=i.insight_type,
             priority=i.priority,
             created_at=i.created_at
@@ -184,8 +184,8 @@ async def get_ai_insights(
 @router.post("/detect-anomalies")
 async def detect_spending_anomalies(
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Detect unusual spending patterns and anomalies"""
     
@@ -193,13 +193,13 @@ async def detect_spending_anomalies(
         coach = AutonomousFinancialCoach()
         
         # Get last 60 days of transactions
-        transactions = db.query(Transaction).filter(
+        transactions = (await db.scalars(select(Transaction).where(
             and_(
-                Transaction.user_id == current_user.id,
+                Transaction.user_id == current_user_id,
                 Transaction.transaction_type == "debit",
                 Transaction.created_at >= datetime.now() - timedelta(days=60)
             )
-        ).all()
+        ))).all()
         
         # Analyze for anomalies
         anomalies = await coach.detect_anomalies(
@@ -209,16 +209,15 @@ async def detect_spending_anomalies(
         # Save anomaly insights
         for anomaly in anomalies:
             insight = AIInsight(
-                user_id=current_user.id,
+                user_id=current_user_id,
                 title=f"Unusual Spending Detected: {anomaly['category']}",
-                description=anomaly["description"],
+                content=anomaly["description"],
                 insight_type="anomaly",
-                priority="high" if anomaly["severity"] > 2 else "medium",
-                metadata=anomaly
+                priority="high" if anomaly["severity"] > 2 else "medium"
             )
             db.add(insight)
         
-        db.commit()
+        await db.commit()
         
         return {"anomalies": anomalies, "count": len(anomalies)}
     
@@ -227,8 +226,8 @@ async def detect_spending_anomalies(
 
 @router.get("/subscriptions")
 async def identify_subscriptions(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Identify recurring payments and subscriptions"""
     
@@ -236,13 +235,13 @@ async def identify_subscriptions(
         coach = AutonomousFinancialCoach()
         
         # Get last 90 days for pattern detection
-        transactions = db.query(Transaction).filter(
+        transactions = (await db.scalars(select(Transaction).where(
             and_(
-                Transaction.user_id == current_user.id,
+                Transaction.user_id == current_user_id,
                 Transaction.transaction_type == "debit",
                 Transaction.created_at >= datetime.now() - timedelta(days=90)
             )
-        ).all()
+        ))).all()
         
         transaction_dicts = [
             {
@@ -263,14 +262,14 @@ async def identify_subscriptions(
 
 @router.get("/spending-patterns")
 async def get_spending_patterns(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detected spending patterns"""
     
-    patterns = db.query(SpendingPattern).filter(
-        SpendingPattern.user_id == current_user.id
-    ).order_by(SpendingPattern.created_at.desc()).limit(10).all()
+    patterns = (await db.scalars(select(SpendingPattern).where(
+        SpendingPattern.user_id == current_user_id
+    ).order_by(SpendingPattern.created_at.desc()).limit(10))).all()
     
     return [
         {
@@ -287,31 +286,23 @@ async def get_spending_patterns(
 @router.post("/generate-budget")
 async def generate_ai_budget(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate AI-powered budget recommendations"""
     
     try:
         coach = AutonomousFinancialCoach()
         
-        # Get income and spending history
-        transactions = db.query(Transaction).filter(
-            and_(
-                Transaction.user_id == current_user.id,
-                Transaction.created_at >= datetime.now() - timedelta(days=60)
-            )
-        ).all()
-        
-        # Calculate income statistics
-        income_transactions = [t for t in transactions if t.transaction_type == "credit"]
-        avg_income = sum(t.amount for t in income_transactions) / 2 if income_transactions else 0  # 2 months
+        # Get income and spending history from the daily rollup
+        since = (datetime.utcnow() - timedelta(days=60)).date()
+        income_totals = await db.run_sync(category_totals, current_user.id, since, "credit")
+        avg_income = sum(c["total"] for c in income_totals.values()) / 2  # 2 months
         
         # Get spending by category
-        category_spending = {}
-        for t in transactions:
-            if t.transaction_type == "debit":
-                cat = t.category_id or "uncategorized"
-                category_spending[cat] = category_spending.get(cat, 0) + t.amount
+        category_spending = {
+            cat: data["total"]
+            for cat, data in (await db.run_sync(category_totals, current_user.id, since)).items()
+        }
         
         # Generate recommendations
         budget_recommendations = await coach.generate_budget_recommendations(
@@ -329,19 +320,19 @@ async def generate_ai_budget(
         raise HTTPException(status_code=500, detail=f"Budget generation error: {str(e)}")
 
 # Helper functions
-def save_insights(db: Session, user_id: int, analysis_result: dict):
-    """Save analysis insights to database"""
+async def save_insights(user_id: int, analysis_result: dict):
+    """Save analysis insights to database (runs after the request session is closed)"""
     try:
-        insight = AIInsight(
-            user_id=user_id,
-            title="Spending Analysis",
-            description=analysis_result["analysis"][:500],
-            insight_type="analysis",
-            priority="medium",
-            metadata=analysis_result["metrics"]
-        )
-        db.add(insight)
-        db.commit()
+        async with AsyncSessionLocal() as db:
+            insight = AIInsight(
+                user_id=user_id,
+                title="Spending Analysis",
+                content=analysis_result["analysis"][:500],
+                insight_type="analysis",
+                priority="medium"
+            )
+            db.add(insight)
+            await db.commit()
     except Exception as e:
         print(f"Error saving insights: {e}")
 
@@ -1,33 +1,217 @@
 # Bank statements endpoint
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File, Form
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional
+from app.api.v1.endpoints.email_integration import JobStatusResponse
+from app.core.config import settings
 from app.database import get_db
+from app.models.bank_statement import BankStatement
+from app.models.job import Job
 from app.models.user import User
 from app.core.security import get_current_user
+from app.services.job_queue import enqueue_job, job_status
+from app.services.statement_upload import (
+    UPLOAD_ID_RE,
+    DuplicateStatement,
+    complete_upload,
+    new_upload_id,
+    partial_upload_path,
+    upload_offset,
+)
+
+# Room for the multipart boundaries and the small form fields around the file
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadLimitRoute(APIRoute):
+    """
+    Refuses a request body past MAX_UPLOAD_SIZE while it is still arriving
+
+    The form (file included) is spooled before the endpoint runs, so the
+    limit sits in front of that: a larger Content-Length is rejected with
+    413 before anything is read, and a body sent without one is cut off
+    as soon as it runs over.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            limit = settings.MAX_UPLOAD_SIZE + FORM_OVERHEAD
+            too_large = HTTPException(status_code=413, detail=f"Statement exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > limit:
+                raise too_large
+            received = 0
+
+            async def receive():
+                nonlocal received
+                message = await request.receive()
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise too_large
+                return message
+
+            return await handler(Request(request.scope, receive))
+
+        return limited_handler
+
+
+router = APIRouter(route_class=UploadLimitRoute)
+
+
+class StatementImportResult(BaseModel):
+    statement_id: int
+    bank_name: Optional[str] = None
+    total_transactions: int
+    transactions_inserted: int
+    message: str
 
-router = APIRouter()
 
-@router.post("/upload")
-async def upload_statement(
+class StatementJobStatusResponse(JobStatusResponse):
+    result: Optional[StatementImportResult] = None
+
+
+@router.post("/upload", status_code=202)
+def upload_statement(
     file: UploadFile = File(...),
     password: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    offset: int = Form(0),
+    total_size: Optional[int] = Form(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload a bank statement PDF"""
-    # TODO: Implement PDF processing
+    """
+    Upload a bank statement PDF
+    
+    Send the whole file, or send it in chunks: the first with `total_size`,
+    each next one with the returned `upload_id` and `offset`. After an
+    interruption, `GET /upload/{upload_id}` gives the offset to resume
+    from. Once the last byte arrives the statement is created with status
+    `processing` and parsed in the background (poll
+    `status_url`); a file the user already
+    imported (by upload or email) is rejected with 409.
+    
+    A plain `def`: the chunk writes, hashing and queries run in the
+    threadpool, off the event loop.
+    """
+    if total_size is not None and total_size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"Statement exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+    
+    if upload_id is None:
+        if offset:
+            raise HTTPException(status_code=400, detail="Resuming an upload needs its upload_id")
+        upload_id = new_upload_id()
+        received = 0
+    else:
+        received = upload_offset(current_user.id, upload_id) if UPLOAD_ID_RE.match(upload_id) else None
+        if received is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+    if offset != received:
+        raise HTTPException(status_code=409, detail=f"Upload is at offset {received}, not {offset}")
+    
+    received = _append_chunk(file, partial_upload_path(current_user.id, upload_id), offset)
+    if total_size is not None and received > total_size:
+        _truncate(partial_upload_path(current_user.id, upload_id), offset)
+        raise HTTPException(status_code=400, detail=f"Chunk runs past total_size ({total_size} bytes)")
+    if total_size is not None and received < total_size:
+        return {"upload_id": upload_id, "offset": received, "status": "uploading"}
+    
+    try:
+        statement = complete_upload(db, current_user.id, upload_id, file.filename)
+    except DuplicateStatement as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    # The password only travels with the job payload, in memory
+    job = enqueue_job(db, current_user.id, "process_statement_upload", {"statement_id": statement.id, "password": password})
+    # Links the statement to its job, so startup recovery knows when it was abandoned
+    statement.job_id = job.id
+    db.commit()
     return {
-        "message": "Bank statement upload endpoint - implementation pending",
-        "filename": file.filename
+        "statement_id": statement.id,
+        "status": statement.processing_status,
+        "job_id": job.id,
+        "status_url": f"/api/v1/bank-statements/jobs/{job.id}"
     }
 
+@router.get("/jobs/{job_id}", response_model=StatementJobStatusResponse)
+async def get_statement_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Status of a statement import job; `result` holds the import summary once it completes"""
+    job = db.get(Job, job_id)
+    if job is None or job.user_id != current_user.id or job.kind != "process_statement_upload":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@router.get("/upload/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Bytes received so far for an unfinished upload (the offset to resume from)"""
+    received = upload_offset(current_user.id, upload_id) if UPLOAD_ID_RE.match(upload_id) else None
+    if received is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"upload_id": upload_id, "offset": received, "status": "uploading"}
+
 @router.get("/")
 async def get_statements(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all bank statements for current user"""
-    # TODO: Implement statement retrieval
-    return {"message": "Get statements endpoint - implementation pending"}
+    statements = (
+        db.query(BankStatement)
+        .filter(BankStatement.user_id == current_user.id)
+        .order_by(BankStatement.uploaded_at.desc())
+        .all()
+    )
+    return [
+        {
+            "id": statement.id,
+            "filename": statement.filename,
+            "file_size": statement.file_size,
+            "bank_name": statement.bank_name,
+            "processing_status": statement.processing_status,
+            "error_message": statement.error_message,
+            "total_transactions": statement.total_transactions,
+            "uploaded_at": statement.uploaded_at,
+            "processed_at": statement.processed_at,
+        }
+        for statement in statements
+    ]
+
+
+def _append_chunk(file: UploadFile, path: str, offset: int) -> int:
+    """
+    Stream a chunk onto the partial file at `offset`, UPLOAD_CHUNK_SIZE at a time
+
+    MAX_UPLOAD_SIZE is checked as bytes arrive; an oversized chunk is
+    cut back off (and a new upload removed) before the 413.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "r+b" if offset else "wb") as out:
+        out.seek(offset)
+        out.truncate()
+        while chunk := file.file.read(settings.UPLOAD_CHUNK_SIZE):
+            if out.tell() + len(chunk) > settings.MAX_UPLOAD_SIZE:
+                out.truncate(offset)
+                break
+            out.write(chunk)
+        else:
+            return out.tell()
+    if not offset:
+        os.remove(path)
+    raise HTTPException(status_code=413, detail=f"Statement exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+
 
+def _truncate(path: str, size: int) -> None:
+    with open(path, "r+b") as out:
+        out.truncate(size)
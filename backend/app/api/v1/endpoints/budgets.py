@@ -1,12 +1,12 @@
 # Budget Management Endpoints
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.database import get_db
-from app.core.security import get_current_user
-from app.models.user import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select
+from app.database import get_async_db
+from app.core.security import get_current_user_id
 from app.models.budget import Budget
 from app.models.category import Category
+from app.services.budget_tracker import compute_spent
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
@@ -40,29 +40,68 @@ class BudgetResponse(BaseModel):
     alert_threshold: float
     created_at: datetime
 
+def _budget_query(user_id: int):
+    """Budgets with their category name resolved by a join"""
+    return select(Budget, Category.name).outerjoin(
+        Category, Category.id == Budget.category_id
+    ).where(Budget.user_id == user_id)
+
+async def _budget_responses(db: AsyncSession, rows) -> List[BudgetResponse]:
+    """Build responses for (Budget, category_name) rows with one spend query"""
+    spent_by_budget = await db.run_sync(compute_spent, [budget for budget, _ in rows])
+    
+    result = []
+    for budget, category_name in rows:
+        spent = spent_by_budget.get(budget.id, 0.0)
+        remaining = budget.amount - spent
+        percentage_used = (spent / budget.amount * 100) if budget.amount > 0 else 0
+        
+        result.append(BudgetResponse(
+            id=budget.id,
+            category_id=budget.category_id,
+            category_name=category_name or "Overall",
+            amount=budget.amount,
+            spent=spent,
+            remaining=remaining,
+            percentage_used=percentage_used,
+            period=budget.period,
+            is_active=budget.is_active,
+            alert_threshold=budget.alert_threshold,
+            created_at=budget.created_at
+        ))
+    
+    return result
+
 @router.post("/", response_model=BudgetResponse)
 async def create_budget(
     budget: BudgetCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new budget"""
     
     # Check if budget already exists for this category
-    existing_budget = db.query(Budget).filter(
+    existing_budget = await db.scalar(select(Budget).where(
         and_(
-            Budget.user_id == current_user.id,
+            Budget.user_id == current_user_id,
             Budget.category_id == budget.category_id,
             Budget.is_active == True
         )
-    ).first()
+    ))
     
     if existing_budget:
         raise HTTPException(status_code=400, detail="Active budget already exists for this category")
     
+    category_name = None
+    if budget.category_id:
+        category_name = await db.scalar(select(Category.name).where(Category.id == budget.category_id))
+        if category_name is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+    
     new_budget = Budget(
-        user_id=current_user.id,
+        user_id=current_user_id,
         category_id=budget.category_id,
+        category=category_name or "overall",
         amount=budget.amount,
         period=budget.period,
         start_date=budget.start_date or datetime.now(),
@@ -72,194 +111,100 @@ async def create_budget(
     )
     
     db.add(new_budget)
-    db.commit()
-    db.refresh(new_budget)
+    await db.commit()
+    await db.refresh(new_budget)
     
-    # Calculate spent amount
-    # TODO: Implement spent calculation from transactions
-    
-    category_name = None
-    if budget.category_id:
-        category = db.query(Category).filter(Category.id == budget.category_id).first()
-        if category:
-            category_name = category.name
-    
-    return BudgetResponse(
-        id=new_budget.id,
-        category_id=new_budget.category_id,
-        category_name=category_name or "Overall",
-        amount=new_budget.amount,
-        spent=0.0,
-        remaining=new_budget.amount,
-        percentage_used=0.0,
-        period=new_budget.period,
-        is_active=new_budget.is_active,
-        alert_threshold=new_budget.alert_threshold,
-        created_at=new_budget.created_at
-    )
+    return (await _budget_responses(db, [(new_budget, category_name)]))[0]
 
 @router.get("/", response_model=List[BudgetResponse])
 async def get_budgets(
     active_only: bool = True,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all budgets for the current user"""
     
-    query = db.query(Budget).filter(Budget.user_id == current_user.id)
+    query = _budget_query(current_user_id)
     
     if active_only:
-        query = query.filter(Budget.is_active == True)
+        query = query.where(Budget.is_active == True)
     
-    budgets = query.all()
+    rows = (await db.execute(query)).all()
     
-    result = []
-    for budget in budgets:
-        category_name = None
-        if budget.category_id:
-            category = db.query(Category).filter(Category.id == budget.category_id).first()
-            if category:
-                category_name = category.name
-        
-        # TODO: Calculate actual spent from transactions
-        spent = 0.0
-        remaining = budget.amount - spent
-        percentage_used = (spent / budget.amount * 100) if budget.amount > 0 else 0
-        
-        result.append(BudgetResponse(
-            id=budget.id,
-            category_id=budget.category_id,
-            category_name=category_name or "Overall",
-            amount=budget.amount,
-            spent=spent,
-            remaining=remaining,
-            percentage_used=percentage_used,
-            period=budget.period,
-            is_active=budget.is_active,
-            alert_threshold=budget.alert_threshold,
-            created_at=budget.created_at
-        ))
-    
-    return result
+    return await _budget_responses(db, rows)
 
 @router.get("/{budget_id}", response_model=BudgetResponse)
 async def get_budget(
     budget_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific budget"""
     
-    budget = db.query(Budget).filter(
-        and_(
-            Budget.id == budget_id,
-            Budget.user_id == current_user.id
-        )
-    ).first()
+    row = (await db.execute(_budget_query(current_user_id).where(Budget.id == budget_id))).first()
     
-    if not budget:
+    if not row:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    category_name = None
-    if budget.category_id:
-        category = db.query(Category).filter(Category.id == budget.category_id).first()
-        if category:
-            category_name = category.name
-    
-    spent = 0.0  # TODO: Calculate from transactions
-    remaining = budget.amount - spent
-    percentage_used = (spent / budget.amount * 100) if budget.amount > 0 else 0
-    
-    return BudgetResponse(
-        id=budget.id,
-        category_id=budget.category_id,
-        category_name=category_name or "Overall",
-        amount=budget.amount,
-        spent=spent,
-        remaining=remaining,
-        percentage_used=percentage_used,
-        period=budget.period,
-        is_active=budget.is_active,
-        alert_threshold=budget.alert_threshold,
-        created_at=budget.created_at
-    )
+    return (await _budget_responses(db, [row]))[0]
 
 @router.put("/{budget_id}", response_model=BudgetResponse)
 async def update_budget(
     budget_id: int,
     budget_update: BudgetUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a budget"""
     
-    budget = db.query(Budget).filter(
-        and_(
-            Budget.id == budget_id,
-            Budget.user_id == current_user.id
-        )
-    ).first()
+    row = (await db.execute(_budget_query(current_user_id).where(Budget.id == budget_id))).first()
     
-    if not budget:
+    if not row:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    if budget_update.amount is not None:
+    budget, category_name = row
+    
+    if budget_update.amount is not None and budget_update.amount != budget.amount:
         budget.amount = budget_update.amount
-    if budget_update.period is not None:
+        # The alert is re-armed against the new limit
+        budget.alerted_period_start = None
+    if budget_update.period is not None and budget_update.period != budget.period:
         budget.period = budget_update.period
-    if budget_update.alert_threshold is not None:
+        # Re-seeded for the new period's window on the next transaction
+        budget.period_start = None
+        budget.alerted_period_start = None
+    if budget_update.alert_threshold is not None and budget_update.alert_threshold != budget.alert_threshold:
         budget.alert_threshold = budget_update.alert_threshold
+        budget.alerted_period_start = None
     if budget_update.is_active is not None:
         budget.is_active = budget_update.is_active
     
     budget.updated_at = datetime.now()
     
-    db.commit()
-    db.refresh(budget)
+    await db.commit()
+    await db.refresh(budget)
     
-    category_name = None
-    if budget.category_id:
-        category = db.query(Category).filter(Category.id == budget.category_id).first()
-        if category:
-            category_name = category.name
-    
-    spent = 0.0
-    remaining = budget.amount - spent
-    percentage_used = (spent / budget.amount * 100) if budget.amount > 0 else 0
-    
-    return BudgetResponse(
-        id=budget.id,
-        category_id=budget.category_id,
-        category_name=category_name or "Overall",
-        amount=budget.amount,
-        spent=spent,
-        remaining=remaining,
-        percentage_used=percentage_used,
-        period=budget.period,
-        is_active=budget.is_active,
-        alert_threshold=budget.alert_threshold,
-        created_at=budget.created_at
-    )
+    return (await _budget_responses(db, [(budget, category_name)]))[0]
 
 @router.delete("/{budget_id}")
 async def delete_budget(
     budget_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a budget"""
     
-    budget = db.query(Budget).filter(
+    budget = await db.scalar(select(Budget).where(
         and_(
             Budget.id == budget_id,
-            Budget.user_id == current_user.id
+            Budget.user_id == current_user_id
         )
-    ).first()
+    ))
     
     if not budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    db.delete(budget)
-    db.commit()
+    await db.delete(budget)
+    await db.commit()
     
     return {"message": "Budget deleted successfully"}
@@ -2,24 +2,31 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 from app.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_id
 from app.models.user import User
-from app.models.transaction import Transaction
-from app.models.bank_statement import BankStatement
-from app.services.email_parser import EmailStatementParser, generate_password_variants
+from app.models.job import Job
+from app.services.email_parser import generate_password_variants
+from app.services.job_queue import enqueue_job, job_status
+from app.services.statement_sync import sync_statements_from_email, sync_statements_from_mailboxes  # noqa: F401  (register the job handlers)
+from app.services.sms_file_parser import SMSFileParser
+from app.services.transaction_ingest import TransactionIngestor
 
 router = APIRouter()
 
+# Jobs whose result is an EmailSyncResponse (statement uploads have their own status endpoint)
+EMAIL_JOB_KINDS = ("fetch_statements", "fetch_statements_multi")
+
 
 class EmailCredentials(BaseModel):
     email: EmailStr
     app_password: str
     imap_server: Optional[str] = None  # Auto-detect
     days: int = 60
+    folders: List[str] = ["INBOX"]
 
 
 class PDFPasswordInfo(BaseModel):
@@ -35,27 +42,66 @@ class FetchStatementsRequest(BaseModel):
     email_credentials: EmailCredentials
     pdf_password_info: Optional[PDFPasswordInfo] = None
     bank_name: Optional[str] = None
+    full_resync: bool = False  # ignore the mailbox checkpoint and rescan the last `days`
+
+
+class FetchMultipleStatementsRequest(BaseModel):
+    mailboxes: List[EmailCredentials]
+    pdf_password_info: Optional[PDFPasswordInfo] = None
+    bank_name: Optional[str] = None
+    full_resync: bool = False
 
 
 class EmailSyncResponse(BaseModel):
     total_emails_fetched: int
     statements_found: int
     statements_processed: int
+    statements_skipped: int = 0  # already imported (same file content)
     transactions_extracted: int
     failed_pdfs: List[str]
+    rows_per_second: float = 0.0
+    mailboxes: Optional[List[Dict]] = None  # per-mailbox summaries of a multi-mailbox sync
     message: str
 
 
-@router.post("/fetch-statements", response_model=EmailSyncResponse)
+class JobAcceptedResponse(BaseModel):
+    job_id: int
+    status: str
+    status_url: str
+
+
+class JobProgressCounts(BaseModel):
+    emails_scanned: int
+    pdfs_unlocked: int
+    transactions_inserted: int
+
+
+class JobStatusResponse(BaseModel):
+    job_id: int
+    kind: str
+    status: str  # queued, running, completed, failed
+    progress: JobProgressCounts
+    result: Optional[EmailSyncResponse] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+@router.post("/fetch-statements", response_model=JobAcceptedResponse, status_code=202)
 async def fetch_bank_statements_from_email(
     request: FetchStatementsRequest,
-    current_user: User = Depends(get_current_user),
+    current_user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
     **Automated Bank Statement Fetching from Email**
     
     Automatically fetches and processes bank statements from your email.
+    The work runs in the background: this returns a job id right away;
+    poll `GET /email/jobs/{job_id}` for progress and the final summary.
+    Syncs are incremental: later calls only look at new mail, and PDFs
+    that were imported before are skipped.
     
     **📧 Email Setup (Gmail):**
     1. Go to Google Account → Security
@@ -75,114 +121,78 @@ async def fetch_bank_statements_from_email(
     **🏦 Supported Banks:**
     ICICI, HDFC, Axis, SBI, Kotak, Yes Bank, IndusInd, BOB, PNB, Canara, Union, IDBI
     """
-    try:
-        creds = request.email_credentials
-        pdf_info = request.pdf_password_info
-        
-        # Initialize email parser
-        parser = EmailStatementParser(
-            email_address=creds.email,
-            email_password=creds.app_password,
-            imap_server=creds.imap_server
-        )
-        
-        # Fetch bank statement emails
-        emails_data = parser.fetch_bank_statement_emails(
-            days=creds.days,
-            bank_name=request.bank_name
-        )
-        
-        statements_processed = 0
-        total_transactions = 0
-        failed_pdfs = []
-        
-        # Process each email with PDF attachments
-        for email_data in emails_data:
-            bank = email_data['bank']
-            
-            for attachment in email_data['attachments']:
-                pdf_data = attachment['data']
-                filename = attachment['filename']
-                
-                try:
-                    # Try to unlock PDF
-                    unlocked_pdf = parser.try_unlock_pdf(
-                        pdf_data=pdf_data,
-                        bank=bank,
-                        user_dob=pdf_info.date_of_birth if pdf_info else None,
-                        user_mobile=pdf_info.mobile_number if pdf_info else None,
-                        user_account=pdf_info.account_number if pdf_info else None,
-                        user_pan=pdf_info.pan_card if pdf_info else None,
-                        custom_password=pdf_info.custom_password if pdf_info else None
-                    )
-                    
-                    if unlocked_pdf is None:
-                        failed_pdfs.append(f"{filename} (Password not matched)")
-                        continue
-                    
-                    # Parse transactions from PDF
-                    parsed_data = parser.parse_statement_from_pdf(unlocked_pdf)
-                    
-                    # Save bank statement record
-                    statement = BankStatement(
-                        user_id=current_user.id,
-                        filename=filename,
-                        file_path=f"email_import/{email_data['email_id']}",
-                        file_size=len(pdf_data),
-                        bank_name=bank,
-                        is_processed=True,
-                        processing_status="completed",
-                        total_transactions=parsed_data['total_transactions']
-                    )
-                    db.add(statement)
-                    db.flush()
-                    
-                    # Save transactions
-                    for trans in parsed_data['transactions']:
-                        # Determine transaction type
-                        debit_amt = float(trans['debit']) if trans['debit'] != "0.00" else 0
-                        credit_amt = float(trans['credit']) if trans['credit'] != "0.00" else 0
-                        
-                        amount = debit_amt if debit_amt > 0 else credit_amt
-                        trans_type = "debit" if debit_amt > 0 else "credit"
-                        
-                        transaction = Transaction(
-                            user_id=current_user.id,
-                            amount=amount,
-                            transaction_type=trans_type,
-                            description=trans['description'],
-                            merchant_name=trans['description'][:50],  # First 50 chars
-                            transaction_date=datetime.strptime(trans['date'], "%d/%d/%Y") if "/" in trans['date'] else datetime.now(),
-                            bank_name=bank,
-                            from_sms=False,
-                            category="uncategorized"
-                        )
-                        db.add(transaction)
-                        total_transactions += 1
-                    
-                    statements_processed += 1
-                    
-                except Exception as e:
-                    failed_pdfs.append(f"{filename} ({str(e)})")
-                    continue
-        
-        db.commit()
-        
-        return EmailSyncResponse(
-            total_emails_fetched=len(emails_data),
-            statements_found=sum(len(e['attachments']) for e in emails_data),
-            statements_processed=statements_processed,
-            transactions_extracted=total_transactions,
-            failed_pdfs=failed_pdfs,
-            message=f"✅ Processed {statements_processed} statements, extracted {total_transactions} transactions!"
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    job = enqueue_job(db, current_user_id, "fetch_statements", request.model_dump())
+    return JobAcceptedResponse(job_id=job.id, status=job.status, status_url=f"/api/v1/email/jobs/{job.id}")
+
+
+@router.post("/fetch-statements/multi", response_model=JobAcceptedResponse, status_code=202)
+async def fetch_bank_statements_from_mailboxes(
+    request: FetchMultipleStatementsRequest,
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Fetch statements from several linked mailboxes in parallel
+    
+    Runs as one background job (poll `GET /email/jobs/{job_id}`); the
+    result adds up all mailboxes and lists each one's summary or error.
+    """
+    if not request.mailboxes:
+        raise HTTPException(status_code=400, detail="No mailboxes given")
+    job = enqueue_job(db, current_user_id, "fetch_statements_multi", request.model_dump())
+    return JobAcceptedResponse(job_id=job.id, status=job.status, status_url=f"/api/v1/email/jobs/{job.id}")
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: int,
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Status and progress of a background job
+    
+    `progress` counts emails scanned, PDFs unlocked and transactions
+    inserted so far; `result` holds the summary once the job completes.
+    """
+    job = db.get(Job, job_id)
+    if job is None or job.user_id != current_user_id or job.kind not in EMAIL_JOB_KINDS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+
+def _import_sms_backup(messages: Iterator[Tuple], user_id: int, db: Session) -> Dict:
+    """
+    Parse a backup stream batch by batch, committing each batch as it is parsed
+
+    Reading the upload, parsing and the inserts are all blocking, so the
+    upload endpoints are plain functions and run on the threadpool. The
+    whole body has arrived (spooled by Starlette) before they are called:
+    batching bounds memory, it doesn't overlap the inserts with the upload.
+    """
+    total_sms = 0
+    
+    def counted():
+        nonlocal total_sms
+        for message in messages:
+            total_sms += 1
+            yield message
+    
+    ingestor = TransactionIngestor(db, user_id)
+    for batch in SMSFileParser.iter_batches(counted()):
+        # Messages imported before are skipped by fingerprint
+        ingestor.write_batch(batch)
+    
+    return {
+        "total_sms": total_sms,
+        "transactions_added": ingestor.inserted,
+        "rows_per_second": ingestor.stats()["rows_per_second"],
+        "message": f"✅ Successfully imported {ingestor.inserted} transactions from SMS backup!"
+    }
 
 
 @router.post("/upload-sms-csv")
-async def upload_sms_csv(
+def upload_sms_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -202,64 +212,15 @@ async def upload_sms_csv(
     - Upload here
     """
     try:
-        # Save uploaded file temporarily
-        import tempfile
-        import os
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
-        
-        # Parse CSV
-        transactions = SMSFileParser.parse_csv(tmp_path)
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
-        transactions_added = 0
-        
-        # Save to database
-        for trans_data in transactions:
-            # Check duplicates
-            existing = db.query(Transaction).filter(
-                Transaction.user_id == current_user.id,
-                Transaction.amount == trans_data['amount'],
-                Transaction.merchant_name == trans_data['merchant_name']
-            ).first()
-            
-            if not existing:
-                transaction = Transaction(
-                    user_id=current_user.id,
-                    amount=trans_data['amount'],
-                    transaction_type=trans_data['transaction_type'],
-                    merchant_name=trans_data.get('merchant_name', 'Unknown'),
-                    description=trans_data.get('description', ''),
-                    transaction_date=datetime.now(),
-                    from_sms=True,
-                    sms_sender=trans_data.get('sms_sender'),
-                    raw_sms_text=trans_data.get('raw_sms_text'),
-                    bank_name=trans_data.get('bank_name'),
-                    account_last4=trans_data.get('account_last4'),
-                    category=trans_data.get('category', 'uncategorized')
-                )
-                db.add(transaction)
-                transactions_added += 1
-        
-        db.commit()
-        
-        return {
-            "total_sms": len(transactions),
-            "transactions_added": transactions_added,
-            "message": f"✅ Successfully imported {transactions_added} transactions from SMS backup!"
-        }
+        # Rows are read from the spooled upload and imported in batches
+        return _import_sms_backup(SMSFileParser.iter_csv_messages(file.file), current_user.id, db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse CSV: {str(e)}")
 
 
 @router.post("/upload-sms-xml")
-async def upload_sms_xml(
+def upload_sms_xml(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -275,56 +236,8 @@ async def upload_sms_xml(
     - Upload here
     """
     try:
-        import tempfile
-        import os
-        
-        # Save uploaded file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xml') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
-        
-        # Parse XML
-        transactions = SMSFileParser.parse_xml(tmp_path)
-        
-        # Clean up
-        os.unlink(tmp_path)
-        
-        transactions_added = 0
-        
-        # Save to database
-        for trans_data in transactions:
-            existing = db.query(Transaction).filter(
-                Transaction.user_id == current_user.id,
-                Transaction.amount == trans_data['amount'],
-                Transaction.merchant_name == trans_data['merchant_name']
-            ).first()
-            
-            if not existing:
-                transaction = Transaction(
-                    user_id=current_user.id,
-                    amount=trans_data['amount'],
-                    transaction_type=trans_data['transaction_type'],
-                    merchant_name=trans_data.get('merchant_name', 'Unknown'),
-                    description=trans_data.get('description', ''),
-                    transaction_date=datetime.now(),
-                    from_sms=True,
-                    sms_sender=trans_data.get('sms_sender'),
-                    raw_sms_text=trans_data.get('raw_sms_text'),
-                    bank_name=trans_data.get('bank_name'),
-                    account_last4=trans_data.get('account_last4'),
-                    category=trans_data.get('category', 'uncategorized')
-                )
-                db.add(transaction)
-                transactions_added += 1
-        
-        db.commit()
-        
-        return {
-            "total_sms": len(transactions),
-            "transactions_added": transactions_added,
-            "message": f"✅ Successfully imported {transactions_added} transactions from SMS backup!"
-        }
+        # <sms> elements are parsed incrementally from the spooled upload and imported in batches
+        return _import_sms_backup(SMSFileParser.iter_xml_messages(file.file), current_user.id, db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse XML: {str(e)}")
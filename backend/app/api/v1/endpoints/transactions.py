@@ -5,9 +5,12 @@ from pydantic import BaseModel
 from typing import List
 from datetime import datetime
 
-from app.database import SessionLocal
+from app.database import get_db
+from app.core.security import get_current_user
 from app.models.transaction import Transaction
 from app.models.user import User
+from app.services.spending_rollup import apply_transactions
+from app.services.budget_alerts import evaluate_budget_alerts
 
 router = APIRouter()
 
@@ -15,26 +18,39 @@ class TransactionCreate(BaseModel):
     amount: float
     description: str | None = None
     date: datetime
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    transaction_type: str = "debit"
+    category: str = "uncategorized"
+    merchant_name: str | None = None
 
 @router.post("/", response_model=TransactionCreate)
-def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db)):
+def create_transaction(
+    transaction: TransactionCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     new_txn = Transaction(
         amount=transaction.amount,
         description=transaction.description,
-        date=transaction.date,
-        user_id=1  # Replace with actual user from auth session
+        transaction_date=transaction.date,
+        transaction_type=transaction.transaction_type,
+        category=transaction.category,
+        merchant_name=transaction.merchant_name,
+        user_id=current_user.id
     )
     db.add(new_txn)
+    db.flush()
+    apply_transactions(db, [new_txn])
+    evaluate_budget_alerts(db, current_user.id, [new_txn])
     db.commit()
     db.refresh(new_txn)
-    return new_txn
+    return TransactionCreate(
+        amount=new_txn.amount,
+        description=new_txn.description,
+        date=new_txn.transaction_date,
+        transaction_type=new_txn.transaction_type,
+        category=new_txn.category,
+        merchant_name=new_txn.merchant_name
+    )
 
 @router.get("/", response_model=List[TransactionCreate])
 def get_transactions(db: Session = Depends(get_db)):
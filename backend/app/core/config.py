@@ -24,6 +24,16 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    JWT_INCLUDE_USER_ID: bool = os.getenv("JWT_INCLUDE_USER_ID", "True") == "True"  # ties tokens to the account, not just its email
+    
+    # Password hashing (bcrypt work runs on a dedicated thread pool)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))  # beyond this, reject with 503
+    
+    # Authenticated user cache (per process)
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
     
     # AI/LLM Settings
     GROQ_API_KEY: Optional[str] = os.getenv("GROQ_API_KEY")
@@ -37,9 +47,38 @@ class Settings(BaseSettings):
         """Parse CORS_ORIGINS string into list"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    # Bulk SMS parsing (process pool)
+    SMS_PARSE_WORKERS: int = int(os.getenv("SMS_PARSE_WORKERS", str(os.cpu_count() or 1)))
+    SMS_PARSE_CHUNK_SIZE: int = int(os.getenv("SMS_PARSE_CHUNK_SIZE", "2000"))
+    SMS_PARSE_MIN_BATCH: int = int(os.getenv("SMS_PARSE_MIN_BATCH", "5000"))  # smaller batches are parsed in-process
+    
+    # Statement PDF text extraction (process pool, pages split into ranges)
+    PDF_PARSE_WORKERS: int = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+    PDF_SPILL_THRESHOLD: int = int(os.getenv("PDF_SPILL_THRESHOLD", str(4 * 1024 * 1024)))  # larger attachments go to disk
+    PDF_UNLOCK_PARALLEL_MIN: int = int(os.getenv("PDF_UNLOCK_PARALLEL_MIN", "8"))  # AES-256 candidates before checks go to the pool
+    PDF_SPILL_DIR: Optional[str] = os.getenv("PDF_SPILL_DIR")  # default: the system temp dir
+    
+    # Transaction ingestion (rows per INSERT batch / commit)
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+    
+    # Background jobs (email statement fetching)
+    JOB_BACKEND: str = os.getenv("JOB_BACKEND", "thread")  # thread, inline
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_WORKER_ID: Optional[str] = os.getenv("JOB_WORKER_ID")  # stable per replica; default: hostname:pid
+    JOB_HEARTBEAT_SECONDS: float = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+    JOB_STALE_SECONDS: float = float(os.getenv("JOB_STALE_SECONDS", "60"))  # no heartbeat for this long: abandoned
+    
+    # Email sync (IMAP connection pool, mailboxes synced in parallel)
+    IMAP_MAX_CONNECTIONS_PER_SERVER: int = int(os.getenv("IMAP_MAX_CONNECTIONS_PER_SERVER", "4"))
+    IMAP_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("IMAP_IDLE_TIMEOUT_SECONDS", "300"))
+    EMAIL_SYNC_CONCURRENCY: int = int(os.getenv("EMAIL_SYNC_CONCURRENCY", "8"))
+    
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes read/written per step
+    UPLOAD_PART_TTL_SECONDS: float = float(os.getenv("UPLOAD_PART_TTL_SECONDS", str(24 * 3600)))  # unfinished uploads kept this long
     
     class Config:
         env_file = ".env"
@@ -1,25 +1,36 @@
 # Security utilities
-from passlib.context import CryptContext
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import event, select
+from typing import Dict, Optional
 import bcrypt
 
 from app.core.config import settings
-from app.database import SessionLocal
+from app.core.user_cache import user_cache
+from app.database import AsyncSessionLocal
 from app.models.user import User
 
 # Use bcrypt directly instead of passlib for better compatibility
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# bcrypt releases the GIL, so a thread pool gives real parallelism; the
+# semaphore caps queued work so a login storm is shed instead of piling up
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
     # Truncate password to 72 bytes if needed (bcrypt limit)
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -32,6 +43,34 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a bcrypt hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def _run_password_task(fn, *args):
+    """Run bcrypt work on the password executor, shedding load when the queue is full"""
+    if not _password_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, please retry",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, fn, *args)
+    finally:
+        _password_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    """hash_password without blocking the event loop"""
+    return await _run_password_task(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password without blocking the event loop"""
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -43,42 +82,92 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str) -> Optional[str]:
-    """Decode and validate JWT token"""
+def decode_token_payload(token: str) -> Optional[Dict]:
+    """Decode and validate a JWT token, returning its claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
 
-def get_db():
-    """Database dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def decode_access_token(token: str) -> Optional[str]:
+    """Decode and validate JWT token"""
+    payload = decode_token_payload(token)
+    return payload["sub"] if payload else None
+
+def token_claims(user: User) -> Dict:
+    """Claims to put in an access token for a user"""
+    claims = {"sub": user.email}
+    if settings.JWT_INCLUDE_USER_ID:
+        claims["uid"] = user.id
+    return claims
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+def user_snapshot(user: User) -> Dict:
+    """Column values of a user worth caching (never the password hash)"""
+    return {
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+        if column.key != "hashed_password"
+    }
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate_user(target.id)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def _cached_snapshot(subject: str) -> Dict:
+    """The token subject's user snapshot, from the cache or (on a miss) the database"""
+    snapshot = user_cache.get(subject)
+    if snapshot is None:
+        async with AsyncSessionLocal() as db:
+            user = await db.scalar(select(User).where(User.email == subject))
+        if user is None:
+            raise _credentials_exception()
+        snapshot = user_snapshot(user)
+        user_cache.set(subject, snapshot)
+    return snapshot
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Get current authenticated user
+
+    Served from the user cache when possible; a database session is only
+    opened on a cache miss. The returned User is a transient copy, so it
+    must not be added to a session.
+    """
+    payload = decode_token_payload(token)
+    if payload is None:
+        raise _credentials_exception()
     
-    email = decode_access_token(token)
-    if email is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
+    return User(**await _cached_snapshot(payload["sub"]))
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """
+    Get the current user's id without hydrating a User
+
+    The user is still checked through the user cache, so a deleted or
+    deactivated account is turned away even while its token is valid. A
+    `uid` claim must match the account the token's subject now names.
+    """
+    payload = decode_token_payload(token)
+    if payload is None:
+        raise _credentials_exception()
     
-    return user
+    snapshot = await _cached_snapshot(payload["sub"])
+    if payload.get("uid", snapshot["id"]) != snapshot["id"]:
+        raise _credentials_exception()
+    if not snapshot["is_active"]:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return snapshot["id"]
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user"""
@@ -0,0 +1,66 @@
+# User cache - bounded TTL/LRU cache of authenticated users
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+
+class UserCache:
+    """
+    Per-process cache of user column snapshots keyed by token subject
+
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    evicted once `max_size` is reached. Snapshots are plain dicts so no ORM
+    instance is shared between requests or sessions.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Dict]:
+        """Snapshot for a token subject, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return snapshot
+
+    def set(self, subject: str, snapshot: Dict) -> None:
+        """Store a snapshot, evicting the least recently used entry when full"""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every entry that belongs to a user (whatever subject it was cached under)"""
+        with self._lock:
+            stale = [subject for subject, (_, snapshot) in self._entries.items() if snapshot.get("id") == user_id]
+            for subject in stale:
+                del self._entries[subject]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
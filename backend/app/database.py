@@ -2,6 +2,7 @@
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import settings
 
 # Supabase-optimized connection parameters
@@ -27,6 +28,42 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (asyncpg / aiosqlite)"""
+    if url.startswith(("postgresql://", "postgres://", "postgresql+psycopg2://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+async_connect_args = {}
+if "supabase.co" in settings.DATABASE_URL:
+    # asyncpg equivalents of the psycopg2 parameters above
+    async_connect_args = {
+        "timeout": 10,
+        "server_settings": {"timezone": "utc"}
+    }
+
+# Queue-pool sizing (aiosqlite manages its own connections)
+async_pool_args = {}
+if not settings.DATABASE_URL.startswith("sqlite"):
+    async_pool_args = {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_recycle": 3600
+    }
+
+# Async engine for endpoints that must not block the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+    connect_args=async_connect_args,
+    **async_pool_args
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -40,3 +77,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
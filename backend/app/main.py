@@ -1,16 +1,19 @@
 # Main application entry point
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
 from app.core.config import settings
 from app.api.v1.endpoints import auth, transactions, bank_statements, users, analytics, ai, budgets, categories, email_integration
+from app.database import SessionLocal
+from app.services.job_queue import get_job_backend, recover_interrupted_jobs, shutdown_job_backend
+from app.services.imap_pool import imap_pool
+from app.services.pdf_text import shutdown_pdf_pools
+from app.services.sms_forwarding_handler import shutdown_parse_pools
 import os
 
-# Import all models to ensure they are registered with SQLAlchemy
-from app.models import user, transaction, bank_statement, category, budget, ai_insight, spending_pattern
+# Register every model with SQLAlchemy
+from app import models  # noqa: F401
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Database tables are managed by Alembic migrations: run `alembic upgrade head`
 
 # Create upload directory
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
@@ -41,6 +44,27 @@ app.include_router(budgets.router, prefix="/api/v1/budgets", tags=["Budgets"])
 app.include_router(categories.router, prefix="/api/v1/categories", tags=["Categories"])
 app.include_router(email_integration.router, prefix="/api/v1/email", tags=["Email Integration"])
 
+@app.on_event("startup")
+def recover_jobs():
+    """
+    Jobs can't resume after a restart (credentials are never stored), so close out abandoned ones
+
+    Jobs the previous run stamped just before it stopped only go stale
+    after JOB_STALE_SECONDS. The job backend is started here, not on the
+    first enqueue, so its heartbeat thread is there to fail them then.
+    """
+    with SessionLocal() as db:
+        recover_interrupted_jobs(db)
+    get_job_backend()
+
+@app.on_event("shutdown")
+def shutdown_worker_pools():
+    """Stop background workers and worker processes"""
+    shutdown_job_backend()
+    shutdown_parse_pools()
+    shutdown_pdf_pools()
+    imap_pool.close_all()
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,15 @@
+# Database models - importing the package registers every table on Base.metadata
+from app.models import (  # noqa: F401
+    ai_insight,
+    bank_statement,
+    budget,
+    category,
+    daily_spending_rollup,
+    email_sync_state,
+    job,
+    parsed_statement,
+    spending_pattern,
+    statement_password_pattern,
+    transaction,
+    user,
+)
@@ -1,11 +1,14 @@
 # AI Insight model for storing AI-generated recommendations
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class AIInsight(Base):
     __tablename__ = "ai_insights"
+    __table_args__ = (
+        Index("ix_ai_insights_user_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,11 +1,14 @@
 # Bank statement model
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class BankStatement(Base):
     __tablename__ = "bank_statements"
+    __table_args__ = (
+        Index("ix_bank_statements_user_content_hash", "user_id", "content_hash", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -14,6 +17,7 @@ class BankStatement(Base):
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True)  # sha256 of the original file; one statement per file and user (cleared when the import fails)
     
     # Bank details
     bank_name = Column(String, nullable=True)
@@ -26,6 +30,7 @@ class BankStatement(Base):
     is_encrypted = Column(Boolean, default=False)
     processing_status = Column(String, default="pending")  # pending, processing, completed, failed
     error_message = Column(Text, nullable=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=True)  # import job of an uploaded statement
     
     # Extracted data
     total_transactions = Column(Integer, default=0)
@@ -1,17 +1,21 @@
 # Budget model for spending limits
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index("ix_budgets_user_active", "user_id", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Budget details
-    category = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)  # None = overall budget
+    category = Column(String, nullable=False)  # Category name, or "overall"
     amount = Column(Float, nullable=False)
     period = Column(String, default="monthly")  # daily, weekly, monthly, yearly
     
@@ -19,6 +23,11 @@ class Budget(Base):
     is_active = Column(Boolean, default=True)
     alert_threshold = Column(Float, default=0.8)  # Alert when 80% spent
     
+    # Running spend for the current period, maintained at ingest time
+    period_start = Column(DateTime, nullable=True)
+    period_spent = Column(Float, default=0.0)
+    alerted_period_start = Column(DateTime, nullable=True)  # Period that already raised an alert
+    
     # Timestamps
     start_date = Column(DateTime, default=datetime.utcnow)
     end_date = Column(DateTime, nullable=True)
@@ -0,0 +1,27 @@
+# Daily spending rollup model - per-user/per-day aggregates of transactions
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class DailySpendingRollup(Base):
+    __tablename__ = "daily_spending_rollup"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "category", "transaction_type", name="uq_daily_spending_rollup_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Rollup key (day is the UTC date of Transaction.created_at)
+    day = Column(Date, nullable=False)
+    category = Column(String, nullable=False, default="uncategorized")
+    transaction_type = Column(String, nullable=False)  # debit, credit
+
+    # Aggregates
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+
+    # Timestamps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
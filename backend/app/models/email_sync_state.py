@@ -0,0 +1,24 @@
+# Email sync state model - per-mailbox UID checkpoint for incremental statement syncs
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class EmailSyncState(Base):
+    __tablename__ = "email_sync_state"
+    __table_args__ = (
+        UniqueConstraint("user_id", "email_address", "mailbox", name="uq_email_sync_state_mailbox"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Mailbox identity
+    email_address = Column(String, nullable=False)
+    mailbox = Column(String, nullable=False, default="INBOX")
+
+    # Checkpoint: UIDs are only comparable while UIDVALIDITY is unchanged
+    uidvalidity = Column(Integer, nullable=True)
+    last_uid = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    last_synced_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,34 @@
+# Background job model - long-running work (email statement fetching) tracked for polling
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
+from datetime import datetime
+from app.database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_user_created_at", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    kind = Column(String, nullable=False)  # fetch_statements
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+
+    # Progress counters, updated while the job runs
+    emails_scanned = Column(Integer, nullable=False, default=0)
+    pdfs_unlocked = Column(Integer, nullable=False, default=0)
+    transactions_inserted = Column(Integer, nullable=False, default=0)
+
+    # Owning process, and when it last showed it was alive (see job_queue.JobHeartbeat)
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    # Outcome (result is JSON text)
+    result = Column(Text, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
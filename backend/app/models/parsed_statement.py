@@ -0,0 +1,24 @@
+# Parsed statement model - cached parse results keyed by the statement file's SHA-256
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class ParsedStatement(Base):
+    __tablename__ = "parsed_statements"
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_hash", "parser_version", name="uq_parsed_statement_content"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Per user: a hit must not hand a locked statement's contents to someone without its password
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Cache key
+    content_hash = Column(String(64), nullable=False)  # sha256 of the original (still encrypted) file
+    parser_version = Column(String, nullable=False)
+
+    # extract_statement_transactions() result as JSON
+    result = Column(Text, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,20 @@
+# Statement password pattern model - which password pattern last opened a user's statements from a bank
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class StatementPasswordPattern(Base):
+    __tablename__ = "statement_password_patterns"
+    __table_args__ = (
+        UniqueConstraint("user_id", "bank_name", name="uq_statement_password_pattern_bank"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    bank_name = Column(String, nullable=False)
+
+    # Pattern name (e.g. DOB_DDMMYYYY), never the password itself
+    pattern = Column(String, nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
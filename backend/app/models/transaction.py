@@ -1,11 +1,17 @@
 # Transaction model
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_created_at", "user_id", "created_at"),
+        Index("ix_transactions_user_type_created_at", "user_id", "transaction_type", "created_at"),
+        Index("ix_transactions_user_merchant", "user_id", "merchant_name"),
+        Index("uq_transactions_user_fingerprint", "user_id", "fingerprint", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -25,6 +31,7 @@ class Transaction(Base):
     from_sms = Column(Boolean, default=False)
     sms_sender = Column(String, nullable=True)
     raw_sms_text = Column(Text, nullable=True)
+    fingerprint = Column(String(64), nullable=True)  # sha256 of sender, text and timestamp; dedupes imports
     
     # Bank information
     bank_name = Column(String, nullable=True)
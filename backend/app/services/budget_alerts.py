@@ -0,0 +1,136 @@
+# Budget alert service - evaluates budget thresholds as transactions arrive
+from datetime import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.ai_insight import AIInsight
+from app.models.budget import Budget
+from app.models.category import Category
+from app.services.budget_tracker import compute_spent, current_period
+from app.services.spending_rollup import transaction_value
+
+
+def normalized_threshold(threshold: Optional[float]) -> float:
+    """Alert threshold as a fraction (stored either as 0.8 or as 80.0)"""
+    if threshold is None:
+        return 0.8
+    return threshold / 100 if threshold > 1 else threshold
+
+
+def evaluate_budget_alerts(
+    db: Session,
+    user_id: int,
+    transactions: Iterable,
+    now: Optional[datetime] = None
+) -> List[AIInsight]:
+    """
+    Update running period totals of the budgets touched by a batch of
+    newly flushed transactions and raise budget_alert insights
+
+    Each affected budget is evaluated once per batch. A budget whose
+    running total belongs to an older period is re-seeded with a single
+    grouped query (which already includes the batch); otherwise the
+    batch's debits are added to the running total. An alert is emitted
+    the first time a period's spend crosses the threshold.
+
+    The totals and the alerted period are written with conditional
+    UPDATE ... RETURNING statements, so concurrent batches for the same
+    budget neither lose each other's debits nor both raise the alert.
+
+    Returns:
+        Insights added to the session (not committed)
+    """
+    debits = [
+        txn for txn in transactions
+        if transaction_value(txn, "transaction_type") == "debit"
+    ]
+    if not debits:
+        return []
+
+    now = now or datetime.utcnow()
+    batch_categories = {transaction_value(txn, "category") or "uncategorized" for txn in debits}
+
+    rows = db.query(Budget, Category.name).outerjoin(
+        Category, Category.id == Budget.category_id
+    ).filter(
+        and_(
+            Budget.user_id == user_id,
+            Budget.is_active == True
+        )
+    ).all()
+    affected = [
+        (budget, category_name) for budget, category_name in rows
+        if budget.category_id is None or category_name in batch_categories
+    ]
+    if not affected:
+        return []
+
+    windows = {budget.id: current_period(budget.start_date, budget.period, now) for budget, _ in affected}
+    stale = [budget for budget, _ in affected if budget.period_start != windows[budget.id][0]]
+    reseeded = compute_spent(db, stale, now)
+
+    insights = []
+    for budget, category_name in affected:
+        period_start, period_end = windows[budget.id]
+        spent = None
+        if budget.id in reseeded:
+            # Only the first batch into a new period re-seeds; a later one adds to its total
+            spent = db.execute(
+                update(Budget)
+                .where(Budget.id == budget.id, or_(Budget.period_start.is_(None), Budget.period_start != period_start))
+                .values(period_start=period_start, period_spent=reseeded[budget.id])
+                .returning(Budget.period_spent)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+        if spent is None:
+            delta = sum(
+                float(transaction_value(txn, "amount") or 0)
+                for txn in debits
+                if (budget.category_id is None or transaction_value(txn, "category") == category_name)
+                and period_start <= (transaction_value(txn, "created_at") or now) < period_end
+            )
+            spent = db.execute(
+                update(Budget)
+                .where(Budget.id == budget.id)
+                .values(period_spent=func.coalesce(Budget.period_spent, 0.0) + delta)
+                .returning(Budget.period_spent)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+        set_committed_value(budget, "period_start", period_start)
+        set_committed_value(budget, "period_spent", spent)
+
+        if budget.amount <= 0 or budget.alerted_period_start == period_start:
+            continue
+        usage = budget.period_spent / budget.amount
+        if usage < normalized_threshold(budget.alert_threshold):
+            continue
+
+        claimed = db.execute(
+            update(Budget)
+            .where(Budget.id == budget.id, Budget.alerted_period_start.is_distinct_from(period_start))
+            .values(alerted_period_start=period_start)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        set_committed_value(budget, "alerted_period_start", period_start)
+        if not claimed:
+            continue  # another batch raised this period's alert
+
+        label = category_name or "Overall"
+        insight = AIInsight(
+            user_id=user_id,
+            insight_type="budget_alert",
+            title=f"Budget alert: {label}",
+            content=(
+                f"You've used {usage * 100:.0f}% of your {budget.period} {label} budget "
+                f"(₹{budget.period_spent:.2f} of ₹{budget.amount:.2f})."
+            ),
+            priority="high" if usage >= 1 else "medium",
+            category=budget.category,
+            related_amount=f"{budget.period_spent:.2f}",
+            is_actionable=True
+        )
+        db.add(insight)
+        insights.append(insight)
+
+    return insights
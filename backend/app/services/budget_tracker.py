@@ -0,0 +1,86 @@
+# Budget tracker service - period windows and spend for budgets
+import calendar
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, and_, or_, select, literal, union_all, DateTime, Integer
+from sqlalchemy.orm import Session
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.transaction import Transaction
+
+
+def _shift_months(anchor: datetime, months: int) -> datetime:
+    """Move `anchor` by whole months, clamping the day to the month's length"""
+    index = anchor.year * 12 + anchor.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    day = min(anchor.day, calendar.monthrange(year, month)[1])
+    return anchor.replace(year=year, month=month, day=day)
+
+
+def current_period(start_date: datetime, period: str, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Window [start, end) of the budget period containing `now`
+
+    Periods repeat from the budget's start_date: daily and weekly ones in
+    fixed steps, monthly and yearly ones on the same day of the month.
+    Before start_date the first period is returned.
+    """
+    now = now or datetime.utcnow()
+    start_date = start_date or now
+
+    if period in ("monthly", "yearly"):
+        step = 12 if period == "yearly" else 1
+        elapsed = max((now.year - start_date.year) * 12 + now.month - start_date.month, 0) // step
+        if elapsed and _shift_months(start_date, elapsed * step) > now:
+            elapsed -= 1
+        return _shift_months(start_date, elapsed * step), _shift_months(start_date, (elapsed + 1) * step)
+
+    length = timedelta(days=7 if period == "weekly" else 1)
+    elapsed = max(int((now - start_date) / length), 0)
+    period_start = start_date + elapsed * length
+    return period_start, period_start + length
+
+
+def compute_spent(db: Session, budgets: List[Budget], now: Optional[datetime] = None) -> Dict[int, float]:
+    """
+    Spend of each budget within its current period, in one grouped query
+
+    Period windows are computed in Python and joined in as a CTE. A budget
+    without a category counts every debit; otherwise debits whose category
+    matches the budget's Category name.
+
+    Returns:
+        {budget_id: spent}
+    """
+    if not budgets:
+        return {}
+
+    window_selects = []
+    for budget in budgets:
+        period_start, period_end = current_period(budget.start_date, budget.period, now)
+        window_selects.append(select(
+            literal(budget.id, Integer).label("budget_id"),
+            literal(period_start, DateTime).label("period_start"),
+            literal(period_end, DateTime).label("period_end")
+        ))
+    windows = (union_all(*window_selects) if len(window_selects) > 1 else window_selects[0]).cte("budget_windows")
+
+    rows = db.query(
+        windows.c.budget_id,
+        func.coalesce(func.sum(Transaction.amount), 0)
+    ).select_from(windows).join(
+        Budget, Budget.id == windows.c.budget_id
+    ).outerjoin(
+        Category, Category.id == Budget.category_id
+    ).outerjoin(
+        Transaction,
+        and_(
+            Transaction.user_id == Budget.user_id,
+            Transaction.transaction_type == "debit",
+            Transaction.created_at >= windows.c.period_start,
+            Transaction.created_at < windows.c.period_end,
+            or_(Budget.category_id.is_(None), Transaction.category == Category.name)
+        )
+    ).group_by(windows.c.budget_id).all()
+
+    return {budget_id: float(spent or 0) for budget_id, spent in rows}
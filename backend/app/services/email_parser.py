@@ -1,14 +1,207 @@
 # Email-based Bank Statement Parser
+import base64
+import binascii
 import imaplib
 import email
+import email.utils
+import logging
+import quopri
 from email.header import decode_header
 from datetime import datetime, timedelta
 import os
 import re
-from typing import List, Dict, Optional
-import PyPDF2
-import pdfplumber
-from io import BytesIO
+from typing import Callable, Iterator, List, Dict, Optional, Tuple, Union
+from contextlib import contextmanager
+from itertools import takewhile
+
+from app.services.imap_pool import IMAPConnectionPool, imap_pool, open_imap_connection
+from app.core.config import settings
+from app.services.pdf_text import PdfSource, UnlockedPdf, spill_file
+from app.services.pdf_unlock import find_password
+from app.services.statement_layouts import extract_statement_transactions
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_KEYWORDS = ("statement", "account statement", "bank statement", "e-statement", "monthly statement")
+HEADER_FIELDS = "HEADER.FIELDS (SUBJECT FROM DATE)"
+HEADER_FETCH_BATCH = 100
+
+_IMAP_TOKEN_RE = re.compile(rb'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+_FETCH_START_RE = re.compile(rb"^\d+ \(")
+_LITERAL_RE = re.compile(rb"\{(\d+)\}$")
+_SECTION_LITERAL_RE = re.compile(rb"BODY\[([^\]]*)\](?:<\d+>)? \{\d+\}$")
+_UID_RE = re.compile(rb"UID (\d+)")
+
+
+def _imap_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _subject_search(since_date: str, keywords: List[str]) -> str:
+    """SINCE plus one prefix-OR chain over SUBJECT keywords (IMAP OR takes two keys)"""
+    keywords = list(dict.fromkeys(keywords))
+    keys = " ".join(f"SUBJECT {_imap_quote(keyword)}" for keyword in keywords)
+    return f"(SINCE {since_date} {'OR ' * (len(keywords) - 1)}{keys})" if keywords else f"(SINCE {since_date})"
+
+
+def _fetch_responses(data: List) -> List[Tuple[bytes, Dict[str, bytes]]]:
+    """
+    Group imaplib FETCH output into (metadata, {section: literal}) per message
+
+    Literals that are not BODY[...] sections (e.g. a long filename inside
+    BODYSTRUCTURE) are inlined back into the metadata as quoted strings.
+    """
+    responses = []
+    for item in data:
+        text, literal = item if isinstance(item, tuple) else (item, None)
+        if not isinstance(text, bytes):
+            continue
+        if _FETCH_START_RE.match(text) or not responses:
+            responses.append([b"", {}])
+        meta, sections = responses[-1]
+        if literal is not None:
+            section = _SECTION_LITERAL_RE.search(text)
+            if section:
+                sections[section.group(1).decode().upper()] = literal
+                text = text[:section.start()]
+            else:
+                escaped = literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"')
+                text = _LITERAL_RE.sub(b"", text) + b'"' + escaped + b'"'
+        responses[-1][0] = meta + text
+    return [(meta, sections) for meta, sections in responses]
+
+
+def _parse_imap_list(data: bytes):
+    """Parse one parenthesised IMAP value into nested lists of str/None"""
+    stack = [[]]
+    for match in _IMAP_TOKEN_RE.finditer(data):
+        token = match.group()
+        if token == b"(":
+            stack.append([])
+        elif token == b")":
+            if len(stack) == 1:
+                break
+            value = stack.pop()
+            stack[-1].append(value)
+            if len(stack) == 1:
+                break
+        elif token.startswith(b'"'):
+            stack[-1].append(re.sub(rb"\\(.)", rb"\1", token[1:-1]).decode("utf-8", "replace"))
+        else:
+            stack[-1].append(None if token.upper() == b"NIL" else token.decode("utf-8", "replace"))
+    return stack[0][0] if stack[0] else None
+
+
+def _uid_of(meta: bytes) -> str:
+    match = _UID_RE.search(meta)
+    return match.group(1).decode() if match else ""
+
+
+def _bodystructure_of(meta: bytes):
+    position = meta.upper().find(b"BODYSTRUCTURE ")
+    return _parse_imap_list(meta[position + len("BODYSTRUCTURE "):]) if position >= 0 else None
+
+
+def _param(params, name: str) -> Optional[str]:
+    """Value of a BODYSTRUCTURE parameter list entry, with RFC 2231 names decoded"""
+    if not isinstance(params, list):
+        return None
+    pairs = dict(zip(params[::2], params[1::2]))
+    for key, value in pairs.items():
+        if isinstance(key, str) and value is not None:
+            if key.upper() == name:
+                return value
+            if key.upper() == name + "*":
+                return email.utils.collapse_rfc2231_value(email.utils.decode_rfc2231(value))
+    return None
+
+
+def _pdf_parts(structure, section: str = "") -> List[Tuple[str, str, str]]:
+    """(section, filename, transfer encoding) of every PDF part in a BODYSTRUCTURE"""
+    if not isinstance(structure, list) or not structure:
+        return []
+    if isinstance(structure[0], list):
+        # multipart: child parts first, then the subtype and extension data
+        parts = []
+        for index, child in enumerate(takewhile(lambda item: isinstance(item, list), structure)):
+            parts.extend(_pdf_parts(child, f"{section}.{index + 1}" if section else str(index + 1)))
+        return parts
+
+    main_type, sub_type = (structure[0] or "").lower(), (structure[1] or "").lower()
+    filename = _param(structure[2], "NAME")
+    for extension in structure[7:]:
+        # Disposition: ("attachment" ("FILENAME" "statement.pdf"))
+        if isinstance(extension, list) and len(extension) == 2 and isinstance(extension[0], str):
+            filename = _param(extension[1], "FILENAME") or filename
+    is_pdf = (main_type, sub_type) == ("application", "pdf") or (filename or "").lower().endswith(".pdf")
+    if not is_pdf or not filename:
+        return []
+    return [(section or "1", filename, (structure[5] or "7bit").lower())]
+
+
+def _decode_transfer(data: bytes, encoding: str) -> bytes:
+    if encoding == "base64":
+        return base64.b64decode(data)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(data)
+    return data
+
+
+def _decode_attachment(data: bytes, encoding: str) -> Tuple[PdfSource, bool]:
+    """
+    Decode a PDF part; above PDF_SPILL_THRESHOLD it is decoded straight
+    into a temporary file instead of memory
+
+    Returns:
+        (bytes or the file's path, whether it was spilled to disk)
+    """
+    if encoding != "base64" or len(data) * 3 // 4 <= settings.PDF_SPILL_THRESHOLD:
+        return _decode_transfer(data, encoding), False
+    
+    with spill_file() as out:
+        # 1 MB at a time, carrying over base64 characters that don't fill a 4-byte quantum
+        carry = b""
+        view = memoryview(data)
+        for start in range(0, len(view), 1 << 20):
+            chunk = carry + bytes(view[start:start + (1 << 20)]).translate(None, b" \t\r\n")
+            whole = len(chunk) // 4 * 4
+            out.write(binascii.a2b_base64(chunk[:whole]))
+            carry = chunk[whole:]
+        out.write(binascii.a2b_base64(carry))
+    return out.name, True
+
+
+def _dob(fmt: str, case: Callable[[str], str] = str) -> Callable[[Dict], Optional[str]]:
+    def derive(info: Dict) -> Optional[str]:
+        dob = info["user_dob"]
+        return case(datetime.strptime(dob, "%d%m%Y").strftime(fmt)) if dob else None
+    return derive
+
+
+def _last4(field: str, upper: bool = False) -> Callable[[Dict], Optional[str]]:
+    def derive(info: Dict) -> Optional[str]:
+        value = info[field]
+        return (value[-4:].upper() if upper else value[-4:]) if value else None
+    return derive
+
+
+# Password pattern -> derivation from the user's details (None when a detail is missing)
+PASSWORD_PATTERNS: Dict[str, Callable[[Dict], Optional[str]]] = {
+    "EMPTY": lambda info: "",  # Encrypted only to restrict printing/copying
+    "CUSTOM": lambda info: info["custom_password"],
+    "DOB_DDMMYYYY": _dob("%d%m%Y"),  # 15041990
+    "DOB_DDMMYY": _dob("%d%m%y"),  # 150490
+    "DOB_ddmmmyyyy": _dob("%d%b%Y", str.lower),  # 15apr1990
+    "DOB_DDMMMYYYY": _dob("%d%b%Y", str.upper),  # 15APR1990
+    "DOB_MMYYYY": lambda info: info["user_dob"][-6:] if info["user_dob"] else None,  # 041990
+    "DOB_YYYY": lambda info: info["user_dob"][-4:] if info["user_dob"] else None,
+    "MOBILE_LAST4": _last4("user_mobile"),
+    "MOBILE": lambda info: info["user_mobile"],
+    "ACCOUNT_LAST4": _last4("user_account"),
+    "PANCARD": lambda info: info["user_pan"].upper() if info["user_pan"] else None,
+    "PANCARD_LAST4": _last4("user_pan", upper=True),
+}
+
 
 class EmailStatementParser:
     """
@@ -33,7 +226,7 @@ class EmailStatementParser:
         "DEFAULT": ["DOB_DDMMYYYY", "MOBILE_LAST4", "ACCOUNT_LAST4"]
     }
     
-    def __init__(self, email_address: str, email_password: str, imap_server: str = None):
+    def __init__(self, email_address: str, email_password: str, imap_server: str = None, pool: IMAPConnectionPool = None):
         """
         Initialize email parser
         
@@ -41,9 +234,14 @@ class EmailStatementParser:
             email_address: User's email (Gmail/Yahoo)
             email_password: Email app password (not regular password)
             imap_server: IMAP server address (auto-detected for Gmail/Yahoo)
+            pool: Connection pool (defaults to the shared one)
         """
         self.email_address = email_address
         self.email_password = email_password
+        self.pool = pool or imap_pool
+        self._connection = None
+        self.uidvalidity = None
+        self.highest_uid = None
         
         # Auto-detect IMAP server
         if imap_server is None:
@@ -60,12 +258,25 @@ class EmailStatementParser:
     
     def connect_to_email(self) -> imaplib.IMAP4_SSL:
         """Connect to email server"""
-        try:
-            mail = imaplib.IMAP4_SSL(self.imap_server)
-            mail.login(self.email_address, self.email_password)
-            return mail
-        except Exception as e:
-            raise Exception(f"Email connection failed: {str(e)}")
+        return open_imap_connection(self.imap_server, self.email_address, self.email_password)
+    
+    @contextmanager
+    def pooled_connection(self) -> Iterator[imaplib.IMAP4]:
+        """
+        Borrow a logged-in connection for this mailbox from the pool
+        
+        Nested uses share the outer borrow, so a sync that wraps all its
+        folders in one block logs in (or takes a pooled session) once.
+        """
+        if self._connection is not None:
+            yield self._connection
+            return
+        with self.pool.connection(self.imap_server, self.email_address, self.email_password) as mail:
+            self._connection = mail
+            try:
+                yield mail
+            finally:
+                self._connection = None
     
     def fetch_bank_statement_emails(self, days: int = 60, bank_name: str = None) -> List[Dict]:
         """
@@ -78,70 +289,119 @@ class EmailStatementParser:
         Returns:
             List of emails with PDF attachments
         """
-        mail = self.connect_to_email()
-        mail.select("inbox")
+        return [e for e in self.iter_bank_statement_emails(days, bank_name) if e["attachments"]]
+    
+    def iter_bank_statement_emails(
+        self,
+        days: int = 60,
+        bank_name: str = None,
+        limit: int = 50,
+        after_uid: Optional[int] = None,
+        uidvalidity: Optional[int] = None,
+        folder: str = "INBOX"
+    ) -> Iterator[Dict]:
+        """
+        Yield every matching email as soon as its PDFs have been fetched
+        
+        One OR-combined UID SEARCH covers all keywords, so a message that
+        matches several of them is only fetched once. Headers and
+        BODYSTRUCTURE come first (in one FETCH per batch of UIDs), and
+        only the PDF body parts of messages that have any are downloaded.
+        Emails without PDF attachments are yielded too (with an empty
+        attachments list) so callers can report how many were scanned.
+        
+        Args:
+            after_uid: Checkpoint from an earlier sync; only newer UIDs are
+                fetched (all of them, `limit` applies to full scans)
+            uidvalidity: UIDVALIDITY the checkpoint belongs to; if the
+                mailbox reports another value the checkpoint is ignored
+            folder: Mailbox folder; the pooled connection is reused when
+                the next folder of the same account is synced
+        
+        After SELECT, `self.uidvalidity` and `self.highest_uid` describe
+        the mailbox and the newest matching UID, for the next checkpoint.
+        """
+        with self.pooled_connection() as mail:
+            yield from self._iter_statement_emails(mail, days, bank_name, limit, after_uid, uidvalidity, folder)
+    
+    def _iter_statement_emails(self, mail, days, bank_name, limit, after_uid, uidvalidity, folder) -> Iterator[Dict]:
+        status, _ = mail.select(_imap_quote(folder))
+        if status != "OK":
+            raise Exception(f"Cannot open folder {folder}")
+        _, validity = mail.response("UIDVALIDITY")
+        self.uidvalidity = int(validity[0]) if validity and validity[0] else None
+        if after_uid and (uidvalidity is None or uidvalidity != self.uidvalidity):
+            after_uid = None  # UIDs were renumbered, rescan
         
         # Calculate date range
         since_date = (datetime.now() - timedelta(days=days)).strftime("%d-%b-%Y")
         
         # Search criteria - Bank statement keywords
-        search_keywords = [
-            "statement",
-            "account statement",
-            "bank statement",
-            "e-statement",
-            "monthly statement"
-        ]
-        
+        search_keywords = list(STATEMENT_KEYWORDS)
         if bank_name:
             search_keywords.append(bank_name.lower())
-        
-        emails_data = []
-        
-        for keyword in search_keywords:
-            # Search for emails
-            status, messages = mail.search(None, f'(SINCE {since_date} SUBJECT "{keyword}")')
+        criteria = _subject_search(since_date, search_keywords)
+        if after_uid:
+            criteria = f"(UID {after_uid + 1}:* {criteria[1:-1]})"
+        
+        status, messages = mail.uid("SEARCH", None, criteria)
+        if status != "OK":
+            return
+        # "n:*" always matches the newest message, even below n
+        uids = sorted({int(uid) for uid in messages[0].split() if int(uid) > (after_uid or 0)})
+        if not after_uid:
+            uids = uids[-limit:]
+        self.highest_uid = uids[-1] if uids else after_uid
+        
+        for start in range(0, len(uids), HEADER_FETCH_BATCH):
+            batch = ",".join(str(uid) for uid in uids[start:start + HEADER_FETCH_BATCH])
+            status, fetched = mail.uid("FETCH", batch, f"(UID BODYSTRUCTURE BODY.PEEK[{HEADER_FIELDS}])")
+            if status != "OK":
+                continue
             
+            for meta, sections in _fetch_responses(fetched):
+                try:
+                    yield self._statement_email(mail, meta, sections)
+                except Exception as e:
+                    print(f"Error processing email {_uid_of(meta)}: {str(e)}")
+                    continue
+    
+    def _statement_email(self, mail, meta: bytes, sections: Dict[str, bytes]) -> Dict:
+        """Build the email dict from a header/BODYSTRUCTURE response, fetching only its PDF parts"""
+        uid = _uid_of(meta)
+        header = next((data for name, data in sections.items() if name.startswith("HEADER")), b"")
+        email_message = email.message_from_bytes(header)
+        
+        # Extract email details
+        subject = self._decode_subject(email_message["Subject"])
+        from_email = email_message.get("From")
+        
+        pdf_parts = [
+            (section, self._decode_subject(filename), encoding)
+            for section, filename, encoding in _pdf_parts(_bodystructure_of(meta))
+        ]
+        attachments = []
+        if pdf_parts:
+            items = " ".join(f"BODY.PEEK[{section}]" for section, _, _ in pdf_parts)
+            status, fetched = mail.uid("FETCH", uid, f"({items})")
             if status == "OK":
-                email_ids = messages[0].split()
-                
-                for email_id in email_ids[-10:]:  # Last 10 emails
-                    try:
-                        status, msg_data = mail.fetch(email_id, "(RFC822)")
-                        
-                        if status == "OK":
-                            email_body = msg_data[0][1]
-                            email_message = email.message_from_bytes(email_body)
-                            
-                            # Extract email details
-                            subject = self._decode_subject(email_message["Subject"])
-                            from_email = email_message.get("From")
-                            date = email_message.get("Date")
-                            
-                            # Extract bank name from sender
-                            detected_bank = self._detect_bank_from_email(from_email, subject)
-                            
-                            # Check for PDF attachments
-                            attachments = self._extract_pdf_attachments(email_message)
-                            
-                            if attachments:
-                                emails_data.append({
-                                    "email_id": email_id.decode(),
-                                    "subject": subject,
-                                    "from": from_email,
-                                    "date": date,
-                                    "bank": detected_bank,
-                                    "attachments": attachments
-                                })
-                    
-                    except Exception as e:
-                        print(f"Error processing email {email_id}: {str(e)}")
-                        continue
-        
-        mail.close()
-        mail.logout()
-        
-        return emails_data
+                bodies = {}
+                for _, fetched_sections in _fetch_responses(fetched):
+                    bodies.update(fetched_sections)
+                for section, filename, encoding in pdf_parts:
+                    if section in bodies:
+                        data, spilled = _decode_attachment(bodies.pop(section), encoding)
+                        attachments.append({"filename": filename, "data": data, "spilled": spilled})
+        
+        return {
+            "email_id": uid,
+            "uid": int(uid),
+            "subject": subject,
+            "from": from_email,
+            "date": email_message.get("Date"),
+            "bank": self._detect_bank_from_email(from_email, subject),
+            "attachments": attachments
+        }
     
     def _decode_subject(self, subject: str) -> str:
         """Decode email subject"""
@@ -210,144 +470,141 @@ class EmailStatementParser:
         
         return attachments
     
+    @classmethod
+    def password_candidates(
+        cls,
+        bank: Optional[str],
+        user_dob: str = None,
+        user_mobile: str = None,
+        user_account: str = None,
+        user_pan: str = None,
+        custom_password: str = None,
+        preferred_pattern: str = None
+    ) -> List[Tuple[str, str]]:
+        """
+        (pattern, password) pairs to try, most likely first
+        
+        Order: no password, the custom password, the pattern that opened
+        this user's last statement from the bank, the bank's usual
+        patterns, then every other pattern. Duplicate passwords are dropped.
+        """
+        info = {
+            "user_dob": user_dob,
+            "user_mobile": user_mobile,
+            "user_account": user_account,
+            "user_pan": user_pan,
+            "custom_password": custom_password,
+        }
+        bank_patterns = cls.BANK_PASSWORD_PATTERNS.get(bank, cls.BANK_PASSWORD_PATTERNS["DEFAULT"])
+        order = ["EMPTY", "CUSTOM", preferred_pattern, *bank_patterns, *PASSWORD_PATTERNS]
+        
+        candidates, seen = [], set()
+        for pattern in order:
+            derive = PASSWORD_PATTERNS.get(pattern)
+            if derive is None:
+                continue
+            try:
+                password = derive(info)
+            except ValueError:
+                continue
+            if password is not None and password not in seen:
+                seen.add(password)
+                candidates.append((pattern, password))
+        return candidates
+    
     def try_unlock_pdf(
         self, 
-        pdf_data: bytes, 
+        pdf_data: PdfSource, 
         bank: str, 
         user_dob: str = None,
         user_mobile: str = None,
         user_account: str = None,
         user_pan: str = None,
-        custom_password: str = None
-    ) -> Optional[bytes]:
+        custom_password: str = None,
+        preferred_pattern: str = None
+    ) -> Optional[UnlockedPdf]:
         """
         Try to unlock password-protected PDF using common patterns
         
+        Candidates are checked against the PDF's encryption dictionary
+        (see pdf_unlock) and the file is not rewritten; the text extractor
+        decrypts pages as it reads them.
+        
         Args:
-            pdf_data: PDF file bytes
+            pdf_data: PDF file bytes, or the path of a file on disk
             bank: Bank name
             user_dob: Date of birth (DDMMYYYY format)
             user_mobile: Mobile number (last 4 digits)
             user_account: Account number (last 4 digits)
             user_pan: PAN card number
             custom_password: User-provided password
+            preferred_pattern: Pattern to try first (the last one that
+                worked for this user and bank)
         
         Returns:
-            Unlocked PDF bytes or None
+            The PDF with its password and pattern, or None
         """
-        pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_data))
-        
-        # Check if PDF is encrypted
-        if not pdf_reader.is_encrypted:
-            return pdf_data
-        
-        # Try custom password first
-        if custom_password:
-            if pdf_reader.decrypt(custom_password):
-                return self._save_unlocked_pdf(pdf_reader)
-        
-        # Get password patterns for bank
-        patterns = self.BANK_PASSWORD_PATTERNS.get(bank, self.BANK_PASSWORD_PATTERNS["DEFAULT"])
-        
-        # Generate possible passwords
-        possible_passwords = []
-        
-        for pattern in patterns:
-            if pattern == "DOB_DDMMYYYY" and user_dob:
-                possible_passwords.append(user_dob)
-            
-            elif pattern == "DOB_DDMMYY" and user_dob:
-                possible_passwords.append(user_dob[-6:])  # Last 6 digits
-            
-            elif pattern == "DOB_ddmmmyyyy" and user_dob:
-                # Convert to format like "15apr1990"
-                try:
-                    date_obj = datetime.strptime(user_dob, "%d%m%Y")
-                    formatted = date_obj.strftime("%d%b%Y").lower()
-                    possible_passwords.append(formatted)
-                except:
-                    pass
-            
-            elif pattern == "MOBILE_LAST4" and user_mobile:
-                possible_passwords.append(user_mobile[-4:])
-            
-            elif pattern == "ACCOUNT_LAST4" and user_account:
-                possible_passwords.append(user_account[-4:])
-            
-            elif pattern == "PANCARD" and user_pan:
-                possible_passwords.append(user_pan.upper())
-            
-            elif pattern == "PANCARD_LAST4" and user_pan:
-                possible_passwords.append(user_pan[-4:].upper())
-        
-        # Try all possible passwords
-        for password in possible_passwords:
-            try:
-                if pdf_reader.decrypt(password):
-                    print(f"✅ PDF unlocked with password pattern: {password[:2]}***")
-                    return self._save_unlocked_pdf(pdf_reader)
-            except:
-                continue
-        
-        # If still locked, return None
-        return None
+        candidates = self.password_candidates(
+            bank, user_dob, user_mobile, user_account, user_pan, custom_password, preferred_pattern
+        )
+        password = find_password(pdf_data, [password for _, password in candidates])
+        if password is None:
+            return None
+        if password == "":
+            return UnlockedPdf(pdf_data)
+        
+        pattern = next(name for name, candidate in candidates if candidate == password)
+        print(f"✅ PDF unlocked with password pattern: {pattern}")
+        return UnlockedPdf(pdf_data, password, pattern)
     
-    def _save_unlocked_pdf(self, pdf_reader: PyPDF2.PdfReader) -> bytes:
-        """Save unlocked PDF to bytes"""
-        output_pdf = PyPDF2.PdfWriter()
-        
-        for page in pdf_reader.pages:
-            output_pdf.add_page(page)
-        
-        output_stream = BytesIO()
-        output_pdf.write(output_stream)
-        output_stream.seek(0)
-        
-        return output_stream.read()
-    
-    def parse_statement_from_pdf(self, pdf_data: bytes) -> Dict:
+    def parse_statement_from_pdf(
+        self,
+        pdf_data: Union[PdfSource, UnlockedPdf, None],
+        bank: Optional[str] = None,
+        extraction: Optional[Dict] = None
+    ) -> Dict:
         """
         Parse transactions from unlocked PDF
         
+        Statements from banks with a layout profile are read by column
+        (see statement_layouts); others line by line. Pages are extracted
+        across the PDF worker pool (see pdf_text).
+        
+        Args:
+            pdf_data: The PDF (and its password)
+            bank: Sending bank, if known (the document is checked otherwise)
+            extraction: A cached extraction of this PDF (see
+                statement_cache); the PDF isn't read at all
+        
         Returns:
-            Dictionary with extracted transactions
-        """
-        transactions = []
+            Dictionary with extracted transactions and the raw
+            `extraction` (for the cache)
         
+        Raises:
+            Whatever the extraction raised, so a PDF that couldn't be read
+            is reported as failed (and retried) rather than stored as a
+            statement with no transactions
+        """
         try:
-            with pdfplumber.open(BytesIO(pdf_data)) as pdf:
-                full_text = ""
-                
-                for page in pdf.pages:
-                    full_text += page.extract_text() + "\n"
-                
-                # Extract transactions using regex patterns
-                # Common patterns for Indian bank statements
-                patterns = [
-                    # Date, Description, Debit, Credit, Balance
-                    r'(\d{2}/\d{2}/\d{4})\s+([A-Za-z0-9\s\-/]+?)\s+(\d+\.\d{2}|\-)\s+(\d+\.\d{2}|\-)\s+(\d+\.\d{2})',
-                    # Date, Description, Amount, Type
-                    r'(\d{2}-\d{2}-\d{4})\s+([A-Za-z0-9\s\-/]+?)\s+(Dr|Cr)\s+(\d+\.\d{2})',
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, full_text, re.MULTILINE)
-                    
-                    for match in matches:
-                        if len(match) >= 4:
-                            transactions.append({
-                                "date": match[0],
-                                "description": match[1].strip(),
-                                "debit": match[2] if match[2] != "-" else "0.00",
-                                "credit": match[3] if len(match) > 3 and match[3] != "-" else "0.00"
-                            })
-        
-        except Exception as e:
-            print(f"Error parsing PDF: {str(e)}")
+            if extraction is None:
+                extraction = extract_statement_transactions(pdf_data, bank=bank)
+            transactions = [
+                {
+                    "date": trans["date"].strftime("%d/%m/%Y"),
+                    "description": trans["description"],
+                    "debit": f"{trans['debit']:.2f}",
+                    "credit": f"{trans['credit']:.2f}"
+                }
+                for trans in extraction["transactions"]
+            ]
+        except Exception:
+            logger.exception("Error parsing %s statement PDF", bank or "unknown bank")
+            raise
         
         return {
             "total_transactions": len(transactions),
-            "transactions": transactions
+            "transactions": transactions,
+            "extraction": extraction
         }
 
 
@@ -362,38 +619,10 @@ def generate_password_variants(dob: str = None, mobile: str = None, pan: str = N
         pan: PAN card number
     
     Returns:
-        List of possible passwords
+        List of possible passwords, in the order try_unlock_pdf tries them
     """
-    passwords = []
-    
-    if dob:
-        passwords.extend([
-            dob,  # 15041990
-            dob[-6:],  # 041990 (DDMMYY)
-            dob[-4:],  # 1990 (YYYY)
-        ])
-        
-        # Date formats
-        try:
-            date_obj = datetime.strptime(dob, "%d%m%Y")
-            passwords.extend([
-                date_obj.strftime("%d%b%Y").lower(),  # 15apr1990
-                date_obj.strftime("%d%b%Y").upper(),  # 15APR1990
-                date_obj.strftime("%d%m%y"),  # 150490
-            ])
-        except:
-            pass
-    
-    if mobile:
-        passwords.extend([
-            mobile[-4:],  # Last 4 digits
-            mobile,  # Full number
-        ])
-    
-    if pan:
-        passwords.extend([
-            pan.upper(),  # ABCDE1234F
-            pan[-4:],  # 1234
-        ])
-    
-    return passwords
+    return [
+        password
+        for pattern, password in EmailStatementParser.password_candidates(None, user_dob=dob, user_mobile=mobile, user_pan=pan)
+        if pattern != "EMPTY"
+    ]
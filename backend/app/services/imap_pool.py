@@ -0,0 +1,142 @@
+# IMAP connection pool - reuses logged-in connections and caps concurrent connections per server
+import hashlib
+import imaplib
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+def open_imap_connection(server: str, address: str, password: str) -> imaplib.IMAP4:
+    """Connect over SSL and log in"""
+    try:
+        mail = imaplib.IMAP4_SSL(server)
+        mail.login(address, password)
+        return mail
+    except Exception as e:
+        raise Exception(f"Email connection failed: {str(e)}")
+
+
+class IMAPConnectionPool:
+    """
+    Logged-in IMAP connections shared across syncs
+
+    A released connection is kept authenticated (its folder CLOSEd) and
+    handed to the next sync of the same mailbox or folder, saving the TLS
+    handshake and LOGIN. Connections are keyed by (server, address,
+    password hash), so a pooled session only goes to a caller holding the
+    same credentials. At most `max_per_server` connections to one server
+    are open at a time, idle ones included (providers throttle or reject
+    more); an idle connection of another account is closed to make room.
+    Idle connections older than `idle_timeout` seconds are not reused.
+
+    Thread-safe: syncs run on job and mailbox worker threads.
+    """
+
+    def __init__(
+        self,
+        max_per_server: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        connect: Callable[[str, str, str], imaplib.IMAP4] = open_imap_connection
+    ):
+        self.max_per_server = max_per_server or settings.IMAP_MAX_CONNECTIONS_PER_SERVER
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.IMAP_IDLE_TIMEOUT_SECONDS
+        self.connect = connect
+        self._changed = threading.Condition()
+        self._open: Dict[str, int] = defaultdict(int)
+        self._idle: Dict[Tuple[str, str, str], List[Tuple[float, imaplib.IMAP4]]] = defaultdict(list)
+
+    def _reserve(self, key: Tuple[str, str, str]) -> Optional[Tuple[float, imaplib.IMAP4]]:
+        """An idle connection for `key`, or None once a slot for a new one is reserved"""
+        server = key[0]
+        while True:
+            with self._changed:
+                if self._idle[key]:
+                    return self._idle[key].pop()
+                if self._open[server] < self.max_per_server:
+                    self._open[server] += 1
+                    return None
+                victim = next((k for k, idle in self._idle.items() if k[0] == server and idle), None)
+                if victim is None:
+                    self._changed.wait()
+                    continue
+                _, mail = self._idle[victim].pop(0)
+            # Its slot passes straight to this caller
+            _logout(mail)
+            return None
+
+    def _release(self, server: str, key: Tuple[str, str, str], mail: Optional[imaplib.IMAP4]) -> None:
+        with self._changed:
+            if mail is None:
+                self._open[server] -= 1
+            else:
+                self._idle[key].append((time.monotonic(), mail))
+            self._changed.notify()
+
+    @contextmanager
+    def connection(self, server: str, address: str, password: str) -> Iterator[imaplib.IMAP4]:
+        """
+        Borrow a logged-in connection (blocks while the server is at its limit)
+
+        The connection goes back to the pool only if the block finishes
+        cleanly; after an error it may be mid-response, so it is closed.
+        """
+        key = (server, address.lower(), hashlib.sha256(password.encode()).hexdigest())
+        idle = self._reserve(key)
+        mail = None
+        try:
+            if idle is not None:
+                released_at, mail = idle
+                if time.monotonic() - released_at >= self.idle_timeout or not _alive(mail):
+                    _logout(mail)
+                    mail = None
+            if mail is None:
+                mail = self.connect(server, address, password)
+            try:
+                yield mail
+            except BaseException:
+                _logout(mail)
+                mail = None
+                raise
+            try:
+                if mail.state == "SELECTED":
+                    mail.close()
+            except Exception:
+                _logout(mail)
+                mail = None
+        finally:
+            self._release(server, key, mail)
+
+    def close_all(self) -> None:
+        with self._changed:
+            idle = [(key[0], mail) for key, connections in self._idle.items() for _, mail in connections]
+            self._idle.clear()
+            for server, _ in idle:
+                self._open[server] -= 1
+            self._changed.notify_all()
+        for _, mail in idle:
+            _logout(mail)
+
+    def idle_count(self) -> int:
+        with self._changed:
+            return sum(len(connections) for connections in self._idle.values())
+
+
+def _alive(mail: imaplib.IMAP4) -> bool:
+    try:
+        return mail.noop()[0] == "OK"
+    except Exception:
+        return False
+
+
+def _logout(mail: imaplib.IMAP4) -> None:
+    try:
+        mail.logout()
+    except Exception:
+        pass
+
+
+imap_pool = IMAPConnectionPool()
@@ -0,0 +1,277 @@
+# Background job service - runs long jobs off the request path and records their progress
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FIELDS = ("emails_scanned", "pdfs_unlocked", "transactions_inserted")
+ACTIVE_STATUSES = ("queued", "running")
+
+# Owner recorded on the jobs this process queues and runs. The default changes with every
+# restart; set JOB_WORKER_ID to a stable per-replica name so a restart fails its own jobs at once
+WORKER_ID = settings.JOB_WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+# kind -> handler(db, user_id, payload, progress) returning a JSON-serialisable result
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+# Run after abandoned jobs are failed, to close out what they were working on
+RECOVERY_HANDLERS: List[Callable[[Session], int]] = []
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for one job kind"""
+    def register(fn: Callable) -> Callable:
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def recovery_handler(fn: Callable[[Session], int]) -> Callable[[Session], int]:
+    """Register a function to run (with a session) after abandoned jobs are failed"""
+    RECOVERY_HANDLERS.append(fn)
+    return fn
+
+
+class JobProgress:
+    """
+    Progress counters handed to a running job
+
+    Increments are kept in memory and written to the jobs row at most
+    every `flush_interval` seconds, so tight loops don't turn into a
+    stream of UPDATEs. Safe to share between a job's worker threads.
+    """
+
+    def __init__(self, job_id: int, flush_interval: float = 0.5):
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.counters = dict.fromkeys(PROGRESS_FIELDS, 0)
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, **increments: int) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self, **values) -> None:
+        with self._lock:
+            counters = dict(self.counters)
+            self._flushed_at = time.monotonic()
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == self.job_id).values(**counters, heartbeat_at=datetime.utcnow(), **values))
+            db.commit()
+
+
+def run_job(job_id: int, payload: Dict) -> None:
+    """Claim a queued job, run its handler and record the outcome"""
+    with SessionLocal() as db:
+        # The status guard makes the claim atomic if a job is submitted twice
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="running", started_at=now, worker_id=WORKER_ID, heartbeat_at=now)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+
+        job = db.get(Job, job_id)
+        progress = JobProgress(job_id)
+        try:
+            result = JOB_HANDLERS[job.kind](db, job.user_id, payload, progress)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            db.rollback()
+            progress.flush(status="failed", error_message=str(e), finished_at=datetime.utcnow())
+        else:
+            progress.flush(status="completed", result=json.dumps(result, default=str), finished_at=datetime.utcnow())
+
+
+class JobBackend(ABC):
+    """Where queued jobs run; swap in another backend with set_job_backend()"""
+
+    @abstractmethod
+    def submit(self, job_id: int, payload: Dict) -> None:
+        ...
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+
+class JobHeartbeat:
+    """
+    Background thread that keeps this process's jobs marked alive
+
+    Every JOB_HEARTBEAT_SECONDS it stamps heartbeat_at on the queued and
+    running jobs owned by WORKER_ID, then fails other workers' jobs that
+    have gone JOB_STALE_SECONDS without one (their process died). That
+    includes jobs this process's previous run left with a fresh stamp,
+    which the startup pass can't tell from a live replica's.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or settings.JOB_HEARTBEAT_SECONDS
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-heartbeat", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def beat(self) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(Job)
+                .where(Job.worker_id == WORKER_ID, Job.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            db.commit()
+            recover_interrupted_jobs(db, restarting=False)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.beat()
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+
+class ThreadPoolJobBackend(JobBackend):
+    """In-process worker threads (jobs are IMAP/PDF I/O bound, parsing has its own pools)"""
+
+    def __init__(self, workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.heartbeat = JobHeartbeat()
+        self.heartbeat.start()
+
+    def submit(self, job_id: int, payload: Dict) -> None:
+        self.executor.submit(run_job, job_id, payload)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.heartbeat.stop()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class InlineJobBackend(JobBackend):
+    """Runs the job before submit() returns (tests and scripts)"""
+
+    def submit(self, job_id: int, payload: Dict) -> None:
+        run_job(job_id, payload)
+
+
+JOB_BACKENDS = {
+    "thread": lambda: ThreadPoolJobBackend(settings.JOB_WORKERS),
+    "inline": InlineJobBackend,
+}
+
+_backend: Optional[JobBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_job_backend() -> JobBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = JOB_BACKENDS[settings.JOB_BACKEND]()
+        return _backend
+
+
+def set_job_backend(backend: Optional[JobBackend]) -> None:
+    """Replace the active backend (the previous one is shut down)"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    if previous is not None and previous is not backend:
+        previous.shutdown()
+
+
+def shutdown_job_backend() -> None:
+    set_job_backend(None)
+
+
+def enqueue_job(db: Session, user_id: int, kind: str, payload: Dict) -> Job:
+    """
+    Record a queued job and hand it to the backend
+
+    The payload only lives in memory (it carries mailbox credentials), so
+    the job belongs to this process: if the process stops before the job
+    finishes, recover_interrupted_jobs() marks it failed.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(user_id=user_id, kind=kind, status="queued", worker_id=WORKER_ID, heartbeat_at=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    get_job_backend().submit(job.id, payload)
+    return job
+
+
+def fail_interrupted_jobs(db: Session, restarting: bool = True) -> int:
+    """
+    Mark queued/running jobs whose process is gone as failed
+
+    A job is abandoned when its heartbeat is older than JOB_STALE_SECONDS
+    (or missing), or, when `restarting`, when it is owned by WORKER_ID:
+    this process's previous run, if JOB_WORKER_ID keeps the id stable.
+    Jobs of other live processes are left alone, so one replica
+    restarting doesn't fail the others' work.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    abandoned = or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < stale_before)
+    if restarting:
+        abandoned = or_(abandoned, Job.worker_id == WORKER_ID)
+    count = db.execute(
+        update(Job)
+        .where(Job.status.in_(ACTIVE_STATUSES), abandoned)
+        .values(status="failed", error_message="Interrupted: its worker process stopped", finished_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return count
+
+
+def recover_interrupted_jobs(db: Session, restarting: bool = True) -> int:
+    """fail_interrupted_jobs, then the registered recovery handlers"""
+    count = fail_interrupted_jobs(db, restarting)
+    for handler in RECOVERY_HANDLERS:
+        handler(db)
+    return count
+
+
+def job_status(job: Job) -> Dict:
+    """Polling view of a job"""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": {name: getattr(job, name) for name in PROGRESS_FIELDS},
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error_message,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
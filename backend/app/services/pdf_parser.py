@@ -1,12 +1,8 @@
 # PDF parser service
-import pdfplumber
+from app.services.pdf_text import extract_pdf_text
 
 def extract_text_from_pdf(pdf_path: str) -> str:
-    all_text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            all_text += page.extract_text() or ""
-    return all_text
+    return extract_pdf_text(pdf_path, separator="")
 
 def is_pdf_encrypted(pdf_path: str) -> bool:
     from PyPDF2 import PdfReader
@@ -1,11 +1,13 @@
 # Enhanced PDF parser service
-import pdfplumber
 import re
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from PyPDF2 import PdfReader, PdfWriter
 import pandas as pd
 
+from app.services.pdf_text import PdfSource, UnlockedPdf, extract_pdf_pages
+from app.services.statement_layouts import extract_statement_transactions
+
 class BankStatementParser:
     """Parser for extracting transaction data from bank statement PDFs"""
     
@@ -45,22 +47,24 @@ class BankStatementParser:
             print(f"Error decrypting PDF: {e}")
             return False
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def extract_text_from_pdf(self, pdf_path: Union[PdfSource, UnlockedPdf]) -> str:
         """Extract all text content from PDF"""
-        all_text = ""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        all_text += text + "\n"
+            pages = extract_pdf_pages([pdf_path])[0]
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
+            return ""
         
-        return all_text
+        return "".join(text + "\n" for text in pages if text)
     
-    def parse_statement(self, pdf_path: str) -> Dict:
-        """Complete statement parsing with metadata extraction"""
+    def parse_statement(self, pdf_path: Union[PdfSource, UnlockedPdf], extraction: Optional[Dict] = None) -> Dict:
+        """
+        Complete statement parsing with metadata and transaction extraction
+        
+        Transactions are dicts of date (datetime), description, debit,
+        credit and balance (floats; balance may be None). Pass a cached
+        `extraction` (see statement_cache) to skip reading the PDF.
+        """
         result = {
             "bank_name": None,
             "account_number": None,
@@ -69,7 +73,13 @@ class BankStatementParser:
         }
         
         try:
-            text = self.extract_text_from_pdf(pdf_path)
+            # Transactions by the bank's column layout where one fits (see statement_layouts)
+            extracted = extraction or extract_statement_transactions(pdf_path)
+            text = extracted["first_page_text"]
+            result["transactions"] = extracted["transactions"]
+            if result["transactions"]:
+                dates = [transaction["date"] for transaction in result["transactions"]]
+                result["statement_period"] = {"start": min(dates), "end": max(dates)}
             
             # Extract bank name
             bank_patterns = [
@@ -80,6 +90,7 @@ class BankStatementParser:
                 if match:
                     result["bank_name"] = match.group(1)
                     break
+            result["bank_name"] = result["bank_name"] or extracted["bank"]
             
             # Extract account number
             account_patterns = [
@@ -0,0 +1,161 @@
+# PDF text extraction engine - extracts statement pages across worker processes
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import pdfplumber
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+from app.core.config import settings
+
+# PDF bytes, or a path to the file (large attachments and uploads stay on disk)
+PdfSource = Union[bytes, str]
+
+
+class UnlockedPdf(NamedTuple):
+    """
+    A PDF and the password that opens it (None if it isn't encrypted)
+
+    Pages are decrypted as the extractor reads them, so no decrypted
+    copy of the file is ever written. `pattern` names the password
+    pattern that matched, if any.
+    """
+    source: PdfSource
+    password: Optional[str] = None
+    pattern: Optional[str] = None
+
+
+_pdf_pools: Dict[int, ProcessPoolExecutor] = {}
+_pdf_pools_lock = threading.Lock()
+
+
+def _unlocked(pdf: Union[PdfSource, UnlockedPdf]) -> UnlockedPdf:
+    return pdf if isinstance(pdf, UnlockedPdf) else UnlockedPdf(pdf)
+
+
+@contextmanager
+def open_pdf_stream(source: PdfSource) -> Iterator[BinaryIO]:
+    """Read-only stream over a PDF: files are memory-mapped, bytes wrapped without a copy"""
+    if not isinstance(source, str):
+        yield BytesIO(source)
+        return
+    with open(source, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+
+def pdf_size(source: PdfSource) -> int:
+    return os.path.getsize(source) if isinstance(source, str) else len(source)
+
+
+def pdf_sha256(source: PdfSource) -> str:
+    if not isinstance(source, str):
+        return hashlib.sha256(source).hexdigest()
+    with open(source, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def spill_file(prefix: str = "statement-") -> BinaryIO:
+    """Temporary file for an attachment too large to keep in memory (the caller deletes it)"""
+    return tempfile.NamedTemporaryFile(prefix=prefix, suffix=".pdf", dir=settings.PDF_SPILL_DIR, delete=False)
+
+
+def count_pages(source: PdfSource, password: Optional[str] = None) -> int:
+    """Page count from the page tree, without laying out any page"""
+    with open_pdf_stream(source) as stream:
+        document = PDFDocument(PDFParser(stream), password=password or "")
+        return int(resolve1(resolve1(document.catalog["Pages"])["Count"]))
+
+
+def extract_page_range(
+    source: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    password: Optional[str] = None
+) -> List[str]:
+    """Text of pages [start, stop); runs inside a pool worker (or in-process)"""
+    with open_pdf_stream(source) as stream, pdfplumber.open(stream, password=password) as pdf:
+        pages = pdf.pages[start:stop]
+        return [page.extract_text() or "" for page in pages]
+
+
+def get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool for PDF text extraction, one per worker count"""
+    with _pdf_pools_lock:
+        pool = _pdf_pools.get(workers)
+        if pool is None:
+            pool = _pdf_pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def shutdown_pdf_pools() -> None:
+    """Stop the PDF extraction worker processes"""
+    with _pdf_pools_lock:
+        for pool in _pdf_pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pdf_pools.clear()
+
+
+def submit_pdf_pages(
+    pdf: Union[PdfSource, UnlockedPdf],
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+    extract: Callable[..., Any] = extract_page_range,
+    args: Tuple = ()
+) -> List[Future]:
+    """
+    Queue a PDF's pages on the pool in ranges of `pages_per_task`
+
+    Returns one future per range, in page order. With workers <= 1 the
+    pages are extracted right away and the futures are already done.
+    Workers get a file path rather than the bytes when the PDF is on
+    disk, and map the file themselves. `extract(source, start, stop,
+    password, *args)` runs per range (a module-level function, so it
+    pickles); it defaults to plain page text.
+    """
+    pdf = _unlocked(pdf)
+    source, password = pdf.source, pdf.password
+    workers = workers or settings.PDF_PARSE_WORKERS
+    pages_per_task = pages_per_task or settings.PDF_PAGES_PER_TASK
+    if workers <= 1:
+        future = Future()
+        future.set_result(extract(source, 0, None, password, *args))
+        return [future]
+
+    pool = get_pdf_pool(workers)
+    return [
+        pool.submit(extract, source, start, start + pages_per_task, password, *args)
+        for start in range(0, count_pages(source, password), pages_per_task)
+    ]
+
+
+def extract_pdf_pages(
+    sources: Sequence[Union[PdfSource, UnlockedPdf]],
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None
+) -> List[List[str]]:
+    """
+    Page texts of several PDFs, extracted together
+
+    Every file's page ranges are queued before any result is awaited, so
+    a batch of small statements keeps the workers as busy as one large one.
+    """
+    queued = [submit_pdf_pages(source, workers, pages_per_task) for source in sources]
+    return [[text for future in futures for text in future.result()] for futures in queued]
+
+
+def extract_pdf_text(
+    source: Union[PdfSource, UnlockedPdf],
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+    separator: str = "\n"
+) -> str:
+    """Text of a whole PDF, pages joined with `separator`"""
+    return separator.join(extract_pdf_pages([source], workers, pages_per_task)[0])
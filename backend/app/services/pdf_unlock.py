@@ -0,0 +1,203 @@
+# PDF unlock engine - checks password candidates against a PDF's encryption dictionary
+import hashlib
+import struct
+from typing import List, NamedTuple, Optional, Sequence
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+try:
+    from cryptography.hazmat.decrepit.ciphers.algorithms import ARC4
+except ImportError:  # cryptography < 43
+    from cryptography.hazmat.primitives.ciphers.algorithms import ARC4
+
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+from app.core.config import settings
+from app.services.pdf_text import PdfSource, get_pdf_pool, open_pdf_stream
+
+# Password padding string from the PDF standard security handler (ISO 32000-1, 7.6.3.3)
+_PAD = bytes.fromhex("28bf4e5e4e758a4164004e56fffa01082e2e00b6d0683e802f0ca9fe6453697a")
+
+
+class PdfSecurity(NamedTuple):
+    """The parts of a standard-security /Encrypt dictionary needed to check a password"""
+    revision: int
+    key_length: int  # bytes
+    owner_entry: bytes  # /O
+    user_entry: bytes  # /U
+    permissions: int  # /P
+    document_id: bytes  # first /ID string
+    encrypt_metadata: bool = True
+
+
+class _EncryptionReader(PDFDocument):
+    """Loads the xref and trailer without trying any password"""
+
+    def _initialize_password(self, password: str = "") -> None:
+        pass
+
+
+def read_security(source: PdfSource) -> Optional[PdfSecurity]:
+    """
+    Parse the encryption dictionary once (None if the PDF isn't encrypted)
+
+    Read with pdfminer: PyPDF2 tries the empty password as soon as it
+    opens a file, which for AES needs PyCryptodome.
+    """
+    with open_pdf_stream(source) as stream:
+        document = _EncryptionReader(PDFParser(stream))
+        if not document.encryption:
+            return None
+        ids, encrypt = document.encryption
+        handler = resolve1(encrypt.get("Filter"))
+        if getattr(handler, "name", None) != "Standard":
+            raise ValueError(f"Unsupported PDF security handler {handler}")
+        revision = int(resolve1(encrypt["R"]))
+        if revision >= 5:
+            key_length = 32
+        elif revision == 4:
+            key_length = 16
+        else:
+            key_length = int(resolve1(encrypt.get("Length", 40))) // 8
+        return PdfSecurity(
+            revision=revision,
+            key_length=key_length,
+            owner_entry=resolve1(encrypt["O"]),
+            user_entry=resolve1(encrypt["U"]),
+            permissions=int(resolve1(encrypt["P"])),
+            document_id=resolve1(ids[0]) if ids else b"",
+            encrypt_metadata=bool(resolve1(encrypt.get("EncryptMetadata", True)))
+        )
+
+
+def _rc4(key: bytes, data: bytes) -> bytes:
+    return Cipher(ARC4(key), mode=None).encryptor().update(data)
+
+
+def _padded(password: str) -> bytes:
+    return (password.encode("latin-1", "ignore") + _PAD)[:32]
+
+
+def _rc4_user_check(security: PdfSecurity, padded: bytes) -> bool:
+    """Algorithms 2 and 4/5: derive the file key and compare against /U"""
+    digest = hashlib.md5(padded + security.owner_entry + struct.pack("<I", security.permissions & 0xFFFFFFFF) + security.document_id)
+    if security.revision >= 4 and not security.encrypt_metadata:
+        digest.update(b"\xff\xff\xff\xff")
+    key = digest.digest()
+    n = security.key_length
+    if security.revision >= 3:
+        for _ in range(50):
+            key = hashlib.md5(key[:n]).digest()
+    key = key[:n]
+
+    if security.revision == 2:
+        return _rc4(key, _PAD) == security.user_entry
+    check = _rc4(key, hashlib.md5(_PAD + security.document_id).digest())
+    for i in range(1, 20):
+        check = _rc4(bytes(b ^ i for b in key), check)
+    return check == security.user_entry[:16]
+
+
+def _rc4_owner_check(security: PdfSecurity, password: str) -> bool:
+    """Algorithm 7: recover the user password from /O with the owner key, then check it"""
+    key = hashlib.md5(_padded(password)).digest()
+    n = security.key_length
+    if security.revision >= 3:
+        for _ in range(50):
+            key = hashlib.md5(key).digest()
+    key = key[:n]
+
+    if security.revision == 2:
+        return _rc4_user_check(security, _rc4(key, security.owner_entry))
+    user_padded = security.owner_entry
+    for i in range(19, -1, -1):
+        user_padded = _rc4(bytes(b ^ i for b in key), user_padded)
+    return _rc4_user_check(security, user_padded)
+
+
+def _hash_r6(password: bytes, salt: bytes, user_entry: bytes = b"") -> bytes:
+    """Algorithm 2.B (ISO 32000-2): the iterated SHA-2/AES hash of AES-256 revision 6"""
+    k = hashlib.sha256(password + salt + user_entry).digest()
+    rounds = 0
+    while True:
+        block = (password + k + user_entry) * 64
+        encryptor = Cipher(algorithms.AES(k[:16]), modes.CBC(k[16:32])).encryptor()
+        e = encryptor.update(block) + encryptor.finalize()
+        # The first 16 bytes as a big-endian number mod 3 (256 is 1 mod 3)
+        k = (hashlib.sha256, hashlib.sha384, hashlib.sha512)[sum(e[:16]) % 3](e).digest()
+        rounds += 1
+        if rounds >= 64 and e[-1] <= rounds - 32:
+            return k[:32]
+
+
+def _aes256_check(security: PdfSecurity, password: str) -> bool:
+    """Revision 5/6: hash with the validation salt and compare against /U, then /O"""
+    secret = password.encode("utf-8")[:127]
+    u, o = security.user_entry, security.owner_entry
+    if security.revision == 5:
+        return (hashlib.sha256(secret + u[32:40]).digest() == u[:32]
+                or hashlib.sha256(secret + o[32:40] + u[:48]).digest() == o[:32])
+    return _hash_r6(secret, u[32:40]) == u[:32] or _hash_r6(secret, o[32:40], u[:48]) == o[:32]
+
+
+def check_password(security: PdfSecurity, password: str) -> bool:
+    """Whether `password` opens the PDF as its user or owner password"""
+    if security.revision >= 5:
+        return _aes256_check(security, password)
+    return _rc4_user_check(security, _padded(password)) or _rc4_owner_check(security, password)
+
+
+def first_match(security: PdfSecurity, candidates: Sequence[str]) -> Optional[int]:
+    """Index of the first candidate that opens the PDF; runs inside a pool worker (or in-process)"""
+    return next((i for i, password in enumerate(candidates) if check_password(security, password)), None)
+
+
+def find_passwords(
+    sources: Sequence[PdfSource],
+    candidates: Sequence[str],
+    workers: Optional[int] = None
+) -> List[Optional[str]]:
+    """
+    The first candidate (in order) that opens each PDF, or None
+
+    Each encryption dictionary is read once. AES-256 (revision 6) checks
+    cost ~64 rounds of AES and SHA-2 per candidate, so once there are at
+    least PDF_UNLOCK_PARALLEL_MIN of them they are split across the PDF
+    worker pool, together with the other PDFs' chunks. RC4 checks take
+    well under a millisecond and always run in-process. Unencrypted PDFs
+    come back as "" (no password needed).
+    """
+    workers = workers or settings.PDF_PARSE_WORKERS
+    securities = [read_security(source) for source in sources]
+    chunk_size = max(1, -(-len(candidates) // workers))
+    pool = None
+    pending = []
+    for security in securities:
+        if security is None:
+            pending.append(None)
+        elif workers > 1 and security.revision >= 6 and len(candidates) >= settings.PDF_UNLOCK_PARALLEL_MIN:
+            pool = pool or get_pdf_pool(workers)
+            pending.append([
+                (start, pool.submit(first_match, security, candidates[start:start + chunk_size]))
+                for start in range(0, len(candidates), chunk_size)
+            ])
+        else:
+            pending.append(first_match(security, candidates))
+
+    found = []
+    for security, result in zip(securities, pending):
+        if security is None:
+            found.append("")
+            continue
+        if isinstance(result, list):
+            # Chunks are in candidate order, so the first hit respects priority
+            result = next((start + index for start, future in result if (index := future.result()) is not None), None)
+        found.append(None if result is None else candidates[result])
+    return found
+
+
+def find_password(source: PdfSource, candidates: Sequence[str], workers: Optional[int] = None) -> Optional[str]:
+    """find_passwords for one PDF"""
+    return find_passwords([source], candidates, workers)[0]
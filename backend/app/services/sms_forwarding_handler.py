@@ -1,186 +1,331 @@
 # SMS forwarding handler service
+import asyncio
+import hashlib
 import re
-from datetime import datetime
-from typing import Dict, Optional, List
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import chain, islice
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, List, Tuple
 import json
 
+from app.core.config import settings
+
+DATE_FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d %b %Y", "%d %B %Y"]
+_DIGIT_RE = re.compile(r"\d")
+_WHITESPACE_RE = re.compile(r"\s+")
+_SENDER_PREFIX_RE = re.compile(r"^[A-Z]{2}-")  # operator route prefix, e.g. VM-HDFCBK / AD-HDFCBK
+
+
+def _normalize_timestamp(received_at) -> str:
+    """Backup timestamps as UTC ISO seconds (epoch seconds/milliseconds or datetimes); other text as-is"""
+    if isinstance(received_at, datetime):
+        return received_at.replace(microsecond=0).isoformat()
+    value = str(received_at or "").strip()
+    if value.isdigit():
+        epoch = int(value)
+        epoch = epoch / 1000 if epoch > 10**11 else epoch
+        return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None).isoformat()
+    return value
+
+
+def sms_fingerprint(sender: str, text: str, received_at=None) -> str:
+    """
+    Deterministic id of an SMS: sha256 of the sender (route prefix
+    dropped), the whitespace/case-normalized text and the timestamp
+    """
+    normalized_sender = _SENDER_PREFIX_RE.sub("", (sender or "").strip().upper())
+    normalized_text = _WHITESPACE_RE.sub(" ", (text or "").strip().lower())
+    key = "\x1f".join((normalized_sender, normalized_text, _normalize_timestamp(received_at)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Regex source matching any of `words`, with shared prefixes merged
+    into a trie so the engine follows one branch per character instead of
+    retrying every word. Greedy, so the longest word at a position wins.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick style multi-keyword matcher
+
+    Every keyword occurrence is found in one scan of the text (a zero-width
+    trie regex, so overlapping hits are kept); the earliest-listed group
+    with a hit wins, the same answer as checking the groups in order.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.labels = list(groups)
+        ranks: Dict[str, int] = {}
+        for rank, words in enumerate(groups.values()):
+            for word in words:
+                ranks.setdefault(word.lower(), rank)
+        # A hit on a word is also a hit on every keyword that is a prefix of it
+        self._rank = {
+            word: min(rank for prefix, rank in ranks.items() if word.startswith(prefix))
+            for word in ranks
+        }
+        self._regex = re.compile(f"(?=({_trie_regex(ranks)}))")
+
+    def match(self, text: str) -> Optional[str]:
+        """Label of the first group with a keyword in `text` (already lowercased)"""
+        best = None
+        for match in self._regex.finditer(text):
+            rank = self._rank[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+        return None if best is None else self.labels[best]
+
+
+def _fold_case(source: str) -> str:
+    """Lowercase a pattern's literals, leaving escape sequences (\\d, \\s, ...) alone"""
+    return re.sub(r"\\.|[^\\]+", lambda m: m.group(0) if m.group(0).startswith("\\") else m.group(0).lower(), source)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> Optional[datetime]:
+    """First of DATE_FORMATS that parses `value` (SMS dates repeat a lot, so cached)"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _last4_digits(value: str) -> Optional[str]:
+    digits = _DIGIT_RE.findall(value)
+    return "".join(digits[-4:]) if len(digits) >= 4 else None
+
+
+def _clean_merchant(value: str) -> str:
+    return _WHITESPACE_RE.sub(" ", value.strip())[:100]
+
+
+def _identity(value: str) -> str:
+    return value
+
+
+def _compile_bank_patterns(bank_patterns: Dict[str, list]) -> Tuple[Dict[str, list], Dict[str, list]]:
+    """
+    Precompile BANK_PATTERNS twice: as written with IGNORECASE, and
+    case-folded for lowercased text, which is much cheaper for the
+    engine than IGNORECASE. Each pattern keeps its own regex: one
+    alternation over every field would consume text as it matched, so
+    a wide merchant hit could hide the amount or account inside it.
+
+    Returns:
+        ({field: [compiled, ...]}, {field: [case-folded, ...]})
+    """
+    compiled: Dict[str, list] = {}
+    folded: Dict[str, list] = {}
+    for field, patterns in bank_patterns.items():
+        compiled[field], folded[field] = [], []
+        for pattern in patterns:
+            source = pattern[0] if isinstance(pattern, tuple) else pattern
+            regex = re.compile(source, re.IGNORECASE)
+            compiled[field].append((regex, pattern[1]) if isinstance(pattern, tuple) else regex)
+            folded[field].append(re.compile(_fold_case(source)))
+    return compiled, folded
+
+
 class SMSParser:
-    \"\"\"Parser for extracting transaction information from bank SMS messages\"\"\"
+    """Parser for extracting transaction information from bank SMS messages"""
     
     # Common patterns for Indian banks
     BANK_PATTERNS = {
-        \"amount\": [
-            r\"(?:Rs\\.?|INR|₹)\\s*([\\d,]+\\.?\\d*)\",
-            r\"(?:amount|amt)\\s*(?:of)?\\s*(?:Rs\\.?|INR|₹)?\\s*([\\d,]+\\.?\\d*)\",
-            r\"([\\d,]+\\.?\\d*)\\s*(?:Rs\\.?|INR|₹)\",
+        "amount": [
+            r"(?:Rs\.?|INR|₹)\s*([\d,]+\.?\d*)",
+            r"(?:amount|amt)\s*(?:of)?\s*(?:Rs\.?|INR|₹)?\s*([\d,]+\.?\d*)",
+            r"([\d,]+\.?\d*)\s*(?:Rs\.?|INR|₹)",
         ],
-        \"transaction_type\": [
-            (r\"debited|debit|spent|paid|purchase|withdrawal\", \"debit\"),
-            (r\"credited|credit|received|deposited|refund\", \"credit\"),
+        "transaction_type": [
+            (r"debited|debit|spent|paid|purchase|withdrawal", "debit"),
+            (r"credited|credit|received|deposited|refund", "credit"),
         ],
-        \"account\": [
-            r\"(?:A\\/c|account|a\\/c)\\s*(?:no\\.?|number)?\\s*(?:xx|ending|\\*{2,})?([\\dXx*]{4,})\",
-            r\"card\\s*(?:ending|no\\.?)\\s*([\\d*]{4})\",
+        "account": [
+            r"(?:A\/c|account|a\/c)\s*(?:no\.?|number)?\s*(?:xx|ending|\*{2,})?([\dXx*]{4,})",
+            r"card\s*(?:ending|no\.?)\s*([\d*]{4})",
         ],
-        \"merchant\": [
-            r\"(?:at|to|from)\\s+([A-Z][A-Z0-9\\s&.-]+?)(?:\\s+on|\\.\\s|\\,|\$)\",
-            r\"(?:merchant|vendor):\\s*([A-Z][A-Za-z0-9\\s&.-]+)\",
+        "merchant": [
+            r"(?:at|to|from)\s+([A-Z][A-Z0-9\s&.-]+?)(?:\s+on|\.\s|\,|$)",
+            r"(?:merchant|vendor):\s*([A-Z][A-Za-z0-9\s&.-]+)",
         ],
-        \"date\": [
-            r\"(\\d{1,2}[/-]\\d{1,2}[/-]\\d{2,4})\",
-            r\"(\\d{1,2}\\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\\s+\\d{2,4})\",
+        "date": [
+            r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+            r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})",
         ],
-        \"bank_name\": [
-            r\"(?:^|\\b)(HDFC|ICICI|SBI|Axis|Kotak|IDFC|PNB|BOB|Canara|Union|HSBC|Citi|Standard Chartered)(?:\\s+Bank)?(?:\\b|$)\",
+        "bank_name": [
+            r"(?:^|\b)(HDFC|ICICI|SBI|Axis|Kotak|IDFC|PNB|BOB|Canara|Union|HSBC|Citi|Standard Chartered)(?:\s+Bank)?(?:\b|$)",
         ],
     }
     
     # Category keywords for auto-categorization
     CATEGORY_KEYWORDS = {
-        \"food\": [\"restaurant\", \"cafe\", \"zomato\", \"swiggy\", \"food\", \"dominos\", \"pizza\", \"mcdonald\", \"kfc\", \"subway\"],
-        \"transport\": [\"uber\", \"ola\", \"rapido\", \"metro\", \"railway\", \"irctc\", \"fuel\", \"petrol\", \"diesel\", \"parking\"],
-        \"shopping\": [\"amazon\", \"flipkart\", \"myntra\", \"ajio\", \"mall\", \"store\", \"shop\"],
-        \"bills\": [\"electricity\", \"water\", \"gas\", \"broadband\", \"internet\", \"mobile\", \"recharge\", \"postpaid\"],
-        \"entertainment\": [\"netflix\", \"prime\", \"hotstar\", \"spotify\", \"movie\", \"cinema\", \"theatre\"],
-        \"healthcare\": [\"hospital\", \"pharmacy\", \"medical\", \"doctor\", \"clinic\", \"medicine\"],
-        \"education\": [\"school\", \"college\", \"university\", \"course\", \"udemy\", \"coursera\"],
-        \"groceries\": [\"supermarket\", \"grocery\", \"bigbasket\", \"grofers\", \"dmart\", \"reliance fresh\"],
+        "food": ["restaurant", "cafe", "zomato", "swiggy", "food", "dominos", "pizza", "mcdonald", "kfc", "subway"],
+        "transport": ["uber", "ola", "rapido", "metro", "railway", "irctc", "fuel", "petrol", "diesel", "parking"],
+        "shopping": ["amazon", "flipkart", "myntra", "ajio", "mall", "store", "shop"],
+        "bills": ["electricity", "water", "gas", "broadband", "internet", "mobile", "recharge", "postpaid"],
+        "entertainment": ["netflix", "prime", "hotstar", "spotify", "movie", "cinema", "theatre"],
+        "healthcare": ["hospital", "pharmacy", "medical", "doctor", "clinic", "medicine"],
+        "education": ["school", "college", "university", "course", "udemy", "coursera"],
+        "groceries": ["supermarket", "grocery", "bigbasket", "grofers", "dmart", "reliance fresh"],
     }
     
-    def parse_sms(self, sms_text: str, sender: str) -> Optional[Dict]:
-        \"\"\"Parse SMS text and extract transaction details\"\"\"
+    # Precompiled once at class load
+    COMPILED_PATTERNS, FOLDED_PATTERNS = _compile_bank_patterns(BANK_PATTERNS)
+    CATEGORY_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS)
+    
+    def parse_sms(self, sms_text: str, sender: str, received_at=None) -> Optional[Dict]:
+        """Parse SMS text and extract transaction details (received_at feeds the fingerprint)"""
         try:
+            # Lowercased once; every field searches it with case-folded patterns
+            lowered = self._lowered(sms_text)
+            
             # Extract amount
-            amount = self._extract_amount(sms_text)
+            amount = self._extract_amount(sms_text, lowered)
             if not amount:
                 return None
             
             # Extract transaction type
-            transaction_type = self._extract_transaction_type(sms_text)
+            transaction_type = self._extract_transaction_type(sms_text, lowered)
             
             # Extract account info
-            account = self._extract_account(sms_text)
+            account = self._extract_account(sms_text, lowered)
             
             # Extract merchant/description
-            merchant = self._extract_merchant(sms_text)
+            merchant = self._extract_merchant(sms_text, lowered)
             
             # Extract date
-            transaction_date = self._extract_date(sms_text)
+            transaction_date = self._extract_date(sms_text, lowered)
             
             # Extract bank name
-            bank_name = self._extract_bank_name(sms_text, sender)
+            bank_name = self._extract_bank_name(sms_text, sender, lowered)
             
             # Auto-categorize
             category = self._categorize_transaction(merchant, sms_text)
             
             return {
-                \"amount\": amount,
-                \"transaction_type\": transaction_type,
-                \"merchant_name\": merchant,
-                \"category\": category,
-                \"transaction_date\": transaction_date,
-                \"bank_name\": bank_name,
-                \"account_last4\": account,
-                \"from_sms\": True,
-                \"sms_sender\": sender,
-                \"raw_sms_text\": sms_text,
+                "amount": amount,
+                "transaction_type": transaction_type,
+                "merchant_name": merchant,
+                "category": category,
+                "transaction_date": transaction_date,
+                "bank_name": bank_name,
+                "account_last4": account,
+                "from_sms": True,
+                "sms_sender": sender,
+                "raw_sms_text": sms_text,
+                "fingerprint": sms_fingerprint(sender, sms_text, received_at),
             }
         except Exception as e:
-            print(f\"Error parsing SMS: {e}\")
+            print(f"Error parsing SMS: {e}")
             return None
     
-    def _extract_amount(self, text: str) -> Optional[float]:
-        \"\"\"Extract amount from SMS text\"\"\"
-        for pattern in self.BANK_PATTERNS[\"amount\"]:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                amount_str = match.group(1).replace(\",\", \"\")
-                try:
-                    return float(amount_str)
-                except ValueError:
-                    continue
-        return None
+    @staticmethod
+    def _lowered(text: str) -> Optional[str]:
+        """`text` lowercased, or None when lowercasing changes its length (spans would not line up)"""
+        lowered = text.lower()
+        return lowered if len(lowered) == len(text) else None
     
-    def _extract_transaction_type(self, text: str) -> str:
-        \"\"\"Determine if transaction is debit or credit\"\"\"
-        for pattern, txn_type in self.BANK_PATTERNS[\"transaction_type\"]:
-            if re.search(pattern, text, re.IGNORECASE):
-                return txn_type
-        return \"debit\"  # Default to debit
-    
-    def _extract_account(self, text: str) -> Optional[str]:
-        \"\"\"Extract account number (last 4 digits)\"\"\"
-        for pattern in self.BANK_PATTERNS[\"account\"]:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                account = match.group(1)
-                # Get last 4 digits
-                digits = re.findall(r\"\\d\", account)
-                if len(digits) >= 4:
-                    return \"\".join(digits[-4:])
+    def _first_value(self, field: str, text: str, lowered: Optional[str], convert: Callable[[str], Optional[object]]):
+        """
+        Value of the first pattern (in priority order) whose match converts
+        
+        Each pattern searches the whole text on its own, as re.search
+        would. With the lowercased text the case-folded patterns are used
+        and the value is sliced from the original, keeping its case.
+        """
+        for idx, pattern in enumerate(self.COMPILED_PATTERNS[field]):
+            if lowered is not None:
+                regex = self.FOLDED_PATTERNS[field][idx]
+                match = regex.search(lowered)
+            else:
+                regex = pattern[0] if isinstance(pattern, tuple) else pattern
+                match = regex.search(text)
+            if not match:
+                continue
+            start, end = match.span(1 if regex.groups else 0)
+            result = convert(text[start:end])
+            if result is not None:
+                return pattern[1] if isinstance(pattern, tuple) else result
         return None
     
-    def _extract_merchant(self, text: str) -> Optional[str]:
-        \"\"\"Extract merchant name from SMS\"\"\"
-        for pattern in self.BANK_PATTERNS[\"merchant\"]:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                merchant = match.group(1).strip()
-                # Clean up merchant name
-                merchant = re.sub(r\"\\s+\", \" \", merchant)
-                return merchant[:100]  # Limit length
-        return \"Unknown Merchant\"
-    
-    def _extract_date(self, text: str) -> datetime:
-        \"\"\"Extract transaction date from SMS\"\"\"
-        for pattern in self.BANK_PATTERNS[\"date\"]:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                date_str = match.group(1)
-                try:
-                    # Try different date formats
-                    for fmt in [\"%d/%m/%Y\", \"%d-%m-%Y\", \"%d/%m/%y\", \"%d %b %Y\", \"%d %B %Y\"]:
-                        try:
-                            return datetime.strptime(date_str, fmt)
-                        except ValueError:
-                            continue
-                except Exception:
-                    pass
-        return datetime.utcnow()  # Default to current time
-    
-    def _extract_bank_name(self, text: str, sender: str) -> Optional[str]:
-        \"\"\"Extract bank name from SMS\"\"\"
-        # First try from sender ID
-        for pattern in self.BANK_PATTERNS[\"bank_name\"]:
-            match = re.search(pattern, sender, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        # Then try from SMS text
-        for pattern in self.BANK_PATTERNS[\"bank_name\"]:
-            match = re.search(pattern, text, re.IGNORECASE)
+    def _extract_amount(self, text: str, lowered: Optional[str] = None) -> Optional[float]:
+        """Extract amount from SMS text"""
+        return self._first_value("amount", text, lowered, _parse_amount)
+    
+    def _extract_transaction_type(self, text: str, lowered: Optional[str] = None) -> str:
+        """Determine if transaction is debit or credit"""
+        return self._first_value("transaction_type", text, lowered, _identity) or "debit"  # Default to debit
+    
+    def _extract_account(self, text: str, lowered: Optional[str] = None) -> Optional[str]:
+        """Extract account number (last 4 digits)"""
+        return self._first_value("account", text, lowered, _last4_digits)
+    
+    def _extract_merchant(self, text: str, lowered: Optional[str] = None) -> Optional[str]:
+        """Extract merchant name from SMS"""
+        return self._first_value("merchant", text, lowered, _clean_merchant) or "Unknown Merchant"
+    
+    def _extract_date(self, text: str, lowered: Optional[str] = None) -> datetime:
+        """Extract transaction date from SMS"""
+        return self._first_value("date", text, lowered, _parse_date) or datetime.utcnow()  # Default to current time
+    
+    def _extract_bank_name(self, text: str, sender: str, lowered: Optional[str] = None) -> Optional[str]:
+        """Extract bank name from SMS"""
+        # First try from sender ID, then from SMS text
+        return self._sender_bank_name(sender) or self._first_value("bank_name", text, lowered, _identity)
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _sender_bank_name(sender: str) -> Optional[str]:
+        """Bank name from a sender ID (a handful of IDs cover most traffic, so cached)"""
+        for regex in SMSParser.COMPILED_PATTERNS["bank_name"]:
+            match = regex.search(sender)
             if match:
                 return match.group(1)
-        
         return None
     
     def _categorize_transaction(self, merchant: Optional[str], text: str) -> str:
-        \"\"\"Auto-categorize transaction based on merchant and keywords\"\"\"
-        search_text = f\"{merchant or ''} {text}\".lower()
-        
-        for category, keywords in self.CATEGORY_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in search_text:
-                    return category
-        
-        return \"uncategorized\"
+        """Auto-categorize transaction based on merchant and keywords"""
+        search_text = f"{merchant or ''} {text}".lower()
+        return self.CATEGORY_MATCHER.match(search_text) or "uncategorized"
     
     def detect_recurring_pattern(self, transactions: List[Dict]) -> List[Dict]:
-        \"\"\"Detect recurring transactions (subscriptions)\"\"\"
+        """Detect recurring transactions (subscriptions)"""
         # Group transactions by merchant and amount
         grouped = {}
         for txn in transactions:
-            key = f\"{txn.get('merchant_name', 'unknown')}_{txn.get('amount', 0)}\"
+            key = f"{txn.get('merchant_name', 'unknown')}_{txn.get('amount', 0)}"
             if key not in grouped:
                 grouped[key] = []
             grouped[key].append(txn)
@@ -193,42 +338,173 @@ class SMSParser:
                 if len(dates) >= 2:
                     # Simple check: if we have multiple transactions, mark as recurring
                     recurring.append({
-                        \"merchant\": txns[0].get('merchant_name'),
-                        \"amount\": txns[0].get('amount'),
-                        \"frequency\": len(txns),
-                        \"pattern\": \"monthly\",  # Simplified
+                        "merchant": txns[0].get('merchant_name'),
+                        "amount": txns[0].get('amount'),
+                        "frequency": len(txns),
+                        "pattern": "monthly",  # Simplified
                     })
         
         return recurring
 
 
+# Bulk parsing: each pool worker builds its own parser once
+_worker_parser: Optional[SMSParser] = None
+_parse_pools: Dict[int, ProcessPoolExecutor] = {}
+_parse_pools_lock = threading.Lock()
+
+
+def parse_sms_chunk(messages: List[Tuple]) -> List[Optional[Dict]]:
+    """Parse (text, sender[, received_at]) tuples in order; runs inside a pool worker"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = SMSParser()
+    return [_worker_parser.parse_sms(*message) for message in messages]
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool for bulk SMS parsing, one per worker count"""
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            pool = _parse_pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def shutdown_parse_pools() -> None:
+    """Stop the bulk parsing worker processes"""
+    with _parse_pools_lock:
+        for pool in _parse_pools.values():
+            pool.shutdown(cancel_futures=True)
+        _parse_pools.clear()
+
+
+def _plan_bulk_parse(
+    messages: Iterable[Tuple],
+    workers: Optional[int],
+    chunk_size: Optional[int]
+) -> Tuple[Iterator[List[Tuple]], Optional[ProcessPoolExecutor], int]:
+    """
+    Split messages into chunks and pick a pool
+
+    Batches smaller than SMS_PARSE_MIN_BATCH (or workers <= 1) get no pool:
+    starting processes and pickling would cost more than the parsing.
+
+    Returns:
+        (chunks, pool or None for in-process parsing, max chunks in flight)
+    """
+    workers = workers or settings.SMS_PARSE_WORKERS
+    chunk_size = chunk_size or settings.SMS_PARSE_CHUNK_SIZE
+    iterator = iter(messages)
+    head = list(islice(iterator, settings.SMS_PARSE_MIN_BATCH))
+    small = len(head) < settings.SMS_PARSE_MIN_BATCH
+
+    def chunks() -> Iterator[List[Tuple]]:
+        source = iter(head) if small else chain(head, iterator)
+        while True:
+            chunk = list(islice(source, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    if small or workers <= 1:
+        return chunks(), None, 1
+    return chunks(), get_parse_pool(workers), workers * 2
+
+
+def iter_parse_sms(
+    messages: Iterable[Tuple],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Iterator[List[Optional[Dict]]]:
+    """
+    Parse (text, sender[, received_at]) tuples chunk by chunk across a
+    process pool
+
+    Yields one list per chunk, in input order, as soon as that chunk and
+    every chunk before it are done; at most two chunks per worker are in
+    flight, so `messages` can be a lazy stream. Unparseable messages come
+    back as None so results line up with the input.
+    """
+    chunks, pool, window = _plan_bulk_parse(messages, workers, chunk_size)
+    if pool is None:
+        for chunk in chunks:
+            yield parse_sms_chunk(chunk)
+        return
+
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(parse_sms_chunk, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+async def aiter_parse_sms(
+    messages: Iterable[Tuple],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> AsyncIterator[List[Optional[Dict]]]:
+    """iter_parse_sms for async callers: the event loop is never blocked on a chunk"""
+    chunks, pool, window = _plan_bulk_parse(messages, workers, chunk_size)
+    if pool is None:
+        for chunk in chunks:
+            yield parse_sms_chunk(chunk)
+            await asyncio.sleep(0)
+        return
+
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    for chunk in chunks:
+        pending.append(loop.run_in_executor(pool, parse_sms_chunk, chunk))
+        if len(pending) >= window:
+            yield await pending.popleft()
+    while pending:
+        yield await pending.popleft()
+
+
 class SMSForwardingHandler:
-    \"\"\"Handler for processing forwarded SMS messages\"\"\"
+    """Handler for processing forwarded SMS messages"""
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, chunk_size: Optional[int] = None):
         self.parser = SMSParser()
+        self.workers = workers
+        self.chunk_size = chunk_size
     
-    async def process_sms(self, sms_text: str, sender: str, user_id: int) -> Optional[Dict]:
-        \"\"\"Process a forwarded SMS and extract transaction data\"\"\"
-        parsed_data = self.parser.parse_sms(sms_text, sender)
+    async def process_sms(self, sms_text: str, sender: str, user_id: int, received_at=None) -> Optional[Dict]:
+        """Process a forwarded SMS and extract transaction data (received_at goes into its fingerprint)"""
+        parsed_data = self.parser.parse_sms(sms_text, sender, received_at)
         
         if parsed_data:
-            parsed_data[\"user_id\"] = user_id
+            parsed_data["user_id"] = user_id
             return parsed_data
         
         return None
     
+    async def stream_bulk_sms(self, sms_list: Iterable[Dict], user_id: int) -> AsyncIterator[List[Dict]]:
+        """
+        Parse many SMS messages, yielding each chunk's transactions in input order
+
+        Each message's `timestamp` (or `date`) goes into its fingerprint, as
+        for backup files, so the same purchase made twice isn't deduplicated.
+        """
+        messages = (
+            (sms.get("text", ""), sms.get("sender", ""), sms.get("timestamp", sms.get("date")))
+            for sms in sms_list
+        )
+        async for results in aiter_parse_sms(messages, self.workers, self.chunk_size):
+            transactions = []
+            for parsed_data in results:
+                if parsed_data:
+                    parsed_data["user_id"] = user_id
+                    transactions.append(parsed_data)
+            yield transactions
+    
     async def bulk_process_sms(self, sms_list: List[Dict], user_id: int) -> List[Dict]:
-        \"\"\"Process multiple SMS messages at once\"\"\"
+        """Process multiple SMS messages at once"""
         transactions = []
         
-        for sms in sms_list:
-            result = await self.process_sms(
-                sms.get(\"text\", \"\"),
-                sms.get(\"sender\", \"\"),
-                user_id
-            )
-            if result:
-                transactions.append(result)
+        async for chunk in self.stream_bulk_sms(sms_list, user_id):
+            transactions.extend(chunk)
         
         return transactions
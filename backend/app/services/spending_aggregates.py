@@ -0,0 +1,239 @@
+# Spending aggregates service - grouped SQL queries for analytics
+# These read transactions, not the daily rollup: they bucket by the user's local
+# day/week/month and cut windows at a time of day, and the rollup is keyed by UTC day
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+
+
+def get_zone(tz_name: Optional[str]) -> ZoneInfo:
+    """Resolve a user's timezone name, falling back to UTC"""
+    try:
+        return ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def local_date_label(db: Session, column, zone: ZoneInfo, now: datetime, granularity: str = "day"):
+    """
+    SQL expression rendering a naive-UTC timestamp column as a local
+    'YYYY-MM-DD' string, or 'YYYY-MM' when granularity is "month"
+
+    Postgres converts with the zone's full rules. SQLite has no timezone
+    database, so the zone's current UTC offset is applied instead.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        local = func.timezone(zone.key, func.timezone("UTC", column))
+        return func.to_char(local, "YYYY-MM" if granularity == "month" else "YYYY-MM-DD")
+    offset = now.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset()
+    minutes = int(offset.total_seconds() // 60)
+    return func.strftime("%Y-%m" if granularity == "month" else "%Y-%m-%d", column, f"{minutes:+d} minutes")
+
+
+def local_day_start_utc(day: date, zone: ZoneInfo) -> datetime:
+    """Naive UTC timestamp of local midnight on `day`"""
+    local_midnight = datetime(day.year, day.month, day.day, tzinfo=zone)
+    return local_midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First calendar day of the day/week/month bucket containing `day`"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` away from the month containing `day`"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def summarize_period(
+    db: Session,
+    user_id: int,
+    start_date: datetime,
+    now: Optional[datetime] = None,
+    top_n: int = 5,
+    trend_buckets: int = 6,
+    bucket_days: int = 30
+) -> Dict:
+    """
+    Aggregate a user's transactions since start_date inside the database
+
+    Totals and the trend buckets come back as a single scalar row and the
+    category breakdown as one grouped query, so no Transaction rows are
+    hydrated regardless of how many the user has.
+
+    Returns:
+        Dictionary with totals, top categories and trend buckets
+    """
+    now = now or datetime.now()
+    is_credit = Transaction.transaction_type == "credit"
+    is_debit = Transaction.transaction_type == "debit"
+
+    # Trend buckets: fixed-width windows ending with the one starting today
+    buckets = []
+    bucket_columns = []
+    for i in range(trend_buckets):
+        bucket_start = now - timedelta(days=bucket_days * (trend_buckets - 1 - i))
+        bucket_end = bucket_start + timedelta(days=bucket_days)
+        in_bucket = and_(Transaction.created_at >= bucket_start, Transaction.created_at < bucket_end)
+        buckets.append(bucket_start)
+        bucket_columns.append(func.sum(case((and_(in_bucket, is_credit), Transaction.amount), else_=0)))
+        bucket_columns.append(func.sum(case((and_(in_bucket, is_debit), Transaction.amount), else_=0)))
+
+    totals = db.query(
+        func.count(Transaction.id),
+        func.sum(case((is_debit, 1), else_=0)),
+        func.sum(case((is_credit, Transaction.amount), else_=0)),
+        func.sum(case((is_debit, Transaction.amount), else_=0)),
+        *bucket_columns
+    ).filter(
+        and_(
+            Transaction.user_id == user_id,
+            Transaction.created_at >= start_date
+        )
+    ).one()
+
+    # Category breakdown for debits, largest first
+    category = func.coalesce(Transaction.category, "uncategorized")
+    category_rows = db.query(
+        category.label("category"),
+        func.sum(Transaction.amount).label("total"),
+        func.count(Transaction.id).label("count")
+    ).filter(
+        and_(
+            Transaction.user_id == user_id,
+            Transaction.transaction_type == "debit",
+            Transaction.created_at >= start_date
+        )
+    ).group_by(category).order_by(func.sum(Transaction.amount).desc()).limit(top_n).all()
+
+    bucket_totals = totals[4:]
+    monthly_trends = [
+        {
+            "month": bucket_start.strftime("%b %Y"),
+            "income": float(bucket_totals[2 * i] or 0),
+            "expenses": float(bucket_totals[2 * i + 1] or 0)
+        }
+        for i, bucket_start in enumerate(buckets)
+    ]
+
+    return {
+        "transaction_count": totals[0] or 0,
+        "debit_count": int(totals[1] or 0),
+        "total_income": float(totals[2] or 0),
+        "total_expenses": float(totals[3] or 0),
+        "top_categories": [
+            {"category": row.category, "total": float(row.total), "count": row.count}
+            for row in category_rows
+        ],
+        "monthly_trends": monthly_trends
+    }
+
+
+def spending_series(
+    db: Session,
+    user_id: int,
+    days: int,
+    granularity: str = "day",
+    tz_name: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Debit totals for the last `days` local calendar days, bucketed by
+    day, week (starting Monday) or month
+
+    One GROUP BY over local days is issued; week and month buckets are
+    rolled up from those rows and empty buckets are filled in Python.
+    """
+    zone = get_zone(tz_name)
+    now = now or datetime.utcnow()
+    today = now.replace(tzinfo=timezone.utc).astimezone(zone).date()
+    first_day = today - timedelta(days=max(days, 1) - 1)
+
+    day_label = local_date_label(db, Transaction.created_at, zone, now)
+    rows = db.query(
+        day_label.label("day"),
+        func.sum(Transaction.amount).label("total"),
+        func.count(Transaction.id).label("count")
+    ).filter(
+        and_(
+            Transaction.user_id == user_id,
+            Transaction.transaction_type == "debit",
+            Transaction.created_at >= local_day_start_utc(first_day, zone),
+            Transaction.created_at < local_day_start_utc(today + timedelta(days=1), zone)
+        )
+    ).group_by(day_label).all()
+
+    # Gap-fill every bucket in the range, then fold the daily rows in
+    series: Dict[date, Dict] = {}
+    day = first_day
+    while day <= today:
+        bucket = period_start(day, granularity)
+        series.setdefault(bucket, {"date": bucket.strftime("%Y-%m-%d"), "amount": 0.0, "count": 0})
+        day += timedelta(days=1)
+
+    for row in rows:
+        bucket = period_start(date.fromisoformat(str(row.day)), granularity)
+        if bucket in series:
+            series[bucket]["amount"] += float(row.total or 0)
+            series[bucket]["count"] += row.count
+
+    return list(series.values())
+
+
+def monthly_cash_flow(
+    db: Session,
+    user_id: int,
+    months: int,
+    tz_name: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Income, expenses and savings per local calendar month, oldest first,
+    for the current month and the `months - 1` before it
+
+    Credits and debits are split with conditional SUMs in one grouped
+    query, so the cost does not depend on the number of months.
+    """
+    zone = get_zone(tz_name)
+    now = now or datetime.utcnow()
+    this_month = now.replace(tzinfo=timezone.utc).astimezone(zone).date().replace(day=1)
+    first_month = add_months(this_month, -(max(months, 1) - 1))
+
+    month_label = local_date_label(db, Transaction.created_at, zone, now, granularity="month")
+    rows = db.query(
+        month_label.label("month"),
+        func.sum(case((Transaction.transaction_type == "credit", Transaction.amount), else_=0)).label("income"),
+        func.sum(case((Transaction.transaction_type == "debit", Transaction.amount), else_=0)).label("expenses")
+    ).filter(
+        and_(
+            Transaction.user_id == user_id,
+            Transaction.created_at >= local_day_start_utc(first_month, zone),
+            Transaction.created_at < local_day_start_utc(add_months(this_month, 1), zone)
+        )
+    ).group_by(month_label).all()
+    totals = {row.month: row for row in rows}
+
+    data = []
+    month = first_month
+    while month <= this_month:
+        row = totals.get(month.strftime("%Y-%m"))
+        income = float(row.income or 0) if row else 0.0
+        expenses = float(row.expenses or 0) if row else 0.0
+        data.append({
+            "month": month.strftime("%b %Y"),
+            "income": income,
+            "expenses": expenses,
+            "savings": income - expenses
+        })
+        month = add_months(month, 1)
+
+    return data
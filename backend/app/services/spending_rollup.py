@@ -0,0 +1,275 @@
+# Spending rollup service - keeps daily_spending_rollup in step with transactions
+import argparse
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import event, func, and_, insert, inspect, delete, select
+from sqlalchemy.orm import Session
+from app.models.daily_spending_rollup import DailySpendingRollup
+from app.models.transaction import Transaction
+
+ROLLUP_KEY = ("user_id", "day", "category", "transaction_type")
+# Transaction columns that decide a row's rollup key or totals
+ROLLUP_COLUMNS = ("user_id", "created_at", "category", "transaction_type", "amount")
+
+
+def transaction_value(row, key: str):
+    """Read a field from an ORM Transaction or a plain mapping"""
+    return row[key] if isinstance(row, Mapping) else getattr(row, key)
+
+
+def _upsert_statement(db: Session):
+    """INSERT ... ON CONFLICT DO UPDATE that adds a delta row to the rollup"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        least, greatest = func.least, func.greatest
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        least, greatest = func.min, func.max
+
+    stmt = dialect_insert(DailySpendingRollup)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "total": DailySpendingRollup.total + excluded.total,
+            "count": DailySpendingRollup.count + excluded.count,
+            "min_amount": least(func.coalesce(DailySpendingRollup.min_amount, excluded.min_amount), excluded.min_amount),
+            "max_amount": greatest(func.coalesce(DailySpendingRollup.max_amount, excluded.max_amount), excluded.max_amount),
+            "updated_at": excluded.updated_at,
+        }
+    )
+
+
+def apply_transactions(db: Session, transactions: Iterable) -> int:
+    """
+    Fold newly inserted transactions into the rollup
+
+    Accepts flushed Transaction objects or mappings with user_id, amount,
+    transaction_type, category and created_at. The batch is pre-aggregated
+    so each (user, day, category, type) key costs one upserted row.
+
+    Returns:
+        Number of rollup rows touched
+    """
+    deltas: Dict[tuple, Dict] = {}
+    for txn in transactions:
+        amount = float(transaction_value(txn, "amount") or 0)
+        created_at = transaction_value(txn, "created_at") or datetime.utcnow()
+        key = (
+            transaction_value(txn, "user_id"),
+            created_at.date(),
+            transaction_value(txn, "category") or "uncategorized",
+            transaction_value(txn, "transaction_type"),
+        )
+        delta = deltas.get(key)
+        if delta is None:
+            deltas[key] = dict(zip(ROLLUP_KEY, key), total=amount, count=1, min_amount=amount, max_amount=amount)
+        else:
+            delta["total"] += amount
+            delta["count"] += 1
+            delta["min_amount"] = min(delta["min_amount"], amount)
+            delta["max_amount"] = max(delta["max_amount"], amount)
+
+    if not deltas:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [dict(delta, updated_at=now) for delta in deltas.values()]
+    db.execute(_upsert_statement(db), rows)
+    return len(rows)
+
+
+def _raw_aggregate_query(user_id: Optional[int] = None, day: Optional[date] = None):
+    """Rollup-shaped aggregate computed straight from the transactions table (optionally one UTC day)"""
+    utc_day = func.date(Transaction.created_at)
+    category = func.coalesce(Transaction.category, "uncategorized")
+    query = select(
+        Transaction.user_id,
+        utc_day.label("day"),
+        category.label("category"),
+        Transaction.transaction_type,
+        func.sum(Transaction.amount).label("total"),
+        func.count(Transaction.id).label("count"),
+        func.min(Transaction.amount).label("min_amount"),
+        func.max(Transaction.amount).label("max_amount"),
+    ).group_by(Transaction.user_id, utc_day, category, Transaction.transaction_type)
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    if day is not None:
+        start = datetime.combine(day, time.min)
+        query = query.where(Transaction.created_at >= start, Transaction.created_at < start + timedelta(days=1))
+    return query
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Backfill the rollup from raw transactions (for one user or everyone)
+
+    Returns:
+        Number of rollup rows written
+    """
+    clear = delete(DailySpendingRollup)
+    if user_id is not None:
+        clear = clear.where(DailySpendingRollup.user_id == user_id)
+    db.execute(clear)
+
+    source = _raw_aggregate_query(user_id)
+    result = db.execute(
+        insert(DailySpendingRollup).from_select(
+            [*ROLLUP_KEY, "total", "count", "min_amount", "max_amount"],
+            source
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def refresh_day(db, user_id: int, day: date) -> None:
+    """
+    Recompute one user's rollup rows for one UTC day from raw transactions
+
+    Used when transactions change or go away: a negative delta can't undo
+    a min/max, so the day is aggregated again (it is a single index range).
+    `db` is a Session or a Connection; nothing is committed.
+    """
+    db.execute(delete(DailySpendingRollup).where(
+        DailySpendingRollup.user_id == user_id,
+        DailySpendingRollup.day == day
+    ))
+    db.execute(insert(DailySpendingRollup).from_select(
+        [*ROLLUP_KEY, "total", "count", "min_amount", "max_amount", "updated_at"],
+        _raw_aggregate_query(user_id, day).add_columns(func.current_timestamp())
+    ))
+
+
+def _previous_value(state, column: str):
+    history = state.attrs[column].history
+    return history.deleted[0] if history.deleted else getattr(state.object, column)
+
+
+# ORM edits and deletes keep the rollup in step; query-level bulk UPDATE/DELETE
+# statements skip these hooks and need a rebuild() for the users they touch
+@event.listens_for(Transaction, "after_update")
+def _transaction_updated(mapper, connection, target):
+    """Move an edited transaction out of its old rollup day and into its new one"""
+    state = inspect(target)
+    if not any(state.attrs[column].history.has_changes() for column in ROLLUP_COLUMNS):
+        return
+    old_created_at = _previous_value(state, "created_at")
+    days = {(target.user_id, target.created_at.date())}
+    if old_created_at is not None:
+        days.add((_previous_value(state, "user_id"), old_created_at.date()))
+    for user_id, day in days:
+        refresh_day(connection, user_id, day)
+
+
+@event.listens_for(Transaction, "after_delete")
+def _transaction_deleted(mapper, connection, target):
+    if target.created_at is not None:
+        refresh_day(connection, target.user_id, target.created_at.date())
+
+
+def check_consistency(db: Session, user_id: Optional[int] = None, tolerance: float = 0.01) -> List[Dict]:
+    """
+    Compare the rollup against raw transactions
+
+    Returns:
+        One entry per mismatching key with the rollup and raw aggregates
+        (None on the side where the key is missing); empty when consistent
+    """
+    def to_key(row) -> tuple:
+        day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+        return (row.user_id, day, row.category, row.transaction_type)
+
+    def to_values(row) -> Dict:
+        return {
+            "total": float(row.total or 0),
+            "count": int(row.count or 0),
+            "min_amount": row.min_amount,
+            "max_amount": row.max_amount,
+        }
+
+    raw = {to_key(row): to_values(row) for row in db.execute(_raw_aggregate_query(user_id))}
+
+    rollup_query = select(DailySpendingRollup)
+    if user_id is not None:
+        rollup_query = rollup_query.where(DailySpendingRollup.user_id == user_id)
+    rolled = {to_key(row): to_values(row) for row in db.scalars(rollup_query)}
+
+    mismatches = []
+    for key in sorted(raw.keys() | rolled.keys(), key=str):
+        expected, actual = raw.get(key), rolled.get(key)
+        if expected and actual and expected["count"] == actual["count"] and all(
+            abs((expected[field] or 0) - (actual[field] or 0)) <= tolerance
+            for field in ("total", "min_amount", "max_amount")
+        ):
+            continue
+        mismatches.append({"key": dict(zip(ROLLUP_KEY, key)), "rollup": actual, "raw": expected})
+    return mismatches
+
+
+def category_totals(
+    db: Session,
+    user_id: int,
+    since: date,
+    transaction_type: str = "debit"
+) -> Dict[str, Dict]:
+    """
+    Per-category aggregates since a UTC day, read from the rollup
+
+    Returns:
+        {category: {"total", "count", "avg", "min", "max"}}
+    """
+    rows = db.query(
+        DailySpendingRollup.category,
+        func.sum(DailySpendingRollup.total).label("total"),
+        func.sum(DailySpendingRollup.count).label("count"),
+        func.min(DailySpendingRollup.min_amount).label("min"),
+        func.max(DailySpendingRollup.max_amount).label("max")
+    ).filter(
+        and_(
+            DailySpendingRollup.user_id == user_id,
+            DailySpendingRollup.transaction_type == transaction_type,
+            DailySpendingRollup.day >= since
+        )
+    ).group_by(DailySpendingRollup.category).all()
+
+    return {
+        row.category: {
+            "total": float(row.total or 0),
+            "count": int(row.count or 0),
+            "avg": float(row.total or 0) / row.count if row.count else 0,
+            "min": row.min,
+            "max": row.max,
+        }
+        for row in rows
+    }
+
+
+def main():
+    """Command line entry point: rebuild or check the rollup"""
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the daily_spending_rollup table")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--user-id", type=int, default=None, help="Limit to a single user")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            written = rebuild(db, args.user_id)
+            print(f"Rebuilt rollup: {written} rows")
+        else:
+            mismatches = check_consistency(db, args.user_id)
+            for mismatch in mismatches:
+                print(mismatch)
+            print(f"{len(mismatches)} mismatching keys")
+            raise SystemExit(1 if mismatches else 0)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Parsed statement cache - extraction results keyed by the statement file's SHA-256 and parser version
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.parsed_statement import ParsedStatement
+from app.services.statement_layouts import PARSER_VERSION
+
+
+def cached_extraction(db: Session, user_id: int, content_hash: str) -> Optional[Dict]:
+    """
+    A statement's extract_statement_transactions() result from an earlier import, or None
+
+    A hit needs no password and no PDF: the file is not opened at all.
+    """
+    result = db.scalar(select(ParsedStatement.result).where(
+        ParsedStatement.user_id == user_id,
+        ParsedStatement.content_hash == content_hash,
+        ParsedStatement.parser_version == PARSER_VERSION
+    ))
+    if result is None:
+        return None
+    extraction = json.loads(result)
+    for transaction in extraction['transactions']:
+        transaction['date'] = datetime.fromisoformat(transaction['date'])
+    return extraction
+
+
+def cache_extraction(db: Session, user_id: int, content_hash: str, extraction: Dict) -> None:
+    """Store an extraction for the next import of the same file (commits)"""
+    db.add(ParsedStatement(
+        user_id=user_id,
+        content_hash=content_hash,
+        parser_version=PARSER_VERSION,
+        result=json.dumps(extraction, default=datetime.isoformat)
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another import of the same file cached it first
+        db.rollback()
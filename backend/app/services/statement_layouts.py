@@ -0,0 +1,319 @@
+# Statement layout profiles - per-bank column layouts for reading transactions by word position
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import pdfplumber
+
+from app.services.pdf_text import PdfSource, UnlockedPdf, extract_pdf_pages, open_pdf_stream, submit_pdf_pages
+
+# Bump whenever extraction output changes, so cached parses (see statement_cache) are redone
+PARSER_VERSION = "layouts-2"
+
+# Column fields a profile can map a header to (anything else is read and dropped)
+FIELDS = ("date", "description", "debit", "credit", "amount", "drcr", "balance")
+# Fields printed right-aligned under their header, so their cells can start left of it
+AMOUNT_FIELDS = frozenset(("debit", "credit", "amount", "balance"))
+
+_AMOUNT_RE = re.compile(r"^-?[\d,]+\.\d{2}$")
+_LINE_DATE_RE = re.compile(r"^\d{2}[/-]\d{2}[/-]\d{4}$")
+_LINE_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y")
+
+
+class LayoutProfile(NamedTuple):
+    """How one bank lays out its statement table"""
+    bank: str
+    detect: "re.Pattern[str]"  # matches the bank's name in the first page's text
+    columns: Tuple[Tuple[str, str], ...]  # (field or "", header text), left to right
+    date_formats: Tuple[str, ...]
+
+
+class ColumnLayout(NamedTuple):
+    """
+    A document's column spans, found once from its header row
+
+    Text columns are left-aligned, so between two of them the boundary is
+    where the right one's header starts. Amount columns are right-aligned
+    and their cells can start left of the header, so next to one the
+    boundary is the midpoint between the two header extents. A word goes
+    to the span holding its midpoint; a word in an amount column that
+    ends before the column's header starts is the text column to its left
+    running long. Passed to the page workers instead of being re-detected
+    on every page.
+    """
+    bank: str
+    starts: Tuple[float, ...]  # each header's x0
+    bounds: Tuple[float, ...]  # the boundary between each column and the next
+    fields: Tuple[str, ...]
+    header: Tuple[str, ...]  # the header row's words, to find it again on later pages
+
+
+LAYOUT_PROFILES: Dict[str, LayoutProfile] = {
+    profile.bank: profile for profile in (
+        LayoutProfile(
+            "HDFC", re.compile(r"HDFC\s*BANK", re.IGNORECASE),
+            (("date", "Date"), ("description", "Narration"), ("", "Chq./Ref.No."), ("", "Value Dt"),
+             ("debit", "Withdrawal Amt."), ("credit", "Deposit Amt."), ("balance", "Closing Balance")),
+            ("%d/%m/%y", "%d/%m/%Y")
+        ),
+        LayoutProfile(
+            "ICICI", re.compile(r"ICICI\s*BANK", re.IGNORECASE),
+            (("", "S No."), ("", "Value Date"), ("date", "Transaction Date"), ("", "Cheque Number"),
+             ("description", "Transaction Remarks"), ("debit", "Withdrawal Amount (INR)"),
+             ("credit", "Deposit Amount (INR)"), ("balance", "Balance (INR)")),
+            ("%d/%m/%Y",)
+        ),
+        LayoutProfile(
+            "SBI", re.compile(r"STATE\s+BANK\s+OF\s+INDIA|\bSBI\b", re.IGNORECASE),
+            (("date", "Txn Date"), ("", "Value Date"), ("description", "Description"), ("", "Ref No./Cheque No."),
+             ("debit", "Debit"), ("credit", "Credit"), ("balance", "Balance")),
+            ("%d %b %Y",)
+        ),
+        LayoutProfile(
+            "AXIS", re.compile(r"AXIS\s*BANK", re.IGNORECASE),
+            (("date", "Tran Date"), ("", "Chq No"), ("description", "Particulars"), ("debit", "Debit"),
+             ("credit", "Credit"), ("balance", "Balance"), ("", "Init. Br")),
+            ("%d-%m-%Y",)
+        ),
+        LayoutProfile(
+            "KOTAK", re.compile(r"KOTAK\s*MAHINDRA|KOTAK\s*BANK", re.IGNORECASE),
+            (("date", "Date"), ("description", "Narration"), ("", "Chq/Ref No."), ("amount", "Amount"),
+             ("drcr", "Dr / Cr"), ("balance", "Balance")),
+            ("%d-%m-%Y",)
+        ),
+    )
+}
+
+
+def detect_profile(text: str, bank: Optional[str] = None) -> Optional[LayoutProfile]:
+    """The profile for `bank` (e.g. the sender's bank), else the first one named in `text`"""
+    if bank and bank.upper() in LAYOUT_PROFILES:
+        return LAYOUT_PROFILES[bank.upper()]
+    return next((profile for profile in LAYOUT_PROFILES.values() if profile.detect.search(text)), None)
+
+
+def group_lines(words: Iterable[Dict]) -> List[List[Dict]]:
+    """Words grouped into lines by their rounded top, top to bottom, each left to right"""
+    lines: Dict[int, List[Dict]] = {}
+    for word in words:
+        lines.setdefault(round(word["top"]), []).append(word)
+    return [sorted(line, key=lambda word: word["x0"]) for _, line in sorted(lines.items())]
+
+
+def detect_columns(lines: Sequence[Sequence[Dict]], profile: LayoutProfile) -> Optional[ColumnLayout]:
+    """Column spans from the first line holding every header of `profile`, in order"""
+    headers = [header.split() for _, header in profile.columns]
+    fields = tuple(field for field, _ in profile.columns)
+    for line in lines:
+        texts = [word["text"] for word in line]
+        starts, ends = [], []
+        position = 0
+        for header in headers:
+            # Headers are matched in order, so repeated words ("Transaction") resolve left to right
+            while position + len(header) <= len(texts) and texts[position:position + len(header)] != header:
+                position += 1
+            if position + len(header) > len(texts):
+                break
+            starts.append(line[position]["x0"])
+            ends.append(line[position + len(header) - 1]["x1"])
+            position += len(header)
+        else:
+            bounds = tuple(
+                starts[n + 1] if fields[n] not in AMOUNT_FIELDS and fields[n + 1] not in AMOUNT_FIELDS
+                else (ends[n] + starts[n + 1]) / 2
+                for n in range(len(fields) - 1)
+            )
+            return ColumnLayout(profile.bank, tuple(starts), bounds, fields, tuple(texts))
+    return None
+
+
+def _column(layout: ColumnLayout, word: Dict) -> int:
+    column = bisect_right(layout.bounds, (word["x0"] + word["x1"]) / 2)
+    if column and layout.fields[column] in AMOUNT_FIELDS and word["x1"] < layout.starts[column]:
+        return column - 1
+    return column
+
+
+def _table_start(lines: Sequence[Sequence[Dict]], layout: ColumnLayout) -> int:
+    """Index of the first line below the page's header row (0 on pages without one)"""
+    for number, line in enumerate(lines):
+        if len(line) == len(layout.header) and all(
+                word["text"] == text for word, text in zip(line, layout.header)):
+            return number + 1
+    return 0
+
+
+def parse_amount(value: str) -> Optional[float]:
+    value = value.replace(",", "").strip()
+    try:
+        return float(value) if value and value != "-" else None
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str, formats: Tuple[str, ...]) -> Optional[datetime]:
+    """strptime is most of a row's cost, and a statement repeats each date many times"""
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _row_transaction(cells: Dict[str, str], date: datetime) -> Optional[Dict]:
+    if "amount" in cells or "drcr" in cells:
+        amount = parse_amount(cells.get("amount", ""))
+        if amount is None:
+            return None
+        is_debit = cells.get("drcr", "").strip().upper().startswith("DR")
+        debit, credit = (amount, 0.0) if is_debit else (0.0, amount)
+    else:
+        debit, credit = parse_amount(cells.get("debit", "")), parse_amount(cells.get("credit", ""))
+        if debit is None and credit is None:
+            return None
+        debit, credit = debit or 0.0, credit or 0.0
+    return {
+        "date": date,
+        "description": cells.get("description", ""),
+        "debit": debit,
+        "credit": credit,
+        "balance": parse_amount(cells.get("balance", "")),
+    }
+
+
+def extract_layout_transactions(
+    source: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    password: Optional[str] = None,
+    layout: Optional[ColumnLayout] = None
+) -> Tuple[str, List[Dict]]:
+    """
+    Transactions on pages [start, stop) read by column; runs inside a pool worker (or in-process)
+
+    Each page is read from below its header row, skipping the title and
+    account details above it. Each line is one pass over its words: a
+    word goes to its column span (see ColumnLayout), a line whose date
+    cell parses starts a transaction, and a dateless line with only
+    narration continues the open one's description. Anything else
+    (totals, footers) closes it. A page's last transaction is reopened on
+    the next page, whose first lines can carry the rest of its narration.
+
+    Returns the narration above the range's first row (the end of the
+    previous range's last transaction) and the transactions.
+    """
+    formats = LAYOUT_PROFILES[layout.bank].date_formats
+    transactions = []
+    lead = {"description": ""}
+    with open_pdf_stream(source) as stream, pdfplumber.open(stream, password=password) as pdf:
+        for page in pdf.pages[start:stop]:
+            current = transactions[-1] if transactions else lead
+            lines = group_lines(page.extract_words())
+            for line in lines[_table_start(lines, layout):]:
+                cells: Dict[str, List[str]] = {}
+                for word in line:
+                    field = layout.fields[_column(layout, word)]
+                    if field:
+                        cells.setdefault(field, []).append(word["text"])
+                cells = {field: " ".join(texts) for field, texts in cells.items()}
+
+                date = _parse_date(cells.get("date", ""), formats)
+                if date is not None:
+                    current = _row_transaction(cells, date)
+                    if current is not None:
+                        transactions.append(current)
+                elif current is not None and cells.keys() == {"description"}:
+                    current["description"] += " " + cells["description"]
+                else:
+                    current = None
+    return lead["description"].strip(), transactions
+
+
+def parse_statement_lines(text: str) -> List[Dict]:
+    """
+    Transactions from plain text lines, for statements without a known layout
+
+    Lines are `date description debit credit balance` (amounts or "-")
+    or `date description Dr|Cr amount`. Each line is split once and read
+    from both ends, so long narrations cost no backtracking.
+    """
+    transactions = []
+    for line in text.splitlines():
+        tokens = line.split()
+        if len(tokens) < 4 or not _LINE_DATE_RE.match(tokens[0]):
+            continue
+        date = _parse_date(tokens[0], _LINE_DATE_FORMATS)
+        if date is None:
+            continue
+        if tokens[-2] in ("Dr", "Cr") and _AMOUNT_RE.match(tokens[-1]):
+            amount = parse_amount(tokens[-1])
+            debit, credit = (amount, 0.0) if tokens[-2] == "Dr" else (0.0, amount)
+            description, balance = tokens[1:-2], None
+        elif len(tokens) >= 5 and all(_AMOUNT_RE.match(token) or token == "-" for token in tokens[-3:-1]) \
+                and _AMOUNT_RE.match(tokens[-1]):
+            debit, credit = parse_amount(tokens[-3]) or 0.0, parse_amount(tokens[-2]) or 0.0
+            description, balance = tokens[1:-3], parse_amount(tokens[-1])
+        else:
+            continue
+        transactions.append({
+            "date": date,
+            "description": " ".join(description),
+            "debit": debit,
+            "credit": credit,
+            "balance": balance,
+        })
+    return transactions
+
+
+def extract_statement_transactions(
+    pdf: Union[PdfSource, UnlockedPdf],
+    bank: Optional[str] = None,
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None
+) -> Dict:
+    """
+    A statement's transactions, by layout profile where one fits
+
+    The first page is read here to pick the profile and find the column
+    spans; the page ranges then go to the PDF worker pool with that
+    layout, and narration a range opens with is joined to the previous
+    range's last transaction. Without a profile (or its header row) the page text is
+    extracted as before and parsed line by line.
+
+    Returns:
+        bank (profile name or None), layout (whether columns were used),
+        first_page_text, and transactions (date, description, debit,
+        credit, balance) in statement order
+    """
+    pdf = pdf if isinstance(pdf, UnlockedPdf) else UnlockedPdf(pdf)
+    with open_pdf_stream(pdf.source) as stream, pdfplumber.open(stream, password=pdf.password) as document:
+        lines = group_lines(document.pages[0].extract_words()) if document.pages else []
+    first_page_text = "\n".join(" ".join(word["text"] for word in line) for line in lines)
+
+    profile = detect_profile(first_page_text, bank)
+    layout = detect_columns(lines, profile) if profile else None
+    if layout is None and profile is not None and bank:
+        # The sender's bank didn't match the document; go by its text
+        profile = detect_profile(first_page_text)
+        layout = detect_columns(lines, profile) if profile else None
+
+    if layout is not None:
+        futures = submit_pdf_pages(pdf, workers, pages_per_task, extract_layout_transactions, (layout,))
+        transactions = []
+        for future in futures:
+            lead, rows = future.result()
+            if lead and transactions:
+                transactions[-1]["description"] += " " + lead
+            transactions.extend(rows)
+    else:
+        transactions = parse_statement_lines("\n".join(extract_pdf_pages([pdf], workers, pages_per_task)[0]))
+    return {
+        "bank": profile.bank if profile else None,
+        "layout": layout is not None,
+        "first_page_text": first_page_text,
+        "transactions": transactions,
+    }
@@ -0,0 +1,356 @@
+# Email statement sync - fetches statement PDFs from mailboxes and imports their transactions
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+
+from app.models.bank_statement import BankStatement
+from app.models.email_sync_state import EmailSyncState
+from app.models.statement_password_pattern import StatementPasswordPattern
+from app.services.email_parser import EmailStatementParser
+from app.services.job_queue import JobProgress, job_handler
+from app.services.pdf_text import PdfSource, UnlockedPdf, pdf_sha256, pdf_size
+from app.services.statement_cache import cache_extraction, cached_extraction
+from app.services.transaction_ingest import TransactionIngestor
+
+
+@job_handler("fetch_statements")
+def sync_statements_from_email(db: Session, user_id: int, request: Dict, progress: JobProgress) -> Dict:
+    """
+    Fetch bank statement emails, unlock and parse their PDFs and import
+    the transactions
+
+    Syncs are incremental: only UIDs above each folder's checkpoint are
+    fetched, and attachments whose SHA-256 matches a statement the user
+    already has are skipped before any unlocking or parsing. The
+    checkpoint stops short of the oldest email with a PDF that failed,
+    so it is retried next time (its imported siblings are then skipped
+    by hash). PDFs are unlocked and parsed in the background while the
+    next emails are fetched, unless an earlier import of the same file
+    was cached (see statement_cache); the password pattern that opened
+    each bank's statements is remembered and tried first next time.
+
+    Args:
+        request: FetchStatementsRequest as a dict (credentials with
+            folders, PDF password hints, optional bank filter, full_resync)
+        progress: counters for emails scanned, PDFs unlocked and
+            transactions inserted
+
+    Returns:
+        Summary in the EmailSyncResponse shape
+    """
+    creds = request['email_credentials']
+    parser = EmailStatementParser(
+        email_address=creds['email'],
+        email_password=creds['app_password'],
+        imap_server=creds.get('imap_server')
+    )
+
+    summary = {
+        "total_emails_fetched": 0,
+        "statements_found": 0,
+        "statements_processed": 0,
+        "statements_skipped": 0,
+        "failed_pdfs": [],
+    }
+    ingestor = TransactionIngestor(db, user_id)
+    password_patterns = dict(db.execute(
+        select(StatementPasswordPattern.bank_name, StatementPasswordPattern.pattern)
+        .where(StatementPasswordPattern.user_id == user_id)
+    ).all())
+    # Folders are synced one after another on one pooled connection
+    with parser.pooled_connection():
+        for folder in creds.get('folders') or ["INBOX"]:
+            _sync_folder(db, user_id, parser, folder, request, summary, ingestor, progress, password_patterns)
+
+    return dict(
+        summary,
+        transactions_extracted=ingestor.inserted,
+        rows_per_second=ingestor.stats()['rows_per_second'],
+        message=f"✅ Processed {summary['statements_processed']} statements, extracted {ingestor.inserted} transactions!"
+    )
+
+
+def _sync_folder(
+    db: Session,
+    user_id: int,
+    parser: EmailStatementParser,
+    folder: str,
+    request: Dict,
+    summary: Dict,
+    ingestor: TransactionIngestor,
+    progress: JobProgress,
+    password_patterns: Dict[str, str]
+) -> None:
+    creds = request['email_credentials']
+    pdf_info = request.get('pdf_password_info') or {}
+    state = _sync_state(db, user_id, creds['email'], folder)
+    checkpoint = None if request.get('full_resync') else state
+    failed_uids: List[int] = []
+    # Statements being unlocked and parsed while the next emails are fetched
+    parsing = deque()
+    parsing_hashes = set()
+    window = max(settings.PDF_PARSE_WORKERS, 2)
+
+    def store_next() -> None:
+        email_data, attachment, size, content_hash, future = parsing.popleft()
+        parsing_hashes.discard(content_hash)
+        try:
+            result = future.result()
+            if result is None:
+                summary['failed_pdfs'].append(f"{attachment['filename']} (Password not matched)")
+                failed_uids.append(email_data['uid'])
+                return
+            # unlocked_pdf is None when the parse came from the cache
+            unlocked_pdf, parsed_data = result
+            progress.advance(pdfs_unlocked=1)
+            if unlocked_pdf is not None and parsed_data.get('extraction'):
+                cache_extraction(db, user_id, content_hash, parsed_data['extraction'])
+            _store_statement(db, user_id, folder, email_data, attachment['filename'], size, content_hash,
+                             parsed_data, ingestor, progress)
+            summary['statements_processed'] += 1
+            bank = email_data['bank']
+            if unlocked_pdf is not None and unlocked_pdf.pattern and password_patterns.get(bank) != unlocked_pdf.pattern:
+                _remember_pattern(db, user_id, bank, unlocked_pdf.pattern)
+                password_patterns[bank] = unlocked_pdf.pattern
+        except Exception as e:
+            db.rollback()
+            summary['failed_pdfs'].append(f"{attachment['filename']} ({str(e)})")
+            failed_uids.append(email_data['uid'])
+        finally:
+            _discard_spilled(attachment)
+
+    emails = parser.iter_bank_statement_emails(
+        days=creds.get('days', 60),
+        bank_name=request.get('bank_name'),
+        after_uid=checkpoint.last_uid if checkpoint else None,
+        uidvalidity=checkpoint.uidvalidity if checkpoint else None,
+        folder=folder
+    )
+    with ThreadPoolExecutor(max_workers=window, thread_name_prefix="statement-parse") as executor:
+        for email_data in emails:
+            progress.advance(emails_scanned=1)
+            if not email_data['attachments']:
+                continue
+            summary['total_emails_fetched'] += 1
+            bank = email_data['bank']
+
+            for attachment in email_data['attachments']:
+                summary['statements_found'] += 1
+                pdf_data = attachment['data']
+                content_hash = pdf_sha256(pdf_data)
+
+                if content_hash in parsing_hashes or db.scalar(select(BankStatement.id).where(
+                    BankStatement.user_id == user_id,
+                    BankStatement.content_hash == content_hash
+                )) is not None:
+                    summary['statements_skipped'] += 1
+                    _discard_spilled(attachment)
+                    continue
+
+                extraction = cached_extraction(db, user_id, content_hash)
+                if extraction is not None:
+                    # Parsed before: no unlocking or text extraction
+                    future = Future()
+                    future.set_result((None, parser.parse_statement_from_pdf(None, bank, extraction=extraction)))
+                else:
+                    # Unlock and parse the PDF (AES-256 password checks and its pages go to the PDF worker pool)
+                    future = executor.submit(_unlock_and_parse, parser, pdf_data, bank, pdf_info,
+                                             password_patterns.get(bank))
+                parsing.append((email_data, attachment, pdf_size(pdf_data), content_hash, future))
+                parsing_hashes.add(content_hash)
+                if len(parsing) >= window:
+                    store_next()
+
+        while parsing:
+            store_next()
+
+    # Advance the checkpoint (but not past an email that needs another try)
+    state.uidvalidity = parser.uidvalidity
+    state.last_uid = min(failed_uids) - 1 if failed_uids else (parser.highest_uid or 0)
+    db.commit()
+
+
+def _unlock_and_parse(
+    parser: EmailStatementParser,
+    pdf_data: PdfSource,
+    bank: str,
+    pdf_info: Dict,
+    preferred_pattern: Optional[str]
+) -> Optional[Tuple[UnlockedPdf, Dict]]:
+    """Find the PDF's password and parse it (None if no password matched); runs on the sync's parse threads"""
+    unlocked_pdf = parser.try_unlock_pdf(
+        pdf_data=pdf_data,
+        bank=bank,
+        user_dob=pdf_info.get('date_of_birth'),
+        user_mobile=pdf_info.get('mobile_number'),
+        user_account=pdf_info.get('account_number'),
+        user_pan=pdf_info.get('pan_card'),
+        custom_password=pdf_info.get('custom_password'),
+        preferred_pattern=preferred_pattern
+    )
+    if unlocked_pdf is None:
+        return None
+    return unlocked_pdf, parser.parse_statement_from_pdf(unlocked_pdf, bank=bank)
+
+
+def _remember_pattern(db: Session, user_id: int, bank: str, pattern: str) -> None:
+    """Record the password pattern that opened the user's latest statement from `bank`"""
+    row = db.scalar(select(StatementPasswordPattern).where(
+        StatementPasswordPattern.user_id == user_id,
+        StatementPasswordPattern.bank_name == bank
+    ))
+    if row is None:
+        db.add(StatementPasswordPattern(user_id=user_id, bank_name=bank, pattern=pattern))
+    else:
+        row.pattern = pattern
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another mailbox's sync recorded this bank first
+        db.rollback()
+
+
+def _store_statement(
+    db: Session,
+    user_id: int,
+    folder: str,
+    email_data: Dict,
+    filename: str,
+    pdf_size: int,
+    content_hash: str,
+    parsed_data: Dict,
+    ingestor: TransactionIngestor,
+    progress: JobProgress
+) -> None:
+    """Save a parsed statement and import its transactions"""
+    bank = email_data['bank']
+
+    # Save bank statement record
+    statement = BankStatement(
+        user_id=user_id,
+        filename=filename,
+        file_path=f"email_import/{folder}/{email_data['email_id']}",
+        file_size=pdf_size,
+        content_hash=content_hash,
+        bank_name=bank,
+        is_processed=True,
+        processing_status="completed",
+        total_transactions=parsed_data['total_transactions']
+    )
+    db.add(statement)
+    db.flush()
+
+    # Save transactions in bulk-inserted, committed batches
+    rows = []
+    for trans in parsed_data['transactions']:
+        # Determine transaction type
+        debit_amt = float(trans['debit']) if trans['debit'] != "0.00" else 0
+        credit_amt = float(trans['credit']) if trans['credit'] != "0.00" else 0
+
+        rows.append({
+            'amount': debit_amt if debit_amt > 0 else credit_amt,
+            'transaction_type': "debit" if debit_amt > 0 else "credit",
+            'description': trans['description'],
+            'merchant_name': trans['description'][:50],  # First 50 chars
+            'transaction_date': datetime.strptime(trans['date'], "%d/%m/%Y") if "/" in trans['date'] else datetime.now(),
+            'bank_name': bank,
+            'category': "uncategorized"
+        })
+    inserted_before = ingestor.inserted
+    ingestor.ingest(rows)
+    db.commit()
+    progress.advance(transactions_inserted=ingestor.inserted - inserted_before)
+
+
+@job_handler("fetch_statements_multi")
+def sync_statements_from_mailboxes(db: Session, user_id: int, request: Dict, progress: JobProgress) -> Dict:
+    """
+    Sync several mailboxes concurrently and add up their summaries
+
+    Args:
+        request: FetchMultipleStatementsRequest as a dict (`mailboxes` is
+            a list of email credentials; the other fields are shared)
+
+    Returns:
+        Totals in the EmailSyncResponse shape, with per-mailbox results
+        (or errors) under `mailboxes`
+    """
+    results = sync_mailboxes(user_id, request, progress)
+
+    totals = {
+        "total_emails_fetched": 0,
+        "statements_found": 0,
+        "statements_processed": 0,
+        "statements_skipped": 0,
+        "transactions_extracted": 0,
+        "failed_pdfs": [],
+    }
+    mailboxes = []
+    for creds, result in zip(request['mailboxes'], results):
+        if isinstance(result, Exception):
+            mailboxes.append({"email": creds['email'], "error": str(result)})
+            continue
+        mailboxes.append({"email": creds['email'], **result})
+        for key, value in totals.items():
+            totals[key] = value + result[key]
+
+    failed = sum('error' in mailbox for mailbox in mailboxes)
+    return dict(
+        totals,
+        mailboxes=mailboxes,
+        message=f"✅ Synced {len(mailboxes) - failed} of {len(mailboxes)} mailboxes, "
+                f"extracted {totals['transactions_extracted']} transactions!"
+    )
+
+
+def sync_mailboxes(user_id: int, request: Dict, progress: JobProgress) -> List:
+    """
+    Run one statement sync per mailbox, EMAIL_SYNC_CONCURRENCY at a time
+
+    imaplib is blocking, so each sync runs on a worker thread with its
+    own DB session; the shared IMAP pool caps connections per server.
+    A failed mailbox's exception is returned in place of its summary.
+    """
+    with ThreadPoolExecutor(max_workers=settings.EMAIL_SYNC_CONCURRENCY, thread_name_prefix="mailbox") as executor:
+        futures = [
+            executor.submit(_sync_mailbox, user_id, dict(request, email_credentials=creds), progress)
+            for creds in request['mailboxes']
+        ]
+    return [future.exception() or future.result() for future in futures]
+
+
+def _sync_mailbox(user_id: int, request: Dict, progress: JobProgress) -> Dict:
+    with SessionLocal() as db:
+        return sync_statements_from_email(db, user_id, request, progress)
+
+
+def _discard_spilled(attachment: Dict) -> None:
+    """Delete an attachment that was spilled to a temporary file"""
+    if attachment.get('spilled'):
+        with suppress(OSError):
+            os.remove(attachment['data'])
+
+
+def _sync_state(db: Session, user_id: int, email_address: str, mailbox: str = "INBOX") -> EmailSyncState:
+    """The mailbox's checkpoint row, created on first sync"""
+    state = db.scalar(select(EmailSyncState).where(
+        EmailSyncState.user_id == user_id,
+        EmailSyncState.email_address == email_address.lower(),
+        EmailSyncState.mailbox == mailbox
+    ))
+    if state is None:
+        state = EmailSyncState(user_id=user_id, email_address=email_address.lower(), mailbox=mailbox, last_uid=0)
+        db.add(state)
+        # Committed now so a rolled-back statement later on can't discard it
+        db.commit()
+    return state
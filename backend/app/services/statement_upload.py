@@ -0,0 +1,228 @@
+# Bank statement uploads - chunks are appended under UPLOAD_DIR and statements parsed by a background job
+import glob
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.bank_statement import BankStatement
+from app.models.job import Job
+from app.services.job_queue import JobProgress, job_handler, recovery_handler
+from app.services.pdf_parser_enhanced import BankStatementParser
+from app.services.pdf_text import UnlockedPdf, pdf_sha256
+from app.services.pdf_unlock import check_password, read_security
+from app.services.statement_cache import cache_extraction, cached_extraction
+from app.services.statement_layouts import extract_statement_transactions
+from app.services.transaction_ingest import TransactionIngestor
+
+# Upload ids are generated here (uuid4 hex), never taken from a file name
+UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class DuplicateStatement(Exception):
+    """The user already has a statement with the same file contents"""
+
+    def __init__(self, statement_id: int):
+        super().__init__(f"Statement already imported (statement {statement_id})")
+        self.statement_id = statement_id
+
+
+def new_upload_id() -> str:
+    return uuid.uuid4().hex
+
+
+def partial_upload_path(user_id: int, upload_id: str) -> str:
+    """Where an upload's bytes accumulate until the last chunk arrives"""
+    return os.path.join(settings.UPLOAD_DIR, str(user_id), f"{upload_id}.part")
+
+
+def statement_file_path(user_id: int, upload_id: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, str(user_id), f"{upload_id}.pdf")
+
+
+def upload_offset(user_id: int, upload_id: str) -> Optional[int]:
+    """Bytes received so far (the offset to resume from), or None for an unknown upload"""
+    try:
+        return os.path.getsize(partial_upload_path(user_id, upload_id))
+    except OSError:
+        return None
+
+
+def complete_upload(db: Session, user_id: int, upload_id: str, filename: str) -> BankStatement:
+    """
+    Move a fully received upload into place and record its statement as processing
+
+    Raises DuplicateStatement (and drops the file) if the user already
+    has a statement with the same SHA-256: one unique-index lookup.
+    Failed imports give up their hash, so those files can be retried.
+    """
+    path = statement_file_path(user_id, upload_id)
+    os.replace(partial_upload_path(user_id, upload_id), path)
+    content_hash = pdf_sha256(path)
+    existing = db.scalar(select(BankStatement.id).where(
+        BankStatement.user_id == user_id,
+        BankStatement.content_hash == content_hash
+    ))
+    if existing is not None:
+        os.remove(path)
+        raise DuplicateStatement(existing)
+
+    statement = BankStatement(
+        user_id=user_id,
+        filename=filename,
+        file_path=path,
+        file_size=os.path.getsize(path),
+        content_hash=content_hash,
+        processing_status="processing"
+    )
+    db.add(statement)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The same file finished importing (e.g. by email sync) since the lookup
+        db.rollback()
+        os.remove(path)
+        raise DuplicateStatement(db.scalar(select(BankStatement.id).where(
+            BankStatement.user_id == user_id,
+            BankStatement.content_hash == content_hash
+        )))
+    db.refresh(statement)
+    return statement
+
+
+@job_handler("process_statement_upload")
+def process_uploaded_statement(db: Session, user_id: int, payload: Dict, progress: JobProgress) -> Dict:
+    """
+    Unlock and parse an uploaded statement and import its transactions
+
+    The statement row ends up `completed` with its bank details and
+    transaction count, or `failed` with the error (the job fails too)
+    and its content hash cleared, so the file can be uploaded again.
+    Transactions, rollup deltas and budget totals are committed together
+    with the `completed` status, so a failed import leaves none behind
+    for the retry to count twice.
+
+    Args:
+        payload: statement_id and the PDF password, if any
+        progress: counters for PDFs unlocked and transactions inserted
+    """
+    statement = db.get(BankStatement, payload['statement_id'])
+    try:
+        return _import_statement(db, user_id, statement, payload.get('password'), progress)
+    except Exception as e:
+        db.rollback()
+        statement.processing_status = "failed"
+        statement.content_hash = None
+        statement.error_message = str(e)
+        statement.processed_at = datetime.utcnow()
+        db.commit()
+        raise
+
+
+def _import_statement(
+    db: Session,
+    user_id: int,
+    statement: BankStatement,
+    password: Optional[str],
+    progress: JobProgress
+) -> Dict:
+    source = statement.file_path
+    security = read_security(source)
+    statement.is_encrypted = security is not None
+    # A file this user imported before (e.g. by email sync) is neither decrypted nor extracted again
+    extraction = cached_extraction(db, user_id, statement.content_hash)
+    if extraction is None:
+        if security is not None and not check_password(security, password or ""):
+            raise ValueError("Incorrect PDF password" if password else "PDF is password-protected")
+        extraction = extract_statement_transactions(UnlockedPdf(source, password if security else None))
+        cache_extraction(db, user_id, statement.content_hash, extraction)
+    progress.advance(pdfs_unlocked=1)
+
+    parsed = BankStatementParser().parse_statement(source, extraction=extraction)
+    statement.bank_name = parsed['bank_name']
+    statement.account_number = parsed['account_number']
+    statement.statement_period_start = parsed['statement_period']['start']
+    statement.statement_period_end = parsed['statement_period']['end']
+
+    ingestor = TransactionIngestor(db, user_id, commit=False)
+    ingestor.ingest(
+        {
+            'amount': trans['debit'] or trans['credit'],
+            'transaction_type': "debit" if trans['debit'] else "credit",
+            'description': trans['description'],
+            'merchant_name': trans['description'][:50],  # First 50 chars
+            'transaction_date': trans['date'],
+            'bank_name': parsed['bank_name'],
+            'account_last4': (parsed['account_number'] or "")[-4:] or None,
+            'category': "uncategorized"
+        }
+        for trans in parsed['transactions']
+    )
+    progress.advance(transactions_inserted=ingestor.inserted)
+
+    statement.total_transactions = len(parsed['transactions'])
+    statement.is_processed = True
+    statement.processing_status = "completed"
+    statement.processed_at = datetime.utcnow()
+    db.commit()
+    return {
+        "statement_id": statement.id,
+        "bank_name": statement.bank_name,
+        "total_transactions": statement.total_transactions,
+        "transactions_inserted": ingestor.inserted,
+        "message": f"✅ Imported {ingestor.inserted} transactions from {statement.filename}!"
+    }
+
+
+@recovery_handler
+def fail_interrupted_statements(db: Session) -> int:
+    """
+    Mark statements whose import job was abandoned as failed (upload them again)
+
+    Runs once recover_interrupted_jobs() has failed the abandoned jobs. A
+    statement not yet linked to its job (the process stopped right after
+    the upload) counts once it is JOB_STALE_SECONDS old.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    count = db.execute(
+        update(BankStatement)
+        .where(
+            BankStatement.processing_status == "processing",
+            or_(
+                BankStatement.job_id.in_(select(Job.id).where(Job.status == "failed")),
+                and_(BankStatement.job_id.is_(None), BankStatement.uploaded_at < stale_before)
+            )
+        )
+        .values(processing_status="failed", content_hash=None, error_message="Interrupted: its import job stopped",
+                processed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return count
+
+
+@recovery_handler
+def remove_abandoned_uploads(db: Session) -> int:
+    """
+    Delete partial uploads nobody has added to for UPLOAD_PART_TTL_SECONDS
+
+    Runs at startup and with every heartbeat; a client resuming after
+    that starts over (its upload_id is no longer found).
+    """
+    stale_before = time.time() - settings.UPLOAD_PART_TTL_SECONDS
+    count = 0
+    for path in glob.glob(os.path.join(settings.UPLOAD_DIR, "*", "*.part")):
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                count += 1
+        except OSError:
+            pass  # finished or removed by another worker meanwhile
+    return count
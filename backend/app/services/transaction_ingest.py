@@ -0,0 +1,139 @@
+# Transaction ingestion service - bulk inserts parsed transactions batch by batch
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+from app.services.budget_alerts import evaluate_budget_alerts
+from app.services.spending_rollup import apply_transactions
+
+# Columns written for every row, so one executemany covers the whole batch
+INGEST_COLUMNS = (
+    "user_id", "amount", "transaction_type", "category", "merchant_name", "description",
+    "transaction_date", "created_at", "from_sms", "sms_sender", "raw_sms_text", "fingerprint",
+    "bank_name", "account_last4", "is_recurring", "category_confidence",
+)
+
+
+def _insert_statement(db: Session):
+    """Bulk INSERT that skips fingerprints the user already has and returns the ones written"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    return (
+        dialect_insert(Transaction)
+        .on_conflict_do_nothing(index_elements=["user_id", "fingerprint"])
+        .returning(Transaction.fingerprint)
+    )
+
+
+def transaction_row(user_id: int, data: Dict, now: datetime) -> Dict:
+    """Column mapping for one parsed transaction (SMS or statement format)"""
+    return {
+        "user_id": user_id,
+        "amount": data["amount"],
+        "transaction_type": data.get("transaction_type", "debit"),
+        "category": data.get("category") or "uncategorized",
+        "merchant_name": data.get("merchant_name", "Unknown"),
+        "description": data.get("description", ""),
+        "transaction_date": data.get("transaction_date") or now,
+        "created_at": now,
+        "from_sms": data.get("from_sms", False),
+        "sms_sender": data.get("sms_sender"),
+        "raw_sms_text": data.get("raw_sms_text"),
+        "fingerprint": data.get("fingerprint"),
+        "bank_name": data.get("bank_name"),
+        "account_last4": data.get("account_last4"),
+        "is_recurring": False,
+        "category_confidence": 0.0,
+    }
+
+
+def iter_chunks(rows: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class TransactionIngestor:
+    """
+    Bulk writer shared by the statement and SMS import paths
+
+    Parsed transaction dicts are written with one executemany INSERT per
+    batch instead of an ORM object per row. Each batch updates the
+    spending rollup and budget alerts from the same mappings and is
+    committed on its own, so a failure only loses the batch in flight.
+    With `commit=False` batches are only flushed and the caller commits
+    (or rolls back) the whole import at once. Rows whose fingerprint the
+    user already has are skipped by the unique index (ON CONFLICT DO
+    NOTHING).
+    """
+
+    def __init__(self, db: Session, user_id: int, batch_size: Optional[int] = None, commit: bool = True):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.commit = commit
+        self.inserted = 0
+        self.skipped = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def ingest(self, transactions: Iterable[Dict]) -> Dict:
+        """Write an iterable of parsed transactions in batches and return stats()"""
+        for batch in iter_chunks(transactions, self.batch_size):
+            self.write_batch(batch)
+        return self.stats()
+
+    def write_batch(self, batch: List[Dict]) -> int:
+        """
+        Insert, roll up and commit (or flush) one batch
+
+        Returns:
+            Number of rows inserted
+        """
+        start = time.perf_counter()
+        now = datetime.utcnow()
+
+        rows = []
+        seen = set()
+        for data in batch:
+            row = transaction_row(self.user_id, data, now)
+            fingerprint = row["fingerprint"]
+            if fingerprint is not None:
+                if fingerprint in seen:
+                    continue
+                seen.add(fingerprint)
+            rows.append(row)
+
+        if rows:
+            written = set(self.db.scalars(_insert_statement(self.db), rows))
+            # NULL fingerprints never conflict, so those rows are always written
+            rows = [row for row in rows if row["fingerprint"] is None or row["fingerprint"] in written]
+            apply_transactions(self.db, rows)
+            evaluate_budget_alerts(self.db, self.user_id, rows, now=now)
+        if self.commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+
+        self.inserted += len(rows)
+        self.skipped += len(batch) - len(rows)
+        self.batches += 1
+        self.seconds += time.perf_counter() - start
+        return len(rows)
+
+    def stats(self) -> Dict:
+        return {
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.inserted / self.seconds, 1) if self.seconds else 0.0,
+        }
@@ -0,0 +1,69 @@
+# Shared helpers for backend benchmarks
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Benchmarks run against a throwaway SQLite file unless DATABASE_URL is set
+BENCH_DB_PATH = os.path.join(tempfile.gettempdir(), "pennywise_bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DB_PATH}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.transaction import Transaction  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+CATEGORIES = ["food", "transport", "shopping", "bills", "entertainment", "healthcare", "education", "groceries", "uncategorized"]
+MERCHANTS = ["SWIGGY", "ZOMATO", "UBER", "OLA", "AMAZON", "FLIPKART", "NETFLIX", "DMART", "APOLLO PHARMACY", "IRCTC"]
+
+
+def reset_database():
+    """Drop and recreate every table"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def seed_transactions(rows: int, user_id: int = 1, days: int = 180, seed: int = 42) -> int:
+    """Create a user and insert `rows` random transactions spread over `days`"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        db.add(User(id=user_id, email=f"bench{user_id}@example.com", hashed_password="x"))
+        db.commit()
+        batch = []
+        for _ in range(rows):
+            created = now - timedelta(seconds=rng.randint(0, days * 86400))
+            batch.append({
+                "user_id": user_id,
+                "amount": round(rng.uniform(10, 5000), 2),
+                "transaction_type": "credit" if rng.random() < 0.15 else "debit",
+                "category": rng.choice(CATEGORIES),
+                "merchant_name": rng.choice(MERCHANTS),
+                "transaction_date": created,
+                "created_at": created,
+                "from_sms": True,
+            })
+            if len(batch) >= 5000:
+                db.execute(insert(Transaction), batch)
+                batch = []
+        if batch:
+            db.execute(insert(Transaction), batch)
+        db.commit()
+    finally:
+        db.close()
+    return user_id
+
+
+def timed(fn, repeat: int = 3) -> float:
+    """Best wall-clock time of `repeat` runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
@@ -0,0 +1,71 @@
+"""
+Benchmark /analytics/summary: Python aggregation over hydrated rows vs
+grouped SQL aggregation.
+
+Usage (from backend/):
+    python benchmarks/bench_analytics_summary.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import math
+from datetime import datetime, timedelta
+
+from _common import SessionLocal, Transaction, reset_database, seed_transactions, timed
+from sqlalchemy import and_
+from app.services.spending_aggregates import summarize_period
+
+
+def legacy_summary(db, user_id: int, start_date: datetime, now: datetime) -> dict:
+    """The previous endpoint body: load every row, aggregate in Python"""
+    transactions = db.query(Transaction).filter(
+        and_(Transaction.user_id == user_id, Transaction.created_at >= start_date)
+    ).all()
+    total_income = sum(t.amount for t in transactions if t.transaction_type == "credit")
+    total_expenses = sum(t.amount for t in transactions if t.transaction_type == "debit")
+    category_spending = {}
+    for t in transactions:
+        if t.transaction_type == "debit":
+            cat = t.category or "uncategorized"
+            data = category_spending.setdefault(cat, {"total": 0, "count": 0})
+            data["total"] += t.amount
+            data["count"] += 1
+    top = sorted(category_spending.items(), key=lambda x: x[1]["total"], reverse=True)[:5]
+    trends = []
+    for i in range(6):
+        month_start = now - timedelta(days=30 * (5 - i))
+        month_end = month_start + timedelta(days=30)
+        month = [t for t in transactions if month_start <= t.created_at < month_end]
+        trends.append((
+            sum(t.amount for t in month if t.transaction_type == "credit"),
+            sum(t.amount for t in month if t.transaction_type == "debit"),
+        ))
+    return {"total_income": total_income, "total_expenses": total_expenses, "top": top, "trends": trends}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'legacy ms':>10} {'sql ms':>8} {'speedup':>8}")
+    for size in args.sizes:
+        reset_database()
+        user_id = seed_transactions(size)
+        now = datetime.now()
+        start_date = now - timedelta(days=args.days)
+        db = SessionLocal()
+        try:
+            legacy = legacy_summary(db, user_id, start_date, now)
+            pushed = summarize_period(db, user_id, start_date, now=now)
+            assert math.isclose(legacy["total_expenses"], pushed["total_expenses"], rel_tol=1e-9)
+            assert [cat for cat, _ in legacy["top"]] == [c["category"] for c in pushed["top_categories"]]
+
+            legacy_ms = timed(lambda: (legacy_summary(db, user_id, start_date, now), db.expunge_all()))
+            pushed_ms = timed(lambda: summarize_period(db, user_id, start_date, now=now))
+        finally:
+            db.close()
+        print(f"{size:>8} {legacy_ms:>10.1f} {pushed_ms:>8.1f} {legacy_ms / pushed_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Load test for the read-heavy API endpoints: fires concurrent requests and
+reports throughput and latency percentiles.
+
+Runs in-process against the ASGI app by default; pass --base-url to hit a
+running server instead (e.g. uvicorn with several workers).
+
+Usage (from backend/):
+    python benchmarks/bench_concurrent_requests.py [--requests 400] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from _common import SessionLocal, reset_database, seed_transactions
+import httpx
+from app.core.security import create_access_token
+from app.models.budget import Budget
+
+ENDPOINTS = [
+    "/api/v1/analytics/summary?days=30",
+    "/api/v1/analytics/daily-spending?days=30",
+    "/api/v1/analytics/top-merchants?days=30",
+    "/api/v1/budgets/",
+    "/api/v1/auth/me",
+]
+
+
+def seed(rows: int) -> str:
+    """Seed one user with transactions and a budget; return a bearer token"""
+    reset_database()
+    user_id = seed_transactions(rows)
+    db = SessionLocal()
+    try:
+        db.add(Budget(user_id=user_id, category="overall", amount=50000, period="monthly",
+                      start_date=datetime.now() - timedelta(days=45)))
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": f"bench{user_id}@example.com"})
+
+
+async def run_load(client: httpx.AsyncClient, token: str, total: int, concurrency: int):
+    """Issue `total` requests round-robin over ENDPOINTS with bounded concurrency"""
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(ENDPOINTS[i % len(ENDPOINTS)], headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies, failures
+
+
+async def main_async(args):
+    token = seed(args.rows)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    async with client:
+        await run_load(client, token, len(ENDPOINTS), 1)  # warm up
+        elapsed, latencies, failures = await run_load(client, token, args.requests, args.concurrency)
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.rows} transactions")
+    print(f"{args.requests / elapsed:8.1f} req/s   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms   failures {failures}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--base-url", default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark statement email fetching against the in-process fake IMAP
+server: per-keyword SEARCH + full RFC822 fetches vs one OR search with
+header/BODYSTRUCTURE first and only PDF parts downloaded.
+
+Usage (from backend/):
+    python benchmarks/bench_imap_fetch.py [--statements 20] [--other 80]
+"""
+import argparse
+import email
+import imaplib
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import _common  # noqa: F401  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_imap import FakeIMAPServer, make_message  # noqa: E402
+from app.services.email_parser import EmailStatementParser, STATEMENT_KEYWORDS  # noqa: E402
+
+
+class LegacyEmailStatementParser(EmailStatementParser):
+    """The previous implementation: one SEARCH per keyword, RFC822 for every hit"""
+
+    def iter_bank_statement_emails(self, days=60, bank_name=None, limit=50):
+        mail = self.connect_to_email()
+        mail.select("inbox")
+        since_date = (datetime.now() - timedelta(days=days)).strftime("%d-%b-%Y")
+        try:
+            for keyword in STATEMENT_KEYWORDS:
+                status, messages = mail.search(None, f'(SINCE {since_date} SUBJECT "{keyword}")')
+                for email_id in messages[0].split()[-10:]:
+                    status, msg_data = mail.fetch(email_id, "(RFC822)")
+                    email_message = email.message_from_bytes(msg_data[0][1])
+                    subject = self._decode_subject(email_message["Subject"])
+                    yield {
+                        "email_id": email_id.decode(),
+                        "subject": subject,
+                        "bank": self._detect_bank_from_email(email_message.get("From"), subject),
+                        "attachments": self._extract_pdf_attachments(email_message),
+                    }
+        finally:
+            mail.close()
+            mail.logout()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--statements", type=int, default=20, help="statement emails with a PDF")
+    parser.add_argument("--other", type=int, default=80, help="statement-like emails without a PDF")
+    args = parser.parse_args()
+
+    with FakeIMAPServer() as server:
+        # Interleaved, as in a real inbox
+        kinds = ["statement"] * args.statements + ["other"] * args.other
+        random.Random(3).shuffle(kinds)
+        for i, kind in enumerate(kinds):
+            if kind == "statement":
+                server.add_message(make_message(f"HDFC Bank Statement for month {i}", pdf=os.urandom(150_000)))
+            else:
+                server.add_message(make_message(f"Your credit card e-statement offer {i}", body="promo " * 8000,
+                                                extra_attachment=os.urandom(100_000)))
+        imaplib.IMAP4_SSL = lambda host, *a, **kw: imaplib.IMAP4(server.host, server.port)
+
+        print(f"{args.statements} statement emails, {args.other} other matching emails")
+        for name, cls in (("legacy", LegacyEmailStatementParser), ("header-first", EmailStatementParser)):
+            server.reset_stats()
+            start = time.perf_counter()
+            emails = list(cls("me@gmail.com", "app-password").iter_bank_statement_emails(days=30))
+            elapsed = time.perf_counter() - start
+            pdfs = sum(len(e["attachments"]) for e in emails)
+            unique = len({e["email_id"] for e in emails})
+            print(f"{name:12}  {len(emails):4} emails ({unique} unique)  {pdfs:3} PDFs  {server.bytes_sent / 1e6:6.2f} MB sent  "
+                  f"{server.bytes_sent / max(pdfs, 1) / 1e6:5.2f} MB/PDF  {len(server.commands):4} commands  {elapsed * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark syncing several mailboxes (two folders each) against the
+in-process fake IMAP server with simulated network latency: one mailbox
+at a time with a fresh login per folder, one at a time on pooled
+connections, and in parallel on pooled connections.
+
+Usage (from backend/):
+    python benchmarks/bench_imap_mailboxes.py [--mailboxes 8] [--statements 5] [--latency 0.02]
+"""
+import argparse
+import imaplib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _common  # noqa: F401  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_imap import FakeIMAPServer, make_message  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.email_parser import EmailStatementParser  # noqa: E402
+from app.services.imap_pool import IMAPConnectionPool  # noqa: E402
+
+FOLDERS = ("INBOX", "Statements")
+
+
+def sync_mailbox(address: str, pool: IMAPConnectionPool) -> int:
+    parser = EmailStatementParser(address, "app-password", pool=pool)
+    pdfs = 0
+    with parser.pooled_connection():
+        for folder in FOLDERS:
+            pdfs += sum(len(e["attachments"]) for e in parser.iter_bank_statement_emails(days=30, folder=folder))
+    return pdfs
+
+
+def sync_mailbox_per_folder(address: str, pool: IMAPConnectionPool) -> int:
+    # Each folder borrows on its own; with idle_timeout=0 that is a new login every time
+    parser = EmailStatementParser(address, "app-password", pool=pool)
+    return sum(
+        len(e["attachments"]) for folder in FOLDERS for e in parser.iter_bank_statement_emails(days=30, folder=folder)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mailboxes", type=int, default=8)
+    parser.add_argument("--statements", type=int, default=5, help="statement emails per mailbox")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every IMAP reply")
+    args = parser.parse_args()
+
+    addresses = [f"user{i}@gmail.com" for i in range(args.mailboxes)]
+    with FakeIMAPServer(latency=args.latency) as server:
+        for address in addresses:
+            for month in range(args.statements):
+                server.add_message(make_message(f"HDFC Bank Statement {month}", pdf=os.urandom(50_000)), account=address)
+        imaplib.IMAP4_SSL = lambda host, *a, **kw: imaplib.IMAP4(server.host, server.port)
+
+        print(f"{args.mailboxes} mailboxes x {len(FOLDERS)} folders, {args.statements} statements each, "
+              f"{args.latency * 1000:.0f} ms latency, {settings.IMAP_MAX_CONNECTIONS_PER_SERVER} connections/server")
+        runs = (
+            ("sequential, login per folder", sync_mailbox_per_folder, IMAPConnectionPool(idle_timeout=0), 1),
+            ("sequential, pooled", sync_mailbox, IMAPConnectionPool(), 1),
+            ("parallel, pooled", sync_mailbox, IMAPConnectionPool(), settings.EMAIL_SYNC_CONCURRENCY),
+        )
+        for name, sync, pool, workers in runs:
+            server.reset_stats()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pdfs = sum(executor.map(lambda address: sync(address, pool), addresses))
+            elapsed = time.perf_counter() - start
+            print(f"{name:30}  {pdfs:4} PDFs  {server.logins:3} logins  {server.max_open_connections:2} max open  "
+                  f"{elapsed * 1000:6.0f} ms  {args.mailboxes / elapsed:6.1f} mailboxes/s")
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
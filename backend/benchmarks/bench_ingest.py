@@ -0,0 +1,86 @@
+"""
+Benchmark transaction ingestion: one ORM object per row with a single
+commit vs TransactionIngestor's batched executemany inserts.
+
+Usage (from backend/):
+    python benchmarks/bench_ingest.py [--rows 10000 100000] [--batch-size 1000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from _common import CATEGORIES, MERCHANTS, SessionLocal, Transaction, User, reset_database
+from app.services.budget_alerts import evaluate_budget_alerts
+from app.services.spending_rollup import apply_transactions
+from app.services.transaction_ingest import TransactionIngestor
+
+
+def make_rows(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [
+        {
+            "amount": round(rng.uniform(10, 5000), 2),
+            "transaction_type": "credit" if rng.random() < 0.15 else "debit",
+            "category": rng.choice(CATEGORIES),
+            "merchant_name": rng.choice(MERCHANTS),
+            "description": "bench import",
+            "transaction_date": now - timedelta(seconds=rng.randint(0, 180 * 86400)),
+            "from_sms": True,
+            "fingerprint": f"{i:064x}",
+        }
+        for i in range(count)
+    ]
+
+
+def fresh_session():
+    reset_database()
+    db = SessionLocal()
+    db.add(User(id=1, email="ingest@example.com", hashed_password="x"))
+    db.commit()
+    return db
+
+
+def orm_add(rows):
+    """The previous import path: db.add per row, one flush and commit at the end"""
+    db = fresh_session()
+    try:
+        start = time.perf_counter()
+        objects = [Transaction(user_id=1, **row) for row in rows]
+        db.add_all(objects)
+        db.flush()
+        apply_transactions(db, objects)
+        evaluate_budget_alerts(db, 1, objects)
+        db.commit()
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def bulk_insert(rows, batch_size):
+    db = fresh_session()
+    try:
+        start = time.perf_counter()
+        TransactionIngestor(db, 1, batch_size=batch_size).ingest(rows)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    for count in args.rows:
+        rows = make_rows(count)
+        orm = orm_add(rows)
+        bulk = bulk_insert(rows, args.batch_size)
+        print(f"{count:7} rows   ORM add {count / orm:9.0f} rows/s   "
+              f"bulk insert {count / bulk:9.0f} rows/s   ({orm / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
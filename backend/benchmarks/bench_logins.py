@@ -0,0 +1,87 @@
+"""
+Benchmark /auth/login throughput with bcrypt running on the password
+executor, and check the event loop stays responsive during a login storm.
+
+Usage (from backend/):
+    python benchmarks/bench_logins.py [--logins 200] [--concurrency 32] [--rounds 12] [--workers 4]
+"""
+import argparse
+import os
+import sys
+
+# The cost factor and pool size are read at import time
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--logins", type=int, default=200)
+parser.add_argument("--concurrency", type=int, default=32)
+parser.add_argument("--rounds", type=int, default=12)
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+ARGS = parser.parse_args()
+os.environ["BCRYPT_ROUNDS"] = str(ARGS.rounds)
+os.environ["PASSWORD_HASH_WORKERS"] = str(ARGS.workers)
+os.environ["PASSWORD_HASH_MAX_PENDING"] = str(max(ARGS.concurrency, 1))
+
+import asyncio  # noqa: E402
+import time  # noqa: E402
+
+from _common import SessionLocal, User, reset_database  # noqa: E402
+import httpx  # noqa: E402
+from app.core.security import hash_password  # noqa: E402
+
+USERS = 16
+PASSWORD = "correct horse battery staple"
+
+
+def seed():
+    reset_database()
+    hashed = hash_password(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=i, email=f"login{i}@example.com", hashed_password=hashed) for i in range(1, USERS + 1)])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def main_async():
+    from app.main import app
+    seed()
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(ARGS.concurrency)
+    failures = 0
+    stalls = []
+
+    async def login(client, i):
+        nonlocal failures
+        async with semaphore:
+            response = await client.post(
+                "/api/v1/auth/login",
+                data={"username": f"login{i % USERS + 1}@example.com", "password": PASSWORD}
+            )
+            if response.status_code != 200:
+                failures += 1
+
+    async def heartbeat(done):
+        # Worst delay of a 10ms timer shows how long the loop was blocked
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append(time.perf_counter() - start - 0.01)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        done = asyncio.Event()
+        beat = asyncio.create_task(heartbeat(done))
+        start = time.perf_counter()
+        await asyncio.gather(*(login(client, i) for i in range(ARGS.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await beat
+
+    rate = ARGS.logins / elapsed
+    cores = min(ARGS.workers, os.cpu_count() or 1)
+    print(f"{ARGS.logins} logins, bcrypt cost {ARGS.rounds}, {ARGS.workers} hash workers, concurrency {ARGS.concurrency}")
+    print(f"{rate:8.1f} logins/s   {rate / cores:6.1f} logins/s/core   "
+          f"max loop stall {max(stalls, default=0) * 1000:6.1f} ms   failures {failures}")
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main_async()))
@@ -0,0 +1,120 @@
+"""
+Benchmark peak memory of unlocking and parsing a large password-protected
+statement (20 MB by default): the old path (bytes in memory, every page
+rewritten through PdfWriter, the result parsed from a BytesIO) vs the
+password handed to the extractor, from bytes and from a memory-mapped
+file on disk.
+
+Each variant runs in a fresh process and reports its peak RSS above the
+RSS after imports. Text extraction runs in-process (one worker) so the
+measurement covers it.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_memory.py [--size-mb 20]
+"""
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+os.environ["PDF_PARSE_WORKERS"] = "1"
+
+import pdfplumber  # noqa: E402
+import PyPDF2  # noqa: E402
+
+import _common  # noqa: F401,E402  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_pdf import encrypt_pdf, make_statement_pdf  # noqa: E402
+from app.services.email_parser import EmailStatementParser  # noqa: E402
+
+PASSWORD = "15041990"
+
+
+def legacy(path: str) -> int:
+    """The previous implementation"""
+    with open(path, "rb") as file:
+        pdf_data = file.read()
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    reader.decrypt(PASSWORD)
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    stream = BytesIO()
+    writer.write(stream)
+    stream.seek(0)
+    unlocked = stream.read()
+    full_text = ""
+    with pdfplumber.open(BytesIO(unlocked)) as pdf:
+        for page in pdf.pages:
+            full_text += page.extract_text() + "\n"
+    return len(re.findall(r"^\d{2}/\d{2}/\d{4} ", full_text, re.MULTILINE))
+
+
+def in_memory(path: str) -> int:
+    with open(path, "rb") as file:
+        pdf_data = file.read()
+    return parse(pdf_data)
+
+
+def mapped(path: str) -> int:
+    return parse(path)
+
+
+def parse(source) -> int:
+    parser = EmailStatementParser("me@gmail.com", "app-password")
+    unlocked = parser.try_unlock_pdf(source, "HDFC", user_dob=PASSWORD)
+    return parser.parse_statement_from_pdf(unlocked)["total_transactions"]
+
+
+VARIANTS = {"rewrite (old)": legacy, "password, bytes": in_memory, "password, mmap": mapped}
+
+
+def rss_mb(field: str) -> float:
+    """VmRSS / VmHWM (peak) from /proc; ru_maxrss elsewhere"""
+    try:
+        with open("/proc/self/status") as status:
+            return next(int(line.split()[1]) for line in status if line.startswith(field + ":")) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(variant: str, path: str) -> None:
+    baseline = rss_mb("VmRSS")
+    try:
+        # Restart the peak from here (Linux)
+        with open("/proc/self/clear_refs", "w") as refs:
+            refs.write("5")
+    except OSError:
+        pass
+    start = time.perf_counter()
+    result = VARIANTS[variant](path)
+    elapsed = time.perf_counter() - start
+    print(f"{variant:16}  peak +{rss_mb('VmHWM') - baseline:6.1f} MB  {elapsed:6.2f} s  {result} transactions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_statement_{args.size_mb}mb_{args.pages}p.pdf")
+    if not os.path.exists(path):
+        pdf = make_statement_pdf(pages=args.pages, image_bytes=args.size_mb * 1024 * 1024)
+        with open(path, "wb") as file:
+            file.write(encrypt_pdf(pdf, PASSWORD))
+    print(f"{os.path.getsize(path) / 1e6:.1f} MB encrypted statement, {args.pages} pages")
+    for variant in VARIANTS:
+        subprocess.run([sys.executable, __file__, "--child", variant, path], check=True)
+
+
+if __name__ == "__main__":
+    main()
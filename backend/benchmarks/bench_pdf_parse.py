@@ -0,0 +1,68 @@
+"""
+Benchmark statement PDF text extraction: the old serial pdfplumber loop
+(text built with +=) vs the page-range process pool, on a synthetic
+50-page statement and on a batch of short statements from one sync.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_parse.py [--pages 50] [--workers 1 2 4] [--pages-per-task 8]
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import pdfplumber
+
+import _common  # noqa: F401  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_pdf import make_statement_pdf  # noqa: E402
+from app.services.pdf_text import extract_pdf_pages, shutdown_pdf_pools  # noqa: E402
+
+
+def serial_text(pdf_data: bytes) -> str:
+    """The previous implementation"""
+    full_text = ""
+    with pdfplumber.open(BytesIO(pdf_data)) as pdf:
+        for page in pdf.pages:
+            full_text += page.extract_text() + "\n"
+    return full_text
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=8, help="statements in the many-files run")
+    args = parser.parse_args()
+
+    statement = make_statement_pdf(pages=args.pages)
+    batch = [make_statement_pdf(pages=4) for _ in range(args.batch)]
+    batch_pages = 4 * args.batch
+    print(f"{args.pages}-page statement ({len(statement) / 1e3:.0f} KB), batch of {args.batch} 4-page statements, "
+          f"{os.cpu_count()} CPUs available")
+
+    baseline = args.pages / timed(lambda: serial_text(statement))
+    batch_baseline = batch_pages / timed(lambda: [serial_text(pdf) for pdf in batch])
+    print(f"{'serial +=':12}  {baseline:7.1f} pages/s (one file)  {batch_baseline:7.1f} pages/s (batch)")
+
+    for workers in args.workers:
+        # Warm the pool up so process start-up is not timed
+        extract_pdf_pages([statement], workers=workers, pages_per_task=args.pages_per_task)
+        rate = args.pages / timed(lambda: extract_pdf_pages([statement], workers=workers, pages_per_task=args.pages_per_task))
+        batch_rate = batch_pages / timed(lambda: extract_pdf_pages(batch, workers=workers, pages_per_task=args.pages_per_task))
+        print(f"{workers} workers     {rate:7.1f} pages/s {rate / baseline:4.1f}x      "
+              f"{batch_rate:7.1f} pages/s {batch_rate / batch_baseline:4.1f}x")
+
+    shutdown_pdf_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark finding a locked statement's password: the old loop (a
+PyPDF2 decrypt() attempt per candidate) vs checking candidates against
+the parsed encryption dictionary (pdf_unlock), on a batch of RC4-128
+and AES-256 (revision 6) statements, with the right password last in
+the candidate list and with the remembered pattern tried first.
+
+PyPDF2 needs PyCryptodome for AES; when it is missing the AES-256
+baseline opens the file with pdfminer once per candidate instead.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_unlock.py [--pdfs 8] [--workers 1 2 4]
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import PyPDF2
+from pdfminer.pdfdocument import PDFDocument, PDFPasswordIncorrect
+from pdfminer.pdfparser import PDFParser
+
+import _common  # noqa: F401  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_pdf import encrypt_pdf, make_statement_pdf  # noqa: E402
+from app.services.email_parser import EmailStatementParser  # noqa: E402
+from app.services.pdf_text import shutdown_pdf_pools  # noqa: E402
+from app.services.pdf_unlock import find_passwords  # noqa: E402
+
+DETAILS = {"user_dob": "15041990", "user_mobile": "9876543210", "user_account": "001234567890", "user_pan": "ABCDE1234F"}
+
+
+def pypdf2_search(pdf: bytes, candidates) -> str:
+    """The previous implementation"""
+    reader = PyPDF2.PdfReader(BytesIO(pdf))
+    for password in candidates:
+        try:
+            if reader.decrypt(password):
+                return password
+        except Exception:
+            continue
+
+
+def pdfminer_search(pdf: bytes, candidates) -> str:
+    for password in candidates:
+        try:
+            PDFDocument(PDFParser(BytesIO(pdf)), password=password)
+            return password
+        except PDFPasswordIncorrect:
+            continue
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=8, help="statements per batch")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    candidates = [password for _, password in EmailStatementParser.password_candidates("HDFC", **DETAILS)]
+    # The worst case: the password is the last candidate (PAN card, not an HDFC pattern)
+    password = candidates[-1]
+    remembered = [password] + candidates[:-1]
+    pdf = make_statement_pdf(pages=2, rows_per_page=10)
+    batches = {
+        "RC4-128": [encrypt_pdf(pdf, password) for _ in range(args.pdfs)],
+        "AES-256": [make_statement_pdf(pages=2, rows_per_page=10, aes256_password=password) for _ in range(args.pdfs)],
+    }
+    print(f"{args.pdfs} statements per batch, {len(candidates)} candidates, {os.cpu_count()} CPUs available")
+
+    for scheme, pdfs in batches.items():
+        baseline_name, search = "PyPDF2 decrypt", pypdf2_search
+        try:
+            pypdf2_search(pdfs[0], candidates[:1])
+        except Exception:
+            baseline_name, search = "pdfminer open", pdfminer_search
+        baseline, found = timed(lambda: [search(p, candidates) for p in pdfs])
+        assert found == [password] * len(pdfs)
+        print(f"{scheme}  {baseline_name:18} {baseline * 1e3 / len(pdfs):8.2f} ms/PDF")
+
+        for workers in args.workers:
+            find_passwords(pdfs[:1], candidates, workers)  # start the pool outside the timing
+            elapsed, found = timed(lambda: find_passwords(pdfs, candidates, workers))
+            assert found == [password] * len(pdfs)
+            print(f"{scheme}  pdf_unlock, {workers} workers  {elapsed * 1e3 / len(pdfs):8.2f} ms/PDF {baseline / elapsed:6.1f}x")
+        elapsed, found = timed(lambda: find_passwords(pdfs, remembered, 1))
+        assert found == [password] * len(pdfs)
+        print(f"{scheme}  remembered pattern {elapsed * 1e3 / len(pdfs):8.2f} ms/PDF {baseline / elapsed:6.1f}x")
+
+    shutdown_pdf_pools()
+
+
+if __name__ == "__main__":
+    main()
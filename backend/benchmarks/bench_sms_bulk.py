@@ -0,0 +1,43 @@
+"""
+Benchmark bulk SMS parsing across worker processes (1, 2, 4, 8 by default).
+
+Usage (from backend/):
+    python benchmarks/bench_sms_bulk.py [--messages 50000] [--workers 1 2 4 8] [--chunk-size 2000]
+"""
+import argparse
+import os
+import time
+
+from bench_sms_parser import make_corpus
+from app.services.sms_forwarding_handler import iter_parse_sms, shutdown_parse_pools
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages)
+    print(f"{args.messages} messages, chunk size {args.chunk_size}, {os.cpu_count()} CPUs available")
+
+    baseline = None
+    for workers in args.workers:
+        # Warm the pool up so process start-up is not timed
+        list(iter_parse_sms(corpus[:args.chunk_size * workers], workers=workers, chunk_size=args.chunk_size))
+
+        start = time.perf_counter()
+        parsed = sum(len(chunk) for chunk in iter_parse_sms(corpus, workers=workers, chunk_size=args.chunk_size))
+        elapsed = time.perf_counter() - start
+        assert parsed == args.messages
+
+        rate = args.messages / elapsed
+        baseline = baseline or rate
+        print(f"{workers} workers  {rate:10.0f} msg/s   {rate / baseline:4.1f}x")
+
+    shutdown_parse_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark streaming SMS backup import: peak Python memory and time to the
+first parsed batch for a large Android XML backup, vs loading the whole
+tree first.
+
+Usage (from backend/):
+    python benchmarks/bench_sms_import.py [--messages 200000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+from bench_sms_parser import make_corpus
+from app.services.sms_file_parser import SMSFileParser
+
+
+def write_backup(path: str, count: int) -> None:
+    corpus = make_corpus(min(count, 20000))
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<smses count="{count}">\n')
+        for i in range(count):
+            text, sender = corpus[i % len(corpus)]
+            out.write(f'  <sms protocol="0" address={quoteattr(sender)} date="{1700000000000 + i}" type="1" '
+                      f'body={quoteattr(text)} read="1" status="-1" />\n')
+        out.write("</smses>\n")
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(start)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def whole_tree(path):
+    def run(start):
+        root = ET.parse(path).getroot()
+        messages = [(e.get("body", ""), e.get("address", "")) for e in root.iter("sms")]
+        first = None
+        parsed = 0
+        for batch in SMSFileParser.iter_batches(messages):
+            first = first or time.perf_counter() - start
+            parsed += len(batch)
+        return parsed, first
+    return run
+
+
+def streaming(path):
+    def run(start):
+        first = None
+        parsed = 0
+        with open(path, "rb") as stream:
+            for batch in SMSFileParser.iter_xml(stream):
+                first = first or time.perf_counter() - start
+                parsed += len(batch)
+        return parsed, first
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), "pennywise_sms_backup.xml")
+    write_backup(path, args.messages)
+    print(f"{args.messages} messages, {os.path.getsize(path) / 1e6:.0f} MB backup")
+
+    for name, run in (("whole tree", whole_tree(path)), ("streaming", streaming(path))):
+        (parsed, first), elapsed, peak = measure(run)
+        print(f"{name:10}  {parsed} parsed in {elapsed:6.1f} s   first batch after {first:6.2f} s   peak {peak:7.1f} MB")
+
+    os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
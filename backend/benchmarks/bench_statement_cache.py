@@ -0,0 +1,74 @@
+"""
+Benchmark importing the same locked statement again: the full path
+(password search against the encryption dictionary, then column
+extraction) vs a hit in the parsed-statement cache, and the duplicate
+check on a user with many statements.
+
+Usage (from backend/):
+    python benchmarks/bench_statement_cache.py [--pages 20] [--statements 10000]
+"""
+import argparse
+import os
+import sys
+
+import _common  # noqa: E402  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_pdf import bank_transactions, encrypt_pdf, make_bank_statement_pdf  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models.bank_statement import BankStatement  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.email_parser import EmailStatementParser  # noqa: E402
+from app.services.pdf_text import pdf_sha256, shutdown_pdf_pools  # noqa: E402
+from app.services.statement_cache import cache_extraction, cached_extraction  # noqa: E402
+
+DETAILS = {"user_dob": "15041990", "user_mobile": "9876543210", "user_pan": "ABCDE1234F"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--statements", type=int, default=10000, help="statements the user already has")
+    args = parser.parse_args()
+
+    _common.reset_database()
+    db = SessionLocal()
+    db.add(User(id=1, email="bench1@example.com", hashed_password="x"))
+    db.commit()
+    db.execute(insert(BankStatement), [
+        {"user_id": 1, "filename": f"{n}.pdf", "file_path": f"{n}.pdf", "file_size": 1, "content_hash": f"{n:064x}"}
+        for n in range(args.statements)
+    ])
+    db.commit()
+
+    pdf = encrypt_pdf(make_bank_statement_pdf("HDFC", bank_transactions(args.pages * 30), 30), "3210")
+    email = EmailStatementParser("me@gmail.com", "app-password")
+    content_hash = pdf_sha256(pdf)
+
+    def full():
+        unlocked = email.try_unlock_pdf(pdf, "HDFC", **DETAILS)
+        return email.parse_statement_from_pdf(unlocked, "HDFC")
+
+    def cached():
+        return email.parse_statement_from_pdf(None, "HDFC", extraction=cached_extraction(db, 1, content_hash))
+
+    def duplicate_check():
+        return db.scalar(select(BankStatement.id).where(
+            BankStatement.user_id == 1, BankStatement.content_hash == f"{args.statements // 2:064x}"
+        ))
+
+    cold = _common.timed(full, repeat=1)
+    cache_extraction(db, 1, content_hash, full()["extraction"])
+    warm = _common.timed(cached)
+    assert cached()["transactions"] == full()["transactions"]
+    print(f"{args.pages}-page locked statement ({len(pdf) / 1e3:.0f} KB), {args.pages * 30} transactions")
+    print(f"unlock + extract   {cold:9.1f} ms")
+    print(f"cache hit          {warm:9.1f} ms  {cold / warm:6.0f}x")
+    print(f"duplicate check    {_common.timed(duplicate_check, repeat=100):9.3f} ms  ({args.statements} statements)")
+
+    db.close()
+    shutdown_pdf_pools()
+
+
+if __name__ == "__main__":
+    main()
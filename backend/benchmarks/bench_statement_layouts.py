@@ -0,0 +1,87 @@
+"""
+Benchmark statement transaction extraction on the golden layouts: the
+old path (page text, then two regexes over the whole text) vs the
+per-bank column layouts, reporting field accuracy and pages per second
+on a large synthetic statement per bank, plus the line-parsing step alone
+on text lines without a known layout.
+
+Usage (from backend/):
+    python benchmarks/bench_statement_layouts.py [--pages 40] [--workers 1]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import _common  # noqa: F401  (puts backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from fake_pdf import BANK_LAYOUTS, bank_transactions, field_accuracy, make_bank_statement_pdf  # noqa: E402
+from app.services.pdf_text import extract_pdf_text, shutdown_pdf_pools  # noqa: E402
+from app.services.statement_layouts import extract_statement_transactions, parse_statement_lines  # noqa: E402
+
+# The previous implementation's patterns
+OLD_PATTERNS = [
+    r'(\d{2}/\d{2}/\d{4})\s+([A-Za-z0-9\s\-/]+?)\s+(\d+\.\d{2}|\-)\s+(\d+\.\d{2}|\-)\s+(\d+\.\d{2})',
+    r'(\d{2}-\d{2}-\d{4})\s+([A-Za-z0-9\s\-/]+?)\s+(Dr|Cr)\s+(\d+\.\d{2})',
+]
+ROWS_PER_PAGE = 30
+
+
+def old_regexes(text: str):
+    transactions = []
+    for pattern in OLD_PATTERNS:
+        for match in re.findall(pattern, text, re.MULTILINE):
+            transactions.append({
+                "date": match[0],
+                "description": match[1].strip(),
+                "debit": float(match[2]) if match[2] not in ("-", "Dr", "Cr") else 0.0,
+                "credit": float(match[3]) if match[3] != "-" else 0.0,
+                "balance": None,
+            })
+    return transactions
+
+
+def old_path(pdf: bytes, workers: int):
+    return old_regexes(extract_pdf_text(pdf, workers=workers))
+
+
+def new_path(pdf: bytes, workers: int):
+    return extract_statement_transactions(pdf, workers=workers)["transactions"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.pages}-page statements, {ROWS_PER_PAGE} rows per page, {args.workers} workers")
+    print(f"{'bank':6} {'old accuracy':>13} {'old pages/s':>12} {'new accuracy':>13} {'new pages/s':>12}")
+    for seed, bank in enumerate(BANK_LAYOUTS):
+        transactions = bank_transactions(args.pages * ROWS_PER_PAGE, seed=seed)
+        pdf = make_bank_statement_pdf(bank, transactions, ROWS_PER_PAGE)
+        old_seconds, old = timed(lambda: old_path(pdf, args.workers))
+        new_seconds, new = timed(lambda: new_path(pdf, args.workers))
+        print(f"{bank:6} {field_accuracy(transactions, old):13.1%} {args.pages / old_seconds:12.1f} "
+              f"{field_accuracy(transactions, new):13.1%} {args.pages / new_seconds:12.1f}")
+
+    # Text-only lines printing whole rupees: nothing ends the old description group (\s matches
+    # newlines), so the match from every date walks to the end of the text - quadratic
+    for rows in (250, 500, 1000, 2000):
+        text = "\n".join(f"{1 + n % 28:02d}/01/2024 UPI/RAHUL SHARMA/PAYMENT {n} 1500 0 121000" for n in range(rows))
+        old_seconds, _ = timed(lambda: old_regexes(text))
+        new_seconds, _ = timed(lambda: parse_statement_lines(text))
+        print(f"{rows:5} text lines: old regexes {old_seconds * 1e3:8.1f} ms, line parser {new_seconds * 1e3:6.1f} ms")
+
+    shutdown_pdf_pools()
+
+
+if __name__ == "__main__":
+    main()
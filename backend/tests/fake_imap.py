@@ -0,0 +1,303 @@
+# Minimal in-process IMAP4rev1 server for tests and benchmarks
+import re
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime
+from typing import Dict, List, Optional
+
+_TOKEN_RE = re.compile(r'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+_FETCH_ITEM_RE = re.compile(r"BODY(?:\.PEEK)?\[[^\]]*\](?:<[\d.]+>)?|[A-Z0-9.]+", re.IGNORECASE)
+
+
+def make_message(subject: str, sender: str = "alerts@hdfcbank.net", date: Optional[datetime] = None,
+                 body: str = "Please find your statement attached.", pdf: Optional[bytes] = None,
+                 pdf_name: str = "statement.pdf", extra_attachment: Optional[bytes] = None) -> bytes:
+    """RFC 822 bytes for a test email, optionally with a PDF (and another, non-PDF) attachment"""
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = "me@example.com"
+    message["Date"] = format_datetime((date or datetime.now()).astimezone())
+    message.set_content(body)
+    if pdf is not None:
+        message.add_attachment(pdf, maintype="application", subtype="pdf", filename=pdf_name)
+    if extra_attachment is not None:
+        message.add_attachment(extra_attachment, maintype="image", subtype="png", filename="banner.png")
+    return message.as_bytes(policy=policy.SMTP)
+
+
+def _quote(value) -> str:
+    if value is None:
+        return "NIL"
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _bodystructure(part) -> str:
+    if part.is_multipart():
+        children = "".join(_bodystructure(child) for child in part.get_payload())
+        return f'({children} {_quote(part.get_content_subtype().upper())} ("BOUNDARY" {_quote(part.get_boundary())}) NIL NIL NIL)'
+
+    params = part.get_params()[1:] if part.get_params() else []
+    params = f"({' '.join(f'{_quote(k.upper())} {_quote(v)}' for k, v in params)})" if params else "NIL"
+    payload = part.get_payload()
+    encoding = part.get("Content-Transfer-Encoding", "7BIT").upper()
+    disposition = part.get_content_disposition()
+    filename = part.get_filename()
+    if disposition and filename:
+        disposition = f'({_quote(disposition)} ("FILENAME" {_quote(filename)}))'
+    else:
+        disposition = f"({_quote(disposition)} NIL)" if disposition else "NIL"
+
+    fields = f"{_quote(part.get_content_maintype().upper())} {_quote(part.get_content_subtype().upper())} {params} NIL NIL {_quote(encoding)} {len(payload)}"
+    if part.get_content_maintype() == "text":
+        fields += f" {payload.count(chr(10))}"
+    return f"({fields} NIL {disposition} NIL NIL)"
+
+
+class FakeMessage:
+    def __init__(self, uid: int, raw: bytes):
+        self.uid = uid
+        self.raw = raw
+        self.message = message_from_bytes(raw)
+        self.date = parsedate_to_datetime(self.message["Date"]) if self.message["Date"] else datetime.now().astimezone()
+
+    def section(self, name: str) -> bytes:
+        upper = name.upper()
+        if upper == "":
+            return self.raw
+        if upper.startswith("HEADER.FIELDS"):
+            wanted = {field.upper() for field in re.findall(r"[\w-]+", upper[len("HEADER.FIELDS"):])}
+            lines = [f"{key}: {value}\r\n" for key, value in self.message.items() if key.upper() in wanted]
+            return ("".join(lines) + "\r\n").encode()
+        if upper == "HEADER":
+            return self.raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+        part = self.message
+        for index in upper.split("."):
+            part = part.get_payload()[int(index) - 1] if part.is_multipart() else part
+        return part.get_payload().encode()
+
+
+class Mailbox:
+    def __init__(self, uidvalidity: int = 1):
+        self.uidvalidity = uidvalidity
+        self.messages: List[FakeMessage] = []
+        self.next_uid = 1
+
+    def add(self, raw: bytes) -> int:
+        self.messages.append(FakeMessage(self.next_uid, raw))
+        self.next_uid += 1
+        return self.next_uid - 1
+
+
+class FakeIMAPServer:
+    """
+    Threaded IMAP server on 127.0.0.1 serving in-memory mailboxes
+
+    Supports the commands EmailStatementParser uses (LOGIN, SELECT,
+    STATUS, [UID] SEARCH, [UID] FETCH, CLOSE, LOGOUT) and records the
+    bytes it sends and the commands it receives. Logins that have no
+    mailbox of their own share the default one. `latency` delays every
+    command's reply (a network round trip), and connections currently
+    open and the most open at once are tracked.
+    """
+
+    def __init__(self, uidvalidity: int = 1, latency: float = 0.0):
+        self.mailboxes: Dict[str, Mailbox] = {"": Mailbox(uidvalidity)}
+        self.latency = latency
+        self.bytes_sent = 0
+        self.commands: List[str] = []
+        self.logins = 0
+        self.open_connections = 0
+        self.max_open_connections = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server._serve(self.rfile, self.wfile)
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address
+
+    def mailbox(self, account: str = "") -> Mailbox:
+        return self.mailboxes.setdefault(account, Mailbox())
+
+    def add_message(self, raw: bytes, account: str = "") -> int:
+        return self.mailbox(account).add(raw)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.bytes_sent = 0
+            self.commands.clear()
+            self.logins = 0
+            self.max_open_connections = self.open_connections
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # Protocol
+
+    def _serve(self, rfile, wfile):
+        state = {"mailbox": self.mailboxes[""], "selected": False}
+
+        def send(data):
+            data = data.encode() if isinstance(data, str) else data
+            with self._lock:
+                self.bytes_sent += len(data)
+            wfile.write(data)
+
+        with self._lock:
+            self.open_connections += 1
+            self.max_open_connections = max(self.max_open_connections, self.open_connections)
+        try:
+            self._session(state, rfile, send)
+        finally:
+            # A LOGOUT has already given the slot back
+            if not state.get("logged_out"):
+                with self._lock:
+                    self.open_connections -= 1
+
+    def _session(self, state, rfile, send):
+        send("* OK [CAPABILITY IMAP4rev1] fake IMAP ready\r\n")
+        while True:
+            line = rfile.readline()
+            if not line:
+                return
+            line = line.decode().rstrip("\r\n")
+            # Literal arguments ({n}) are read inline
+            while (literal := re.search(r"\{(\d+)\}$", line)):
+                send("+ go ahead\r\n")
+                data = rfile.read(int(literal.group(1))).decode()
+                line = line[:literal.start()] + _quote(data) + rfile.readline().decode().rstrip("\r\n")
+            tag, _, rest = line.partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            with self._lock:
+                self.commands.append(rest)
+            if self.latency:
+                time.sleep(self.latency)
+            uid = False
+            if command == "UID":
+                uid = True
+                command, _, args = args.partition(" ")
+                command = command.upper()
+
+            if command == "CAPABILITY":
+                send("* CAPABILITY IMAP4rev1\r\n")
+            elif command == "LOGIN":
+                account = _TOKEN_RE.findall(args)[0].strip('"')
+                state["mailbox"] = self.mailboxes.get(account, self.mailboxes[""])
+                with self._lock:
+                    self.logins += 1
+            elif command in ("SELECT", "EXAMINE"):
+                box = state["mailbox"]
+                state["selected"] = True
+                send(f"* {len(box.messages)} EXISTS\r\n* 0 RECENT\r\n"
+                     f"* OK [UIDVALIDITY {box.uidvalidity}] UIDs valid\r\n* OK [UIDNEXT {box.next_uid}] next UID\r\n")
+                send(f"{tag} OK [READ-WRITE] {command} completed\r\n")
+                continue
+            elif command == "STATUS":
+                box = state["mailbox"]
+                name = _TOKEN_RE.findall(args)[0]
+                send(f"* STATUS {name} (MESSAGES {len(box.messages)} UIDNEXT {box.next_uid} UIDVALIDITY {box.uidvalidity})\r\n")
+            elif command == "SEARCH":
+                found = self._search(state["mailbox"], args)
+                send(f"* SEARCH {' '.join(str(m.uid if uid else seq) for seq, m in found)}\r\n".replace(" \r\n", "\r\n"))
+            elif command == "FETCH":
+                message_set, _, items = args.partition(" ")
+                for seq, message in self._message_set(state["mailbox"], message_set, uid):
+                    send(self._fetch(seq, message, items, uid))
+            elif command == "LOGOUT":
+                with self._lock:
+                    self.open_connections -= 1
+                state["logged_out"] = True
+                send("* BYE logging out\r\n")
+                send(f"{tag} OK LOGOUT completed\r\n")
+                return
+            elif command not in ("CLOSE", "NOOP"):
+                send(f"{tag} BAD unknown command\r\n")
+                continue
+            send(f"{tag} OK {command} completed\r\n")
+
+    def _message_set(self, box: Mailbox, message_set: str, uid: bool):
+        numbered = list(enumerate(box.messages, start=1))
+        highest = box.next_uid - 1 if uid else len(box.messages)
+        wanted = set()
+        for piece in message_set.split(","):
+            low, _, high = piece.partition(":")
+            low = highest if low == "*" else int(low)
+            high = low if not high else (highest if high == "*" else int(high))
+            wanted.update(range(min(low, high), max(low, high) + 1))
+        # "n:*" always includes the last message, even when n is past it
+        if uid and message_set.endswith(":*") and box.messages:
+            wanted.add(box.messages[-1].uid)
+        return [(seq, m) for seq, m in numbered if (m.uid if uid else seq) in wanted]
+
+    def _search(self, box: Mailbox, criteria: str):
+        tokens = _TOKEN_RE.findall(criteria)
+        numbered = list(enumerate(box.messages, start=1))
+
+        def parse():
+            token = tokens.pop(0)
+            key = token.upper()
+            if token == "(":
+                keys = []
+                while tokens[0] != ")":
+                    keys.append(parse())
+                tokens.pop(0)
+                return lambda seq, m: all(k(seq, m) for k in keys)
+            if key == "OR":
+                left, right = parse(), parse()
+                return lambda seq, m: left(seq, m) or right(seq, m)
+            if key == "NOT":
+                inner = parse()
+                return lambda seq, m: not inner(seq, m)
+            if key == "ALL":
+                return lambda seq, m: True
+            if key == "SINCE":
+                since = datetime.strptime(tokens.pop(0).strip('"'), "%d-%b-%Y").date()
+                return lambda seq, m: m.date.date() >= since
+            if key in ("SUBJECT", "FROM"):
+                needle = tokens.pop(0).strip('"').lower()
+                header = "Subject" if key == "SUBJECT" else "From"
+                return lambda seq, m: needle in str(m.message[header] or "").lower()
+            if key == "UID":
+                uids = {m.uid for _, m in self._message_set(box, tokens.pop(0), True)}
+                return lambda seq, m: m.uid in uids
+            raise ValueError(f"unsupported search key {token}")
+
+        keys = []
+        while tokens:
+            keys.append(parse())
+        return [(seq, m) for seq, m in numbered if all(k(seq, m) for k in keys)]
+
+    def _fetch(self, seq: int, message: FakeMessage, items: str, uid: bool) -> bytes:
+        names = [name.upper() for name in _FETCH_ITEM_RE.findall(items)]
+        if uid and "UID" not in names:
+            names.insert(0, "UID")
+        parts = []
+        for name in names:
+            if name == "UID":
+                parts.append(f"UID {message.uid}".encode())
+            elif name == "FLAGS":
+                parts.append(b"FLAGS (\\Seen)")
+            elif name == "BODYSTRUCTURE":
+                parts.append(f"BODYSTRUCTURE {_bodystructure(message.message)}".encode())
+            elif name in ("RFC822", "BODY[]", "BODY.PEEK[]"):
+                label = "RFC822" if name == "RFC822" else "BODY[]"
+                parts.append(f"{label} {{{len(message.raw)}}}\r\n".encode() + message.raw)
+            elif name.startswith("BODY"):
+                section = name[name.index("[") + 1:name.index("]")]
+                data = message.section(section)
+                parts.append(f"BODY[{section}] {{{len(data)}}}\r\n".encode() + data)
+        return f"* {seq} FETCH (".encode() + b" ".join(parts) + b")\r\n"
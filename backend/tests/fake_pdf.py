@@ -0,0 +1,280 @@
+# Synthetic bank statement PDFs for tests and benchmarks
+import json
+import os
+import random
+import struct
+import textwrap
+from datetime import date, timedelta
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import PyPDF2
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from pdfminer.fontmetrics import FONT_METRICS
+
+from app.services.pdf_unlock import _hash_r6
+
+MERCHANTS = ("SWIGGY ORDER", "AMAZON PAY", "UBER TRIP", "NETFLIX SUBSCRIPTION", "BIGBASKET", "IRCTC TICKET", "SALARY CREDIT")
+
+
+def statement_lines(pages: int, rows_per_page: int = 40) -> List[List[str]]:
+    """Text lines per page in the `dd/mm/yyyy description debit credit balance` layout"""
+    balance = 250000.0
+    result = []
+    for page in range(pages):
+        lines = [f"HDFC Bank Statement of Account - Page {page + 1}", "Date Narration Debit Credit Balance"]
+        for row in range(rows_per_page):
+            n = page * rows_per_page + row
+            merchant = MERCHANTS[n % len(MERCHANTS)]
+            amount = 50000.0 if merchant == "SALARY CREDIT" else 100 + (n * 37) % 4900
+            debit, credit = ("-", f"{amount:.2f}") if merchant == "SALARY CREDIT" else (f"{amount:.2f}", "-")
+            balance += amount if merchant == "SALARY CREDIT" else -amount
+            day = date(2024, 1, 1) + timedelta(days=n // 4)
+            lines.append(f"{day.strftime('%d/%m/%Y')} {merchant} {n} {debit} {credit} {balance:.2f}")
+        result.append(lines)
+    return result
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+# A line is its text, or (x, text) cells placed along the line
+Line = Union[str, Sequence[Tuple[float, str]]]
+
+
+def _show(line: Line, y: int) -> str:
+    cells = [(40, line)] if isinstance(line, str) else line
+    return "".join(f"1 0 0 1 {x} {y} Tm ({_escape(text)}) Tj\n" for x, text in cells)
+
+
+def make_statement_pdf(pages: int = 50, rows_per_page: int = 40, lines: Optional[List[List[Line]]] = None,
+                       image_bytes: int = 0, aes256_password: Optional[str] = None, font_size: int = 9) -> bytes:
+    """
+    A text-only PDF (Helvetica, one content stream per page) with the given lines
+
+    `image_bytes` adds a scanned-logo-sized (or larger) image to the first
+    page's resources, the bulk of a real statement's size.
+    `aes256_password` encrypts it with AES-256 (revision 6), which PyPDF2
+    cannot write; the owner password is the same with "-owner" appended.
+    """
+    lines = lines or statement_lines(pages, rows_per_page)
+    # (dictionary, stream data or None) per object
+    objects = [("<< /Type /Catalog /Pages 2 0 R >>", None), None,
+               ("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", None),
+               ("<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8",
+                bytes(image_bytes))]
+    kids = []
+    for number, page_lines in enumerate(lines):
+        text = "".join(_show(line, 800 - 2 * font_size * i) for i, line in enumerate(page_lines))
+        image = " /XObject << /Im0 4 0 R >>" if number == 0 and image_bytes else ""
+        objects.append(("<<", f"BT /F1 {font_size} Tf\n{text}ET".encode("latin-1")))
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                        f"/Resources << /Font << /F1 3 0 R >>{image} >> /Contents {len(objects)} 0 R >>", None))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = (f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>", None)
+
+    document_id = os.urandom(16)
+    encrypt, file_key = _aes256_security(aes256_password) if aes256_password else ("", None)
+    out = bytearray(b"%PDF-1.7\n")
+    offsets = []
+    for number, (dictionary, stream) in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{dictionary}".encode("latin-1")
+        if stream is not None:
+            if file_key:
+                stream = _aes256_encrypt(file_key, stream)
+            out += f" /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        out += b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /ID [<{document_id.hex()}> <{document_id.hex()}>]{encrypt} >>\n"
+            f"startxref\n{xref}\n%%EOF\n").encode()
+    return bytes(out)
+
+
+# Per-bank statement tables: title, (header, x) per column, date format
+BANK_LAYOUTS = {
+    "HDFC": ("HDFC BANK LTD - Statement of Account",
+             (("Date", 20), ("Narration", 62), ("Chq./Ref.No.", 170), ("Value Dt", 240), ("Withdrawal Amt.", 285),
+              ("Deposit Amt.", 355), ("Closing Balance", 425)), "%d/%m/%y"),
+    "ICICI": ("ICICI Bank Limited - Detailed Statement",
+              (("S No.", 20), ("Value Date", 45), ("Transaction Date", 95), ("Cheque Number", 160),
+               ("Transaction Remarks", 215), ("Withdrawal Amount (INR)", 330), ("Deposit Amount (INR)", 420),
+               ("Balance (INR)", 505)), "%d/%m/%Y"),
+    "SBI": ("State Bank of India - Account Statement",
+            (("Txn Date", 20), ("Value Date", 70), ("Description", 120), ("Ref No./Cheque No.", 240),
+             ("Debit", 330), ("Credit", 395), ("Balance", 460)), "%d %b %Y"),
+    "AXIS": ("AXIS BANK - Statement of Account",
+             (("Tran Date", 20), ("Chq No", 70), ("Particulars", 115), ("Debit", 265), ("Credit", 335),
+              ("Balance", 405), ("Init. Br", 480)), "%d-%m-%Y"),
+    "KOTAK": ("Kotak Mahindra Bank - Account Statement",
+              (("Date", 20), ("Narration", 65), ("Chq/Ref No.", 215), ("Amount", 290), ("Dr / Cr", 360),
+               ("Balance", 400)), "%d-%m-%Y"),
+}
+
+# Headers of the amount columns, which real statements right-align
+AMOUNT_HEADERS = {"Withdrawal Amt.", "Deposit Amt.", "Closing Balance", "Withdrawal Amount (INR)",
+                  "Deposit Amount (INR)", "Balance (INR)", "Debit", "Credit", "Balance", "Amount"}
+
+NARRATIONS = ("UPI/SWIGGY/ORDER", "NEFT CR-SALARY ACME TECHNOLOGIES PVT LTD", "POS AMAZON PAY INDIA",
+              "ATM WDL SECTOR 18 NOIDA", "ACH D- BAJAJ FINANCE LTD EMI", "UPI/UBER INDIA SYSTEMS PVT LTD/TRIP",
+              "IMPS P2A TRANSFER TO RAHUL SHARMA FOR RENT OF FLAT", "BIGBASKET GROCERY", "NETFLIX SUBSCRIPTION")
+
+
+def bank_transactions(count: int, seed: int = 0, start: date = date(2024, 1, 1)) -> List[Dict]:
+    """Random statement rows (ISO dates, amounts with paise, running balance)"""
+    rng = random.Random(seed)
+    balance = 150000.0
+    rows = []
+    for n in range(count):
+        narration = f"{rng.choice(NARRATIONS)} {rng.randrange(10 ** 6, 10 ** 7)}"
+        credit = round(rng.uniform(20000, 90000), 2) if "CR-" in narration else 0.0
+        debit = 0.0 if credit else round(rng.uniform(10, 25000), 2)
+        balance = round(balance + credit - debit, 2)
+        rows.append({
+            "date": (start + timedelta(days=n // 3)).isoformat(),
+            "description": narration,
+            "ref": f"{rng.randrange(10 ** 11, 10 ** 12)}",
+            "debit": debit,
+            "credit": credit,
+            "balance": balance,
+        })
+    return rows
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}" if value else ""
+
+
+def text_width(text: str, font_size: float = 7) -> float:
+    """Width of `text` in Helvetica, as pdfplumber measures it"""
+    widths = FONT_METRICS["Helvetica"][1]
+    return sum(widths.get(char, 556) for char in text) * font_size / 1000
+
+
+def make_bank_statement_pdf(bank: str, transactions: List[Dict], rows_per_page: int = 30,
+                            right_aligned: bool = False) -> bytes:
+    """
+    A statement in `bank`'s table layout (BANK_LAYOUTS), every page under a header row
+
+    Long narrations wrap onto continuation lines in the narration column,
+    and those of a page's last row carry over to the top of the next
+    page; the first page starts with an opening balance row.
+    `right_aligned` sets the amount columns and their headers flush right
+    against the next column (as real statements print them), so wide
+    amounts start left of their header.
+    """
+    title, columns, date_format = BANK_LAYOUTS[bank]
+    x = [column_x for _, column_x in columns]
+    right = [None] * len(columns)
+    if right_aligned:
+        right = [(x[n + 1] - 6 if n + 1 < len(x) else x[n] + 70) if name in AMOUNT_HEADERS else None
+                 for n, (name, _) in enumerate(columns)]
+
+    def place(column: int, text: str) -> Tuple[float, str]:
+        return (round(right[column] - text_width(text), 2) if right[column] else x[column], text)
+
+    header = [place(n, name) for n, (name, _) in enumerate(columns)]
+    narration = [name for name, _ in columns].index(
+        {"HDFC": "Narration", "ICICI": "Transaction Remarks", "SBI": "Description",
+         "AXIS": "Particulars", "KOTAK": "Narration"}[bank])
+    narration_x = x[narration]
+    # Capitals are under 5pt wide at 7pt, so this keeps narrations inside their column
+    wrap = int((x[narration + 1] - narration_x - 6) / 5)
+
+    def row_cells(n: int, row: Dict) -> List[Tuple[float, str]]:
+        day = date.fromisoformat(row["date"]).strftime(date_format)
+        narration = textwrap.wrap(row["description"], wrap)
+        debit, credit, balance = _money(row["debit"]), _money(row["credit"]), _money(row["balance"])
+        if bank == "HDFC":
+            cells = [day, narration[0], row["ref"], day, debit, credit, balance]
+        elif bank == "ICICI":
+            cells = [str(n + 1), day, day, row["ref"][:6], narration[0], debit, credit, balance]
+        elif bank == "SBI":
+            cells = [day, day, narration[0], row["ref"], debit, credit, balance]
+        elif bank == "AXIS":
+            cells = [day, row["ref"][:6], narration[0], debit, credit, balance, "1234"]
+        else:
+            cells = [day, narration[0], row["ref"], _money(row["debit"] or row["credit"]),
+                     "DR" if row["debit"] else "CR", balance]
+        return [place(column, cell) for column, cell in enumerate(cells) if cell]
+
+    pages = []
+    carried: List[Line] = []
+    for start in range(0, len(transactions), rows_per_page):
+        lines: List[Line] = [title, "Account No : 50100012345678", header] + carried
+        if not start:
+            lines.append([(narration_x, "OPENING BALANCE"), place(len(x) - 1 if bank != "AXIS" else len(x) - 2,
+                                                                  "1,50,000.00")])
+        for n, row in enumerate(transactions[start:start + rows_per_page], start=start):
+            lines.append(row_cells(n, row))
+            carried = [[(narration_x, part)] for part in textwrap.wrap(row["description"], wrap)[1:]]
+            if n + 1 < min(start + rows_per_page, len(transactions)) or start + rows_per_page >= len(transactions):
+                lines.extend(carried)
+                carried = []
+        lines.append(f"Page {len(pages) + 1}")
+        pages.append(lines)
+    return make_statement_pdf(lines=pages, font_size=7)
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "statements")
+GOLDEN_FIELDS = ("date", "description", "debit", "credit", "balance")
+
+
+def golden_statement(bank: str) -> Dict:
+    """A golden-corpus statement: bank, rows_per_page and the transactions it must parse to"""
+    with open(os.path.join(GOLDEN_DIR, f"{bank.lower()}.json")) as file:
+        return json.load(file)
+
+
+def field_accuracy(expected: List[Dict], parsed: List[Dict]) -> float:
+    """Share of expected transaction fields parsed exactly, row by row (missing rows count as wrong)"""
+    right = 0
+    for want, got in zip(expected, parsed):
+        got = dict(got, date=got["date"].date().isoformat() if hasattr(got["date"], "date") else got["date"])
+        right += sum(want[field] == got.get(field) for field in GOLDEN_FIELDS)
+    return right / (len(GOLDEN_FIELDS) * max(len(expected), len(parsed))) if expected or parsed else 1.0
+
+
+def _aes_cbc(key: bytes, iv: bytes, data: bytes) -> bytes:
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+def _aes256_encrypt(file_key: bytes, data: bytes) -> bytes:
+    iv = os.urandom(16)
+    pad = 16 - len(data) % 16
+    return iv + _aes_cbc(file_key, iv, data + bytes([pad]) * pad)
+
+
+def _aes256_security(password: str) -> Tuple[str, bytes]:
+    """/Encrypt entry and file key for AES-256 revision 6 (ISO 32000-2, 7.6.4.4.7-8)"""
+    file_key = os.urandom(32)
+    user, owner = password.encode(), (password + "-owner").encode()
+    validation_salt, key_salt = os.urandom(8), os.urandom(8)
+    u = _hash_r6(user, validation_salt) + validation_salt + key_salt
+    ue = _aes_cbc(_hash_r6(user, key_salt), bytes(16), file_key)
+    validation_salt, key_salt = os.urandom(8), os.urandom(8)
+    o = _hash_r6(owner, validation_salt, u) + validation_salt + key_salt
+    oe = _aes_cbc(_hash_r6(owner, key_salt, u), bytes(16), file_key)
+    permissions = -4
+    encryptor = Cipher(algorithms.AES(file_key), modes.ECB()).encryptor()
+    perms = encryptor.update(struct.pack("<i", permissions) + b"\xff\xff\xff\xffTadb" + os.urandom(4)) + encryptor.finalize()
+    entry = (f" /Encrypt << /Filter /Standard /V 5 /R 6 /Length 256 "
+             f"/CF << /StdCF << /AuthEvent /DocOpen /CFM /AESV3 /Length 32 >> >> /StmF /StdCF /StrF /StdCF "
+             f"/O <{o.hex()}> /U <{u.hex()}> /OE <{oe.hex()}> /UE <{ue.hex()}> /P {permissions} /Perms <{perms.hex()}> >>")
+    return entry, file_key
+
+
+def encrypt_pdf(pdf: bytes, user_password: str, owner_password: Optional[str] = None) -> bytes:
+    """The same PDF behind a password (RC4 128-bit, the only scheme PyPDF2 writes)"""
+    reader = PyPDF2.PdfReader(BytesIO(pdf))
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.encrypt(user_password, owner_password or user_password + "-owner")
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
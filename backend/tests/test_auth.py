@@ -1 +1,128 @@
 # Auth tests
+import asyncio
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import event
+
+from app.api.v1.endpoints import auth
+from app.core.config import settings
+from app.core.security import create_access_token, get_current_user, get_current_user_id, token_claims
+from app.core.user_cache import UserCache, user_cache
+from app.database import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from app import models  # noqa: F401
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    session = SessionLocal()
+    session.add(User(id=1, email="auth@example.com", hashed_password="x", full_name="Auth User"))
+    session.commit()
+    yield session
+    session.close()
+    user_cache.clear()
+
+
+def count_queries(fn):
+    """Run fn and return (result, number of statements sent by the async engine)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return result, len(statements)
+
+
+def test_current_user_is_served_from_cache(db):
+    token = create_access_token({"sub": "auth@example.com"})
+
+    first, first_queries = count_queries(lambda: asyncio.run(get_current_user(token)))
+    second, second_queries = count_queries(lambda: asyncio.run(get_current_user(token)))
+
+    assert first_queries == 1
+    assert second_queries == 0
+    assert (second.id, second.email, second.full_name) == (1, "auth@example.com", "Auth User")
+
+
+def test_cache_is_invalidated_on_update(db):
+    token = create_access_token({"sub": "auth@example.com"})
+    assert asyncio.run(get_current_user(token)).is_active
+
+    db.get(User, 1).is_active = False
+    db.commit()
+
+    assert not asyncio.run(get_current_user(token)).is_active
+
+
+def test_current_user_id_is_served_from_cache(db):
+    token = create_access_token(token_claims(db.get(User, 1)))
+
+    first = count_queries(lambda: asyncio.run(get_current_user_id(token)))
+    second = count_queries(lambda: asyncio.run(get_current_user_id(token)))
+
+    assert (first, second) == ((1, 1), (1, 0))
+
+
+def test_current_user_id_rejects_inactive_and_deleted_users(db):
+    token = create_access_token(token_claims(db.get(User, 1)))
+    assert asyncio.run(get_current_user_id(token)) == 1
+
+    db.get(User, 1).is_active = False
+    db.commit()
+    with pytest.raises(HTTPException) as inactive:
+        asyncio.run(get_current_user_id(token))
+
+    db.delete(db.get(User, 1))
+    db.commit()
+    with pytest.raises(HTTPException) as deleted:
+        asyncio.run(get_current_user_id(token))
+
+    # A new account under the same email doesn't inherit the old account's tokens
+    db.add(User(id=2, email="auth@example.com", hashed_password="x"))
+    db.commit()
+    with pytest.raises(HTTPException) as recreated:
+        asyncio.run(get_current_user_id(token))
+
+    assert (inactive.value.status_code, deleted.value.status_code, recreated.value.status_code) == (400, 401, 401)
+
+
+def test_user_cache_evicts_least_recently_used():
+    cache = UserCache(max_size=2, ttl_seconds=60)
+    cache.set("a", {"id": 1})
+    cache.set("b", {"id": 2})
+    cache.get("a")
+    cache.set("c", {"id": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+
+    cache.invalidate_user(1)
+    assert cache.get("a") is None
+
+
+def test_login_upgrades_hash_when_cost_changes(db, monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    db.get(User, 1).hashed_password = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=5)).decode()
+    db.commit()
+
+    async def login():
+        async with AsyncSessionLocal() as session:
+            form = OAuth2PasswordRequestForm(username="auth@example.com", password="secret")
+            return await auth.login(form_data=form, db=session)
+
+    assert asyncio.run(login())["token_type"] == "bearer"
+    db.expire_all()
+    upgraded = db.get(User, 1).hashed_password
+    assert upgraded.startswith("$2b$04$")
+    assert bcrypt.checkpw(b"secret", upgraded.encode())
@@ -1 +1,569 @@
 # Bank statements tests
+import asyncio
+import imaplib
+import os
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+from contextlib import nullcontext
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+from app.database import Base, SessionLocal, engine
+from app import models  # noqa: F401
+from app.models.bank_statement import BankStatement
+from app.models.email_sync_state import EmailSyncState
+from app.models.budget import Budget
+from app.models.job import Job
+from app.models.statement_password_pattern import StatementPasswordPattern
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.api.v1.endpoints import bank_statements, email_integration
+from app.services import email_parser
+from app.services.email_parser import EmailStatementParser
+from app.services.imap_pool import IMAPConnectionPool
+from app.core.config import settings
+from app.core.security import get_current_user, get_current_user_id
+from app.main import app
+from app.services.pdf_text import UnlockedPdf, extract_page_range, extract_pdf_pages, pdf_sha256, shutdown_pdf_pools
+from app.services import job_queue
+from app.services.job_queue import InlineJobBackend, recover_interrupted_jobs, set_job_backend
+from app.services.spending_rollup import check_consistency
+from app.services.transaction_ingest import TransactionIngestor
+from tests.fake_imap import FakeIMAPServer, make_message
+from app.services.statement_layouts import extract_statement_transactions, parse_statement_lines
+from tests.fake_pdf import (
+    BANK_LAYOUTS,
+    encrypt_pdf,
+    field_accuracy,
+    golden_statement,
+    make_bank_statement_pdf,
+    make_statement_pdf,
+    statement_lines,
+)
+
+FETCH_REQUEST = {"email_credentials": {"email": "me@gmail.com", "app_password": "secret", "days": 30}}
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    session.add(User(id=1, email="statements@example.com", hashed_password="x"))
+    session.commit()
+    set_job_backend(InlineJobBackend())
+    yield session
+    set_job_backend(None)
+    session.close()
+
+
+@pytest.fixture
+def fake_mailbox(monkeypatch):
+    emails = [
+        {"email_id": "1", "uid": 1, "bank": "HDFC", "attachments": [{"filename": "jan.pdf", "data": b"%PDF-jan"}]},
+        {"email_id": "2", "uid": 2, "bank": "HDFC", "attachments": []},
+        {"email_id": "3", "uid": 3, "bank": "SBI", "attachments": [{"filename": "feb.pdf", "data": b"%PDF-locked"}]},
+    ]
+    parsed = {"total_transactions": 2, "transactions": [
+        {"date": "05-01-2024", "description": "SWIGGY", "debit": "250.00", "credit": "0.00"},
+        {"date": "06-01-2024", "description": "SALARY", "debit": "0.00", "credit": "50000.00"},
+    ]}
+    monkeypatch.setattr(EmailStatementParser, "pooled_connection", lambda self: nullcontext())
+    monkeypatch.setattr(EmailStatementParser, "iter_bank_statement_emails", lambda self, **kwargs: iter(emails))
+    fake_pdf_handling(monkeypatch, parsed)
+
+
+def fake_pdf_handling(monkeypatch, parsed):
+    monkeypatch.setattr(EmailStatementParser, "try_unlock_pdf", lambda self, pdf_data, bank, **info: None if b"locked" in pdf_data else UnlockedPdf(pdf_data))
+    monkeypatch.setattr(EmailStatementParser, "parse_statement_from_pdf", lambda self, pdf_data, bank=None: parsed)
+
+
+def test_fetch_statements_runs_as_a_job(db, fake_mailbox):
+    request = email_integration.FetchStatementsRequest(**FETCH_REQUEST)
+
+    accepted = asyncio.run(email_integration.fetch_bank_statements_from_email(request=request, current_user_id=1, db=db))
+    status = asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=1, db=db))
+
+    assert accepted.status == "queued"
+    assert status["status"] == "completed"
+    assert status["progress"] == {"emails_scanned": 3, "pdfs_unlocked": 1, "transactions_inserted": 2}
+    assert status["result"]["failed_pdfs"] == ["feb.pdf (Password not matched)"]
+    assert db.query(Transaction).count() == 2
+    assert db.query(BankStatement).count() == 1
+
+
+def test_unparseable_statement_is_failed_and_retried(db, monkeypatch):
+    emails = [{"email_id": "1", "uid": 1, "bank": "HDFC", "attachments": [{"filename": "jan.pdf", "data": b"%PDF-cut-off"}]},
+              {"email_id": "2", "uid": 2, "bank": "HDFC", "attachments": []}]
+    monkeypatch.setattr(EmailStatementParser, "pooled_connection", lambda self: nullcontext())
+    monkeypatch.setattr(EmailStatementParser, "iter_bank_statement_emails", lambda self, **kwargs: iter(emails))
+    monkeypatch.setattr(EmailStatementParser, "try_unlock_pdf", lambda self, pdf_data, bank, **info: UnlockedPdf(pdf_data))
+    request = email_integration.FetchStatementsRequest(**FETCH_REQUEST)
+
+    accepted = asyncio.run(email_integration.fetch_bank_statements_from_email(request=request, current_user_id=1, db=db))
+    db.expire_all()
+    status = asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=1, db=db))
+
+    assert status["result"]["statements_processed"] == 0
+    assert [name.split()[0] for name in status["result"]["failed_pdfs"]] == ["jan.pdf"]
+    assert db.query(BankStatement).count() == 0
+    # The checkpoint stays before the email, so the next sync tries the PDF again
+    assert db.query(EmailSyncState).one().last_uid == 0
+
+
+def test_job_status_is_private(db, fake_mailbox):
+    db.add(User(id=2, email="other@example.com", hashed_password="x"))
+    db.commit()
+    request = email_integration.FetchStatementsRequest(**FETCH_REQUEST)
+    accepted = asyncio.run(email_integration.fetch_bank_statements_from_email(request=request, current_user_id=1, db=db))
+
+    with pytest.raises(email_integration.HTTPException) as error:
+        asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=2, db=db))
+    assert error.value.status_code == 404
+
+
+def test_restart_recovery_only_fails_abandoned_jobs(db, tmp_path):
+    now = datetime.utcnow()
+    jobs = {
+        "live": Job(user_id=1, kind="process_statement_upload", status="running", worker_id="replica-b:7", heartbeat_at=now),
+        "stale": Job(user_id=1, kind="process_statement_upload", status="running", worker_id="replica-c:7",
+                     heartbeat_at=now - timedelta(minutes=10)),
+        "previous run": Job(user_id=1, kind="fetch_statements", status="queued", worker_id=job_queue.WORKER_ID,
+                            heartbeat_at=now),
+        "unowned": Job(user_id=1, kind="fetch_statements", status="running"),
+    }
+    db.add_all(jobs.values())
+    db.flush()
+    statements = {
+        name: BankStatement(user_id=1, filename=f"{name}.pdf", file_path=str(tmp_path / f"{name}.pdf"), file_size=1,
+                            content_hash=name, processing_status="processing", job_id=jobs[name].id)
+        for name in ("live", "stale")
+    }
+    db.add_all(statements.values())
+    db.commit()
+
+    assert recover_interrupted_jobs(db) == 3
+    # A running worker's heartbeat keeps its own jobs, however old their last stamp
+    jobs["live"].worker_id, jobs["live"].heartbeat_at = job_queue.WORKER_ID, now - timedelta(minutes=10)
+    db.commit()
+    job_queue.JobHeartbeat().beat()
+
+    db.expire_all()
+    assert {name: job.status for name, job in jobs.items()} == {
+        "live": "running", "stale": "failed", "previous run": "failed", "unowned": "failed"
+    }
+    assert jobs["live"].heartbeat_at > now - timedelta(minutes=1)
+    assert {name: (s.processing_status, s.content_hash) for name, s in statements.items()} == {
+        "live": ("processing", "live"), "stale": ("failed", None)
+    }
+
+
+def test_quick_restart_fails_its_fresh_jobs_once_they_go_stale(db, monkeypatch, tmp_path):
+    from app.main import recover_jobs
+
+    set_job_backend(None)
+    monkeypatch.setattr(settings, "JOB_BACKEND", "thread")
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "JOB_STALE_SECONDS", 0.5)
+    # The previous run (another pid) stamped its job just before it stopped
+    job = Job(user_id=1, kind="process_statement_upload", status="running", worker_id="host:1",
+              heartbeat_at=datetime.utcnow())
+    db.add(job)
+    db.flush()
+    statement = BankStatement(user_id=1, filename="jan.pdf", file_path=str(tmp_path / "jan.pdf"), file_size=1,
+                              content_hash="jan", processing_status="processing", job_id=job.id)
+    db.add(statement)
+    db.commit()
+
+    # Startup can't tell the job from a live replica's; nothing is enqueued afterwards
+    recover_jobs()
+    assert db.get(Job, job.id).status == "running"
+    deadline = time.monotonic() + 5
+    while db.get(Job, job.id).status == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        db.expire_all()
+    set_job_backend(None)
+
+    assert (db.get(Job, job.id).status, db.get(BankStatement, statement.id).processing_status) == ("failed", "failed")
+
+
+def test_job_backends_must_implement_submit():
+    with pytest.raises(TypeError):
+        job_queue.JobBackend()
+
+
+@pytest.fixture
+def imap_server(monkeypatch):
+    pool = IMAPConnectionPool(max_per_server=2)
+    monkeypatch.setattr(email_parser, "imap_pool", pool)
+    with FakeIMAPServer() as server:
+        monkeypatch.setattr(imaplib, "IMAP4_SSL", lambda host, *args, **kwargs: imaplib.IMAP4(server.host, server.port))
+        yield server
+        pool.close_all()
+
+
+def test_imap_fetch_downloads_only_pdf_parts(imap_server):
+    pdfs = [b"%PDF-1.4 statement " + bytes([i]) * 20000 for i in range(3)]
+    for i, pdf in enumerate(pdfs):
+        # Matches "statement" and "bank statement" but must be fetched once
+        imap_server.add_message(make_message(f"HDFC Bank Statement {i}", pdf=pdf, pdf_name=f"hdfc_{i}.pdf"))
+    for i in range(5):
+        imap_server.add_message(make_message(f"Your e-statement is ready {i}", body="promo " * 5000, extra_attachment=b"\x89PNG" * 20000))
+    imap_server.add_message(make_message("Lunch on Friday?", pdf=b"%PDF-menu"))
+
+    emails = list(EmailStatementParser("me@gmail.com", "app-password").iter_bank_statement_emails(days=30))
+
+    assert len(emails) == 8
+    attachments = [a for e in emails for a in e["attachments"]]
+    assert [(a["filename"], a["data"]) for a in attachments] == [(f"hdfc_{i}.pdf", pdf) for i, pdf in enumerate(pdfs)]
+    assert sum(c.startswith("UID SEARCH") for c in imap_server.commands) == 1
+    assert not any("RFC822" in c for c in imap_server.commands)
+    # Only the base64 PDF parts plus headers cross the wire, not the promo bodies and images
+    pdf_wire_bytes = sum(len(pdf) * 4 // 3 for pdf in pdfs)
+    assert imap_server.bytes_sent < pdf_wire_bytes * 1.1
+
+
+def test_email_sync_is_incremental(db, imap_server, monkeypatch):
+    fake_pdf_handling(monkeypatch, {"total_transactions": 1, "transactions": [
+        {"date": "05-01-2024", "description": "SWIGGY", "debit": "250.00", "credit": "0.00"},
+    ]})
+    imap_server.add_message(make_message("HDFC Bank Statement Jan", pdf=b"%PDF-jan"))
+    imap_server.add_message(make_message("SBI Bank Statement Jan", pdf=b"%PDF-locked"))
+
+    def sync():
+        request = email_integration.FetchStatementsRequest(**FETCH_REQUEST)
+        accepted = asyncio.run(email_integration.fetch_bank_statements_from_email(request=request, current_user_id=1, db=db))
+        return asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=1, db=db))
+
+    first = sync()
+    # New mail: a resent copy of January and February's statement
+    imap_server.add_message(make_message("Fwd: HDFC Bank Statement Jan", pdf=b"%PDF-jan"))
+    imap_server.add_message(make_message("HDFC Bank Statement Feb", pdf=b"%PDF-feb"))
+    imap_server.reset_stats()
+    second = sync()
+
+    assert first["progress"]["emails_scanned"] == 2
+    # The locked statement (UID 2) holds the checkpoint back, so it is retried
+    assert second["progress"]["emails_scanned"] == 3
+    assert second["result"]["statements_skipped"] == 1
+    assert second["result"]["statements_processed"] == 1
+    assert any(c.startswith("UID SEARCH (UID 2:*") for c in imap_server.commands)
+    assert db.query(BankStatement).count() == 2
+
+
+def test_multi_mailbox_sync_shares_pooled_connections(db, imap_server, monkeypatch):
+    fake_pdf_handling(monkeypatch, {"total_transactions": 1, "transactions": [
+        {"date": "05-01-2024", "description": "SWIGGY", "debit": "250.00", "credit": "0.00"},
+    ]})
+    imap_server.latency = 0.01
+    mailboxes = []
+    for i in range(4):
+        address = f"me{i}@gmail.com"
+        imap_server.add_message(make_message("HDFC Bank Statement Jan", pdf=b"%PDF-jan-" + address.encode()), account=address)
+        mailboxes.append({"email": address, "app_password": "secret", "days": 30, "folders": ["INBOX", "Statements"]})
+    mailboxes.append({"email": "broken@gmail.com", "app_password": "secret", "imap_server": "imap.broken.example"})
+    monkeypatch.setattr(imaplib, "IMAP4_SSL", lambda host, *args, **kwargs: imaplib.IMAP4(
+        imap_server.host if host == "imap.gmail.com" else "127.0.0.1", imap_server.port if host == "imap.gmail.com" else 1))
+
+    request = email_integration.FetchMultipleStatementsRequest(mailboxes=mailboxes)
+    accepted = asyncio.run(email_integration.fetch_bank_statements_from_mailboxes(request=request, current_user_id=1, db=db))
+    status = asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=1, db=db))
+
+    assert status["status"] == "completed"
+    assert status["result"]["statements_processed"] == 4
+    assert [m["statements_processed"] for m in status["result"]["mailboxes"][:4]] == [1] * 4
+    assert "Email connection failed" in status["result"]["mailboxes"][4]["error"]
+    # Both folders of a mailbox reuse one login, and gmail never sees more than 2 connections at once
+    assert imap_server.logins == 4
+    assert imap_server.max_open_connections <= 2
+    assert db.query(BankStatement).count() == 4
+
+
+def test_pdf_pages_are_extracted_in_order_across_workers():
+    pdfs = [make_statement_pdf(pages=7, rows_per_page=3), make_statement_pdf(pages=2, rows_per_page=3)]
+
+    try:
+        pages = extract_pdf_pages(pdfs, workers=2, pages_per_task=3)
+    finally:
+        shutdown_pdf_pools()
+
+    assert pages == [extract_page_range(pdf) for pdf in pdfs]
+    assert [text.splitlines() for text in pages[0]] == statement_lines(7, 3)
+    parsed = EmailStatementParser("me@gmail.com", "app-password").parse_statement_from_pdf(pdfs[0])
+    assert parsed["total_transactions"] == 21
+
+
+def test_large_attachments_are_spilled_and_unlocked_without_rewriting(imap_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PDF_SPILL_THRESHOLD", 1_000)
+    monkeypatch.setattr(settings, "PDF_SPILL_DIR", str(tmp_path))
+    locked = encrypt_pdf(make_statement_pdf(pages=3, rows_per_page=10), "15041990")
+    imap_server.add_message(make_message("HDFC Bank Statement Jan", pdf=locked))
+    imap_server.add_message(make_message("HDFC Bank Statement Feb", pdf=b"%PDF-small"))
+
+    parser = EmailStatementParser("me@gmail.com", "app-password")
+    large, small = [e["attachments"][0] for e in parser.iter_bank_statement_emails(days=30)]
+
+    assert small == {"filename": "statement.pdf", "data": b"%PDF-small", "spilled": False}
+    assert large["spilled"] and open(large["data"], "rb").read() == locked
+    unlocked = parser.try_unlock_pdf(large["data"], "HDFC", user_dob="15041990")
+    assert unlocked == (large["data"], "15041990", "DOB_DDMMYYYY")
+    assert parser.parse_statement_from_pdf(unlocked)["total_transactions"] == 30
+
+
+def test_statement_passwords_are_checked_against_rc4_and_aes256():
+    parser = EmailStatementParser("me@gmail.com", "app-password")
+    details = {"user_dob": "15041990", "user_mobile": "9876543210", "user_pan": "ABCDE1234F"}
+    rc4 = encrypt_pdf(make_statement_pdf(pages=1, rows_per_page=2), "3210")
+    aes256 = make_statement_pdf(pages=1, rows_per_page=2, aes256_password="15apr1990")
+    aes256_owner = make_statement_pdf(pages=1, rows_per_page=2, aes256_password="statement")
+
+    assert parser.try_unlock_pdf(rc4, "HDFC", **details) == (rc4, "3210", "MOBILE_LAST4")
+    assert parser.try_unlock_pdf(aes256, "ICICI", **details) == (aes256, "15apr1990", "DOB_ddmmmyyyy")
+    assert parser.try_unlock_pdf(aes256_owner, "HDFC", custom_password="statement-owner") == (aes256_owner, "statement-owner", "CUSTOM")
+    assert parser.try_unlock_pdf(rc4, "HDFC", user_dob="01011990") is None
+    assert parser.parse_statement_from_pdf(parser.try_unlock_pdf(aes256, "ICICI", **details))["total_transactions"] == 2
+
+
+def test_sync_remembers_the_password_pattern_per_bank(db, monkeypatch):
+    locked = encrypt_pdf(make_statement_pdf(pages=1, rows_per_page=2), "3210")
+    emails = [{"email_id": "1", "uid": 1, "bank": "HDFC", "attachments": [{"filename": "jan.pdf", "data": locked}]}]
+    monkeypatch.setattr(EmailStatementParser, "pooled_connection", lambda self: nullcontext())
+    monkeypatch.setattr(EmailStatementParser, "iter_bank_statement_emails", lambda self, **kwargs: iter(emails))
+    monkeypatch.setattr(EmailStatementParser, "parse_statement_from_pdf", lambda self, pdf, bank=None: {"total_transactions": 0, "transactions": []})
+    request = email_integration.FetchStatementsRequest(
+        **FETCH_REQUEST, pdf_password_info={"date_of_birth": "15041990", "mobile_number": "9876543210"}
+    )
+
+    accepted = asyncio.run(email_integration.fetch_bank_statements_from_email(request=request, current_user_id=1, db=db))
+    status = asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=1, db=db))
+
+    assert status["result"]["statements_processed"] == 1
+    assert db.query(StatementPasswordPattern.bank_name, StatementPasswordPattern.pattern).all() == [("HDFC", "MOBILE_LAST4")]
+    candidates = EmailStatementParser.password_candidates("HDFC", user_dob="15041990", user_mobile="9876543210",
+                                                          preferred_pattern="MOBILE_LAST4")
+    assert [pattern for pattern, _ in candidates[:3]] == ["EMPTY", "MOBILE_LAST4", "DOB_DDMMYYYY"]
+
+
+def test_statement_upload_resumes_from_offset_and_imports_in_background(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 256)
+    pdf = encrypt_pdf(make_statement_pdf(pages=2, rows_per_page=5), "15041990")
+    user = db.get(User, 1)
+
+    def upload(chunk, **form):
+        return bank_statements.upload_statement(
+            file=UploadFile(BytesIO(chunk), filename="jan.pdf"), password="15041990",
+            **{"upload_id": None, "offset": 0, "total_size": len(pdf), **form}, db=db, current_user=user)
+
+    first = upload(pdf[:1000])
+    # The next request dies part way through its chunk; the client asks where to resume
+    (tmp_path / "1" / f"{first['upload_id']}.part").write_bytes(pdf[:1500])
+    resume = asyncio.run(bank_statements.get_upload_offset(upload_id=first["upload_id"], current_user=user))
+    with pytest.raises(HTTPException) as stale:
+        upload(pdf[1000:], upload_id=first["upload_id"], offset=1000)
+    done = upload(pdf[resume["offset"]:], upload_id=first["upload_id"], offset=resume["offset"])
+
+    assert (first["status"], first["offset"], resume["offset"], stale.value.status_code) == ("uploading", 1000, 1500, 409)
+    statement = db.get(BankStatement, done["statement_id"])
+    db.refresh(statement)
+    assert open(statement.file_path, "rb").read() == pdf
+    assert (statement.processing_status, statement.is_encrypted, statement.total_transactions) == ("completed", True, 10)
+    assert db.query(Transaction).filter(Transaction.bank_name == "HDFC Bank").count() == 10
+
+
+def test_statement_upload_status_url_is_polled_to_completion(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    pdf = encrypt_pdf(make_statement_pdf(pages=1, rows_per_page=4), "15041990")
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+    app.dependency_overrides[get_current_user_id] = lambda: 1
+    client = TestClient(app)
+    try:
+        accepted = client.post("/api/v1/bank-statements/upload", files={"file": ("jan.pdf", pdf)},
+                               data={"password": "15041990"})
+        polls = []
+        while not polls or polls[-1].json()["status"] in ("queued", "running"):
+            polls.append(client.get(accepted.json()["status_url"]))
+        email_view = client.get(f"/api/v1/email/jobs/{accepted.json()['job_id']}")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert accepted.status_code == 202 and polls[-1].status_code == 200
+    status = polls[-1].json()
+    assert status["status"] == "completed" and status["kind"] == "process_statement_upload"
+    assert status["result"]["statement_id"] == accepted.json()["statement_id"]
+    assert status["result"]["transactions_inserted"] == 4
+    assert email_view.status_code == 404
+
+
+def test_statement_upload_enforces_max_size_while_streaming(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 256)
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1000)
+    append_chunk = bank_statements._append_chunk
+    # Rejected before the form is spooled, so the endpoint never sees these bodies
+    monkeypatch.setattr(bank_statements, "_append_chunk", lambda *args: pytest.fail("body was read"))
+    boundary = "statement-boundary"
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.pdf"\r\n\r\n'.encode()
+            + bytes(200 * 1024) + f"\r\n--{boundary}--\r\n".encode())
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+    client = TestClient(app)
+    try:
+        declared = client.post("/api/v1/bank-statements/upload", files={"file": ("big.pdf", bytes(200 * 1024))})
+        # No Content-Length: cut off once the streamed body runs over
+        streamed = client.post("/api/v1/bank-statements/upload",
+                               content=(body[i:i + 4096] for i in range(0, len(body), 4096)),
+                               headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    finally:
+        app.dependency_overrides.clear()
+    monkeypatch.setattr(bank_statements, "_append_chunk", append_chunk)
+
+    # A chunk under the body limit is still held to MAX_UPLOAD_SIZE as it is written
+    with pytest.raises(HTTPException) as chunk_too_large:
+        bank_statements.upload_statement(
+            file=UploadFile(BytesIO(bytes(1200)), filename="big.pdf"), password=None, upload_id=None,
+            offset=0, total_size=None, db=db, current_user=db.get(User, 1))
+
+    assert (declared.status_code, streamed.status_code, chunk_too_large.value.status_code) == (413, 413, 413)
+    assert "content-length" not in streamed.request.headers
+    assert list(tmp_path.rglob("*.part")) == [] and db.query(BankStatement).count() == 0
+
+
+def test_abandoned_partial_uploads_are_removed(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "1").mkdir()
+    abandoned, active = tmp_path / "1" / f"{'a' * 32}.part", tmp_path / "1" / f"{'b' * 32}.part"
+    abandoned.write_bytes(b"%PDF-")
+    active.write_bytes(b"%PDF-")
+    day_ago = time.time() - settings.UPLOAD_PART_TTL_SECONDS - 60
+    os.utime(abandoned, (day_ago, day_ago))
+
+    recover_interrupted_jobs(db)
+
+    assert (abandoned.exists(), active.exists()) == (False, True)
+
+
+def test_failed_statement_imports_can_be_uploaded_again(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    pdf = encrypt_pdf(make_statement_pdf(pages=1, rows_per_page=3), "15041990")
+    user = db.get(User, 1)
+
+    def upload(password):
+        return bank_statements.upload_statement(
+            file=UploadFile(BytesIO(pdf), filename="jan.pdf"), password=password, upload_id=None,
+            offset=0, total_size=None, db=db, current_user=user)
+
+    wrong = upload("01011990")
+    # A retry cut short by a restart is failed at startup, which frees the file too
+    job = Job(user_id=1, kind="process_statement_upload", status="running", worker_id=job_queue.WORKER_ID,
+              heartbeat_at=datetime.utcnow())
+    db.add(job)
+    db.flush()
+    interrupted = BankStatement(user_id=1, filename="jan.pdf", file_path=str(tmp_path / "gone.pdf"), file_size=len(pdf),
+                                content_hash=pdf_sha256(pdf), processing_status="processing", job_id=job.id)
+    db.add(interrupted)
+    db.commit()
+    assert recover_interrupted_jobs(db) == 1
+    retried = upload("15041990")
+
+    statuses = {s.id: (s.processing_status, s.content_hash) for s in db.query(BankStatement).populate_existing()}
+    assert statuses[wrong["statement_id"]] == ("failed", None)
+    assert statuses[interrupted.id] == ("failed", None)
+    assert statuses[retried["statement_id"]] == ("completed", pdf_sha256(pdf))
+    assert db.query(Transaction).count() == 3
+
+
+def test_failed_statement_import_leaves_no_transactions_behind(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 1)
+    db.add(Budget(user_id=1, category="overall", amount=10 ** 7, period="monthly",
+                  start_date=datetime.utcnow() - timedelta(days=3)))
+    db.commit()
+    pdf = make_statement_pdf(pages=1, rows_per_page=3)
+    user = db.get(User, 1)
+    write_batch = TransactionIngestor.write_batch
+
+    def fail_after_first_batch(self, batch):
+        if self.batches:
+            raise RuntimeError("database went away")
+        return write_batch(self, batch)
+
+    def upload():
+        return bank_statements.upload_statement(
+            file=UploadFile(BytesIO(pdf), filename="jan.pdf"), password=None, upload_id=None,
+            offset=0, total_size=None, db=db, current_user=user)
+
+    monkeypatch.setattr(TransactionIngestor, "write_batch", fail_after_first_batch)
+    upload()
+    assert db.query(Transaction).count() == 0
+    monkeypatch.setattr(TransactionIngestor, "write_batch", write_batch)
+    upload()
+
+    debits = [t.amount for t in db.query(Transaction).filter(Transaction.transaction_type == "debit")]
+    assert db.query(Transaction).count() == 3
+    assert check_consistency(db, 1) == []
+    assert db.query(Budget).one().period_spent == pytest.approx(sum(debits))
+
+
+# Left-aligned cells with one page per worker task (narrations wrap across ranges), and
+# right-aligned amounts read in one range (narrations wrap across pages of a range)
+@pytest.mark.parametrize("right_aligned, workers, pages_per_task", [(False, 2, 1), (True, 1, None)])
+def test_layout_extractor_matches_golden_statements(right_aligned, workers, pages_per_task):
+    results = {}
+    try:
+        for bank in BANK_LAYOUTS:
+            golden = golden_statement(bank)
+            pdf = make_bank_statement_pdf(bank, golden["transactions"], golden["rows_per_page"], right_aligned)
+            extracted = extract_statement_transactions(pdf, workers=workers, pages_per_task=pages_per_task)
+            results[bank] = (extracted["bank"], extracted["layout"],
+                             field_accuracy(golden["transactions"], extracted["transactions"]))
+    finally:
+        shutdown_pdf_pools()
+
+    assert results == {bank: (bank, True, 1.0) for bank in BANK_LAYOUTS}
+
+
+def test_statement_lines_without_a_layout_are_read_from_both_ends():
+    text = "01/02/2024 " + "UPI REF " * 20000 + "\n02/02/2024 NETFLIX 649.00 - 1,200.50\n03/02/2024 REFUND Cr 99.00"
+
+    transactions = parse_statement_lines(text)
+
+    assert [(t["description"], t["debit"], t["credit"], t["balance"]) for t in transactions] == [
+        ("NETFLIX", 649.0, 0.0, 1200.5), ("REFUND", 0.0, 99.0, None)
+    ]
+
+
+def test_parsed_statements_are_cached_by_content_hash(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    pdf = encrypt_pdf(make_bank_statement_pdf("HDFC", golden_statement("HDFC")["transactions"][:10]), "15041990")
+    user = db.get(User, 1)
+
+    def upload():
+        return bank_statements.upload_statement(
+            file=UploadFile(BytesIO(pdf), filename="jan.pdf"), password="15041990", upload_id=None,
+            offset=0, total_size=None, db=db, current_user=user)
+
+    first = upload()
+    with pytest.raises(HTTPException) as duplicate:
+        upload()
+    assert duplicate.value.status_code == 409 and len(list(tmp_path.rglob("*.pdf"))) == 1
+
+    # Once the statement is gone, the same file comes back by email: no unlocking or extraction
+    db.query(Transaction).delete()
+    db.query(BankStatement).filter(BankStatement.id == first["statement_id"]).delete()
+    db.commit()
+    emails = [{"email_id": "1", "uid": 1, "bank": "HDFC", "attachments": [{"filename": "jan.pdf", "data": pdf}]}]
+    monkeypatch.setattr(EmailStatementParser, "pooled_connection", lambda self: nullcontext())
+    monkeypatch.setattr(EmailStatementParser, "iter_bank_statement_emails", lambda self, **kwargs: iter(emails))
+    monkeypatch.setattr(EmailStatementParser, "try_unlock_pdf", lambda *args, **kwargs: pytest.fail("unlocked again"))
+    monkeypatch.setattr(email_parser, "extract_statement_transactions", lambda *args, **kwargs: pytest.fail("parsed again"))
+    request = email_integration.FetchStatementsRequest(**FETCH_REQUEST)
+
+    accepted = asyncio.run(email_integration.fetch_bank_statements_from_email(request=request, current_user_id=1, db=db))
+    status = asyncio.run(email_integration.get_job_status(job_id=accepted.job_id, current_user_id=1, db=db))
+
+    assert (status["result"]["statements_processed"], status["result"]["transactions_extracted"]) == (1, 10)
+    assert db.query(Transaction.transaction_date).first()[0] == datetime(2024, 1, 1)
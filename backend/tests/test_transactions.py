@@ -1 +1,510 @@
 # Transactions tests
+import asyncio
+import io
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, text
+
+from app.database import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from app import models  # noqa: F401
+from app.models.ai_insight import AIInsight
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.daily_spending_rollup import DailySpendingRollup
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.api.v1.endpoints import ai, analytics, budgets
+from app.services.budget_alerts import evaluate_budget_alerts
+from app.services.budget_tracker import compute_spent
+from app.core.config import settings
+from app.services.sms_file_parser import SMSFileParser
+from app.services.sms_forwarding_handler import KeywordMatcher, SMSForwardingHandler, SMSParser, iter_parse_sms, shutdown_parse_pools
+from app.services.spending_rollup import check_consistency, rebuild
+from app.services.transaction_ingest import TransactionIngestor
+from app.services.spending_aggregates import monthly_cash_flow, spending_series, summarize_period
+
+HOT_TABLES = {"transactions", "ai_insights", "budgets"}
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    now = datetime.utcnow()
+    session.add(User(id=1, email="index@example.com", hashed_password="x"))
+    session.add_all([
+        Transaction(user_id=1, amount=100 + i, transaction_type="debit" if i % 3 else "credit",
+                    category="food", merchant_name="SWIGGY", created_at=now - timedelta(days=i))
+        for i in range(30)
+    ])
+    session.add(Budget(user_id=1, category="overall", amount=5000, period="monthly", start_date=now - timedelta(days=40)))
+    session.commit()
+    yield session
+    session.close()
+
+
+def call_endpoint(endpoint, **kwargs):
+    """Await an async endpoint with its own AsyncSession"""
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return await endpoint(db=session, **kwargs)
+    return asyncio.run(run())
+
+
+def capture_selects(fn):
+    """Run fn and return every SELECT it sends to the database"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    engines = (engine, async_engine.sync_engine)
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        for bind in engines:
+            event.remove(bind, "before_cursor_execute", record)
+    return statements
+
+
+def query_plan(db, statement, parameters):
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    return [row[-1] for row in rows]
+
+
+HOT_QUERIES = {
+    "analytics_summary": lambda db, user, active: summarize_period(db, user.id, datetime.now() - timedelta(days=30)),
+    "daily_spending": lambda db, user, active: spending_series(db, user.id, 30, tz_name="Asia/Kolkata"),
+    "income_vs_expenses": lambda db, user, active: monthly_cash_flow(db, user.id, 6),
+    "top_merchants": lambda db, user, active: call_endpoint(analytics.get_top_merchants, days=30, limit=10, current_user_id=user.id),
+    "budget_list": lambda db, user, active: call_endpoint(budgets.get_budgets, active_only=True, current_user_id=user.id),
+    "budget_spend": lambda db, user, active: compute_spent(db, active),
+    "ai_insights": lambda db, user, active: call_endpoint(ai.get_ai_insights, days=30, insight_type=None, current_user_id=user.id),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_queries_use_indexes(db, name):
+    current_user = db.get(User, 1)
+    active_budgets = db.query(Budget).all()
+    statements = capture_selects(lambda: HOT_QUERIES[name](db, current_user, active_budgets))
+    hot = [(sql, params) for sql, params in statements if any(f"FROM {table}" in sql or f"JOIN {table}" in sql for table in HOT_TABLES)]
+    assert hot, f"{name} issued no query against {HOT_TABLES}"
+
+    for sql, params in hot:
+        plan = query_plan(db, sql, params)
+        full_scans = [step for step in plan if step.startswith("SCAN") and step.split()[1] in HOT_TABLES]
+        assert not full_scans, f"{name} scans without an index: {plan}\n{sql}"
+        assert any("USING INDEX" in step or "USING COVERING INDEX" in step for step in plan), f"{name}: {plan}"
+
+
+def test_sms_parser_extracts_fields():
+    parsed = SMSParser().parse_sms("Rs.1,250.50 debited from A/c XX4321 at SWIGGY on 12/03/2024. Avl bal Rs 900", "AD-HDFC")
+
+    assert parsed["amount"] == 1250.50
+    assert parsed["transaction_type"] == "debit"
+    assert parsed["account_last4"] == "4321"
+    assert parsed["merchant_name"] == "SWIGGY"
+    assert parsed["transaction_date"] == datetime(2024, 3, 12)
+    assert parsed["bank_name"] == "HDFC"
+    assert parsed["category"] == "food"
+
+
+BANK_SMS = [
+    # HDFC UPI debit, one field per line
+    ("Sent Rs.500.00\nFrom HDFC Bank A/C *1234\nTo SWIGGY\nOn 12/03/24\nRef 412345678901\nNot You? Call 18002586161",
+     "VM-HDFCBK", 500.0, "SWIGGY", "1234", datetime(2024, 3, 12)),
+    # The amount sits inside the "to ..." merchant match
+    ("Paid to RAMESH KUMAR Rs 750.00 on 12/03/24 from A/c XX5678. UPI Ref 412345678901",
+     "AD-HDFCBK", 750.0, "RAMESH KUMAR Rs 750.00", "5678", datetime(2024, 3, 12)),
+    # ICICI debit; the account number sits inside the merchant match
+    ("ICICI Bank Acct XX321 debited for Rs 1,250.00 on 12/03/2024; transferred to SURESH 9988 account 123456789012, "
+     "UPI Ref 412345678901", "VM-ICICIB", 1250.0, "SURESH 9988 account 123456789012", "9012", datetime(2024, 3, 12)),
+]
+
+
+@pytest.mark.parametrize("text, sender, amount, merchant, account, date", BANK_SMS)
+def test_sms_parser_fields_do_not_hide_each_other(text, sender, amount, merchant, account, date):
+    parser = SMSParser()
+    parsed = parser.parse_sms(text, sender)
+
+    assert parsed["amount"] == amount
+    assert parsed["merchant_name"] == merchant
+    assert parsed["account_last4"] == account
+    assert parsed["transaction_date"] == date
+    # The UPI reference is neither the account nor part of the merchant
+    assert "412345678901" not in parsed["merchant_name"]
+    assert parsed["account_last4"] != "8901"
+    # Same answers as searching each field on its own
+    assert parsed["amount"] == parser._extract_amount(text)
+    assert parsed["merchant_name"] == parser._extract_merchant(text)
+    assert parsed["account_last4"] == parser._extract_account(text)
+
+
+def test_keyword_matcher_prefers_earlier_group():
+    matcher = KeywordMatcher({"food": ["food"], "shopping": ["mall", "foodmall"], "bills": ["gas"]})
+
+    assert matcher.match("paid at foodmall") == "food"  # "food" is a prefix of the longer hit
+    assert matcher.match("vegas mall") == "shopping"
+    assert matcher.match("nothing here") is None
+
+
+def test_bulk_sms_parsing_keeps_input_order(monkeypatch):
+    messages = [(f"Rs.{i + 1}.00 debited from A/c XX1234 at SHOP{i} on 01/02/2024", "AD-SBI") for i in range(50)]
+    messages.insert(7, ("Your OTP is 1234", "AD-SBI"))
+    monkeypatch.setattr(settings, "SMS_PARSE_MIN_BATCH", 10)
+
+    try:
+        pooled = [r for chunk in iter_parse_sms(messages, workers=2, chunk_size=8) for r in chunk]
+    finally:
+        shutdown_parse_pools()
+    in_process = [r for chunk in iter_parse_sms(messages, workers=1, chunk_size=8) for r in chunk]
+
+    assert len(pooled) == len(messages)
+    assert pooled[7] is None
+    assert [r and r["merchant_name"] for r in pooled] == [r and r["merchant_name"] for r in in_process]
+
+
+def test_sms_backup_files_stream_in_batches():
+    body = "Rs.{0}.00 debited from A/c XX1234 at SHOP{0} on 01/02/2024"
+    csv_data = "address,date,body\n" + "".join(f'AD-SBI,1700000000,"{body.format(i)}"\n' for i in range(1, 6))
+    xml_data = (
+        '<?xml version="1.0"?><smses count="4">'
+        + "".join(f'<sms address="AD-SBI" date="1700000000" type="1" body="{body.format(i)}" />' for i in range(1, 4))
+        + '<mms address="FRIEND"><parts><part text="hello" /></parts></mms><sms address="FRIEND" body="see you at 5" />'
+        + "</smses>"
+    )
+
+    csv_batches = list(SMSFileParser.iter_csv(io.BytesIO(csv_data.encode()), batch_size=2))
+    xml_messages = list(SMSFileParser.iter_xml_messages(io.BytesIO(xml_data.encode())))
+
+    assert [len(batch) for batch in csv_batches] == [2, 2, 1]
+    assert [t["merchant_name"] for batch in csv_batches for t in batch] == [f"SHOP{i}" for i in range(1, 6)]
+    assert xml_messages[-1] == ("see you at 5", "FRIEND", "")
+    assert len(xml_messages) == 4
+
+
+def test_sms_import_dedupes_by_fingerprint(db):
+    from app.api.v1.endpoints.email_integration import _import_sms_backup
+
+    body = "Rs.250.00 debited from A/c XX1234 at SWIGGY on 01/02/2024"
+    messages = [(body, "AD-HDFCBK", "1700000000"), (body, "AD-HDFCBK", "1700000000"), (body, "AD-HDFCBK", "1700003600")]
+
+    first = _import_sms_backup(iter(messages), 1, db)
+    again = _import_sms_backup(iter(messages), 1, db)
+
+    # Same purchase twice at different times is kept; the exact repeat is not
+    assert (first["transactions_added"], again["transactions_added"]) == (2, 0)
+    assert db.query(Transaction).filter(Transaction.fingerprint.isnot(None)).count() == 2
+
+
+def test_forwarded_sms_fingerprints_include_the_timestamp():
+    body = "Rs.250.00 debited from A/c XX1234 at SWIGGY on 01/02/2024"
+    sms_list = [{"text": body, "sender": "AD-HDFCBK", "timestamp": "1700000000"},
+                {"text": body, "sender": "AD-HDFCBK", "date": "1700003600"},
+                {"text": body, "sender": "AD-HDFCBK", "timestamp": "1700000000"}]
+    handler = SMSForwardingHandler(workers=1)
+
+    bulk = asyncio.run(handler.bulk_process_sms(sms_list, user_id=1))
+    single = asyncio.run(handler.process_sms(body, "AD-HDFCBK", user_id=1, received_at="1700003600"))
+
+    fingerprints = [t["fingerprint"] for t in bulk]
+    assert fingerprints[0] != fingerprints[1] and fingerprints[0] == fingerprints[2]
+    assert single["fingerprint"] == fingerprints[1]
+
+
+def test_sms_backup_upload_runs_off_the_event_loop(db, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core.security import get_current_user
+    from app.main import app
+
+    threads = []
+    write_batch = TransactionIngestor.write_batch
+
+    def record_thread(self, batch):
+        try:
+            asyncio.get_running_loop()
+            threads.append("event loop")
+        except RuntimeError:
+            threads.append("worker")
+        return write_batch(self, batch)
+
+    monkeypatch.setattr(TransactionIngestor, "write_batch", record_thread)
+    backup = ("timestamp,sender,message\n"
+              "2024-02-01 10:30:00,AD-HDFCBK,Rs.250.00 debited from A/c XX1234 at SWIGGY on 01/02/2024\n")
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+    try:
+        response = TestClient(app).post("/api/v1/email/upload-sms-csv", files={"file": ("sms.csv", backup)})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200 and response.json()["transactions_added"] == 1
+    assert threads == ["worker"]
+
+
+def test_ingestor_bulk_inserts_in_batches(db):
+    rows = [{"amount": 10 + i, "transaction_type": "debit", "category": "food", "fingerprint": f"fp{i % 4}"} for i in range(5)]
+    rows += [{"amount": 99, "transaction_type": "credit"} for _ in range(2)]
+
+    rebuild(db, 1)
+    stats = TransactionIngestor(db, 1, batch_size=3).ingest(rows)
+
+    # fp0 repeats in the second batch; rows without a fingerprint are never skipped
+    assert (stats["inserted"], stats["skipped"], stats["batches"]) == (6, 1, 3)
+    assert stats["rows_per_second"] > 0
+    assert db.query(Transaction).count() == 36
+    assert check_consistency(db, 1) == []
+
+
+def test_rollup_follows_edited_and_deleted_transactions(db):
+    day = datetime(2024, 3, 1, 9)
+    small, medium, large = (Transaction(user_id=1, amount=amount, transaction_type="debit", category="food",
+                                        created_at=day) for amount in (40, 60, 500))
+    db.add_all([small, medium, large])
+    rebuild(db, 1)
+
+    large.amount = 90
+    medium.category = "travel"
+    small.created_at = day + timedelta(days=1)
+    db.commit()
+    db.delete(large)
+    db.commit()
+
+    # No food rows left on the 1st, and the max that went away isn't kept
+    assert check_consistency(db, 1) == []
+    assert db.query(DailySpendingRollup.day, DailySpendingRollup.category, DailySpendingRollup.max_amount).filter(
+        DailySpendingRollup.day >= date(2024, 3, 1), DailySpendingRollup.day <= date(2024, 3, 2)
+    ).order_by(DailySpendingRollup.day).all() == [(date(2024, 3, 1), "travel", 60.0), (date(2024, 3, 2), "food", 40.0)]
+
+
+def test_rollup_migration_backfills_existing_transactions(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'migrated.db'}")
+    config = Config()
+    config.set_main_option("script_location", os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic"))
+    command.upgrade(config, "0001")
+    migrated = create_engine(settings.DATABASE_URL)
+    with migrated.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'old@example.com', 'x')"))
+        conn.execute(
+            text("INSERT INTO transactions (user_id, amount, transaction_type, category, transaction_date, created_at) "
+                 "VALUES (1, :amount, :type, :category, :at, :at)"),
+            [{"amount": 120.0, "type": "debit", "category": "food", "at": datetime(2024, 3, 1, 9)},
+             {"amount": 80.0, "type": "debit", "category": "food", "at": datetime(2024, 3, 1, 21)},
+             {"amount": 50000.0, "type": "credit", "category": None, "at": datetime(2024, 3, 2, 10)}]
+        )
+
+    command.upgrade(config, "0002")
+
+    with migrated.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT user_id, day, category, transaction_type, total, count, min_amount, max_amount "
+            "FROM daily_spending_rollup ORDER BY day"
+        )).all()
+    migrated.dispose()
+    assert [tuple(row) for row in rows] == [
+        (1, "2024-03-01", "food", "debit", 200.0, 2, 80.0, 120.0),
+        (1, "2024-03-02", "uncategorized", "credit", 50000.0, 1, 50000.0, 50000.0),
+    ]
+
+
+def test_budget_alert_fires_once_when_threshold_is_crossed(db):
+    db.query(Budget).update({"is_active": False})
+    shopping = Category(name="shopping", display_name="Shopping")
+    db.add(shopping)
+    db.flush()
+    db.add(Budget(user_id=1, category_id=shopping.id, category="shopping", amount=1000, period="monthly",
+                  alert_threshold=80, start_date=datetime.utcnow() - timedelta(days=3)))
+    db.commit()
+    ingestor = TransactionIngestor(db, 1)
+
+    def spend(amount):
+        ingestor.ingest([{"amount": amount, "transaction_type": "debit", "category": "shopping"}])
+        return db.query(AIInsight).filter(AIInsight.insight_type == "budget_alert").count()
+
+    # 70% stays quiet, 85% alerts, going over 100% in the same period does not alert again
+    assert [spend(700), spend(150), spend(200)] == [0, 1, 1]
+
+    insights = call_endpoint(ai.get_ai_insights, days=1, insight_type="budget_alert", current_user_id=1)
+    assert [(i.title, i.priority) for i in insights] == [("Budget alert: shopping", "medium")]
+    assert insights[0].description.startswith("You've used 85% of your monthly shopping budget")
+
+
+def test_budget_alert_is_rearmed_when_the_budget_changes(db):
+    db.query(Budget).update({"is_active": False})
+    budget = Budget(user_id=1, category="overall", amount=1000, period="monthly", alert_threshold=80,
+                    start_date=datetime.utcnow() - timedelta(days=3))
+    db.add(budget)
+    db.commit()
+    ingestor = TransactionIngestor(db, 1)
+
+    def spend(amount):
+        ingestor.ingest([{"amount": amount, "transaction_type": "debit", "category": "shopping"}])
+        return db.query(AIInsight).filter(AIInsight.insight_type == "budget_alert").count()
+
+    alerted = spend(850)
+    call_endpoint(budgets.update_budget, budget_id=budget.id, budget_update=budgets.BudgetUpdate(amount=900),
+                  current_user_id=1)
+    db.expire_all()
+
+    # Still over 80% of the lower limit: the next debit alerts against it
+    assert [alerted, spend(10), spend(10)] == [1, 2, 2]
+
+
+def test_concurrent_batches_both_count_toward_the_budget(db):
+    db.query(Budget).update({"is_active": False})
+    budget = Budget(user_id=1, category="overall", amount=10 ** 6, period="monthly",
+                    start_date=datetime.utcnow() - timedelta(days=3))
+    db.add(budget)
+    db.commit()
+    debit = {"transaction_type": "debit", "category": "food"}
+    TransactionIngestor(db, 1).ingest([dict(debit, amount=100)])
+    seeded = budget.period_spent
+
+    # Another worker adds to the total while this session still holds the seeded one in memory
+    with SessionLocal() as other:
+        TransactionIngestor(other, 1).ingest([dict(debit, amount=50)])
+    TransactionIngestor(db, 1).ingest([dict(debit, amount=25)])
+
+    db.expire_all()
+    assert budget.period_spent == pytest.approx(seeded + 75)
+
+
+def test_budget_alert_fires_again_in_the_next_period(db):
+    db.query(Budget).update({"is_active": False})
+    shopping = Category(name="shopping", display_name="Shopping")
+    db.add(shopping)
+    db.flush()
+    start = datetime(2024, 1, 31)
+    db.add(Budget(user_id=1, category_id=shopping.id, category="shopping", amount=1000, period="monthly",
+                  alert_threshold=0.8, start_date=start))
+    db.commit()
+
+    def spend(amount, when):
+        txn = Transaction(user_id=1, amount=amount, transaction_type="debit", category="shopping", created_at=when)
+        db.add(txn)
+        db.flush()
+        return evaluate_budget_alerts(db, 1, [txn], now=when)
+
+    alerts = [len(spend(900, datetime(2024, 2, 10))), len(spend(50, datetime(2024, 2, 20))),
+              # Jan 31 + 1 month is Feb 29; the spend above doesn't carry over
+              len(spend(500, datetime(2024, 3, 1))), len(spend(400, datetime(2024, 3, 2)))]
+
+    assert alerts == [1, 0, 0, 1]
+    assert db.query(Budget).filter(Budget.category_id == shopping.id).one().period_start == datetime(2024, 2, 29)
+
+
+def replace_transactions(db, *rows):
+    """Swap the fixture's transactions for (amount, transaction_type, created_at[, category]) rows"""
+    db.query(Transaction).delete()
+    db.add_all([
+        Transaction(user_id=1, amount=amount, transaction_type=kind, created_at=when, category=(rest or ("food",))[0])
+        for amount, kind, when, *rest in rows
+    ])
+    db.commit()
+
+
+def test_summary_aggregates_totals_categories_and_trend_buckets(db):
+    now = datetime(2024, 3, 31, 12)
+    replace_transactions(
+        db,
+        (50000, "credit", datetime(2024, 3, 1, 13), "salary"),
+        (300, "debit", datetime(2024, 3, 5), "food"),
+        (200, "debit", datetime(2024, 3, 20), "food"),
+        (1200, "debit", datetime(2024, 3, 30), "rent"),
+        (75, "debit", datetime(2024, 3, 31, 11)),
+        (999, "debit", datetime(2024, 2, 1), "food"),  # before the window
+    )
+
+    summary = summarize_period(db, 1, now - timedelta(days=30), now=now, trend_buckets=3, bucket_days=30)
+
+    assert (summary["transaction_count"], summary["debit_count"]) == (5, 4)
+    assert (summary["total_income"], summary["total_expenses"]) == (50000.0, 1775.0)
+    assert summary["top_categories"] == [
+        {"category": "rent", "total": 1200.0, "count": 1},
+        {"category": "food", "total": 575.0, "count": 3},
+    ]
+    # Buckets are 30-day windows ending with the one that starts now, over the window's transactions only
+    assert summary["monthly_trends"] == [
+        {"month": "Jan 2024", "income": 0.0, "expenses": 0.0},
+        {"month": "Mar 2024", "income": 50000.0, "expenses": 1775.0},
+        {"month": "Mar 2024", "income": 0.0, "expenses": 0.0},
+    ]
+
+
+def test_daily_spending_fills_empty_days(db):
+    replace_transactions(
+        db,
+        (100, "debit", datetime(2024, 3, 7, 8)),
+        (50, "debit", datetime(2024, 3, 7, 23, 59)),
+        (999, "credit", datetime(2024, 3, 9, 10)),
+        (20, "debit", datetime(2024, 3, 10, 1)),
+        (70, "debit", datetime(2024, 3, 5, 23)),  # the day before the range
+    )
+
+    series = spending_series(db, 1, 5, now=datetime(2024, 3, 10, 12))
+
+    assert series == [
+        {"date": "2024-03-06", "amount": 0.0, "count": 0},
+        {"date": "2024-03-07", "amount": 150.0, "count": 2},
+        {"date": "2024-03-08", "amount": 0.0, "count": 0},
+        {"date": "2024-03-09", "amount": 0.0, "count": 0},
+        {"date": "2024-03-10", "amount": 20.0, "count": 1},
+    ]
+
+
+@pytest.mark.parametrize("granularity, expected", [
+    # 2024-03-04 is a Monday; the range starts on Saturday 2024-02-24
+    ("week", [("2024-02-19", 10.0), ("2024-02-26", 300.0), ("2024-03-04", 4000.0)]),
+    ("month", [("2024-02-01", 210.0), ("2024-03-01", 4100.0)]),
+])
+def test_daily_spending_buckets_by_local_week_and_month(db, granularity, expected):
+    replace_transactions(
+        db,
+        (10, "debit", datetime(2024, 2, 24, 6)),
+        (200, "debit", datetime(2024, 2, 29, 18, 29)),  # 23:59 on Feb 29 in Kolkata
+        (100, "debit", datetime(2024, 3, 2, 10)),
+        (4000, "debit", datetime(2024, 3, 3, 19)),  # Sunday in UTC, Monday 00:30 in Kolkata
+    )
+
+    series = spending_series(db, 1, 10, granularity=granularity, tz_name="Asia/Kolkata", now=datetime(2024, 3, 4, 12))
+
+    assert [(bucket["date"], bucket["amount"]) for bucket in series] == expected
+
+
+def test_monthly_spending_rolls_over_from_january_31(db):
+    replace_transactions(db, (40, "debit", datetime(2024, 1, 31, 22)), (60, "debit", datetime(2024, 2, 1, 2)))
+
+    series = spending_series(db, 1, 2, granularity="month", now=datetime(2024, 2, 1, 12))
+
+    assert series == [
+        {"date": "2024-01-01", "amount": 40.0, "count": 1},
+        {"date": "2024-02-01", "amount": 60.0, "count": 1},
+    ]
+
+
+def test_cash_flow_has_one_row_per_calendar_month(db):
+    replace_transactions(
+        db,
+        (1000, "credit", datetime(2024, 1, 31, 23)),
+        (200, "debit", datetime(2024, 2, 1, 0, 30)),
+        (50, "debit", datetime(2024, 2, 29, 12)),
+        (10, "credit", datetime(2024, 3, 1)),
+        (7, "debit", datetime(2023, 12, 31, 23, 59)),  # before the first month
+    )
+
+    # Stepping 30 days from Jan 31 would land on Mar 1 and skip February
+    months = monthly_cash_flow(db, 1, 3, now=datetime(2024, 3, 31, 12))
+    year_end = monthly_cash_flow(db, 1, 2, now=datetime(2024, 1, 31, 12))
+
+    assert [(m["month"], m["income"], m["expenses"], m["savings"]) for m in months] == [
+        ("Jan 2024", 1000.0, 0.0, 1000.0), ("Feb 2024", 0.0, 250.0, -250.0), ("Mar 2024", 10.0, 0.0, 10.0),
+    ]
+    assert [(m["month"], m["expenses"]) for m in year_end] == [("Dec 2023", 7.0), ("Jan 2024", 0.0)]
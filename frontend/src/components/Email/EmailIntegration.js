@@ -61,7 +61,17 @@ const EmailIntegration = () => {
         }
       );
 
-      setResult(response.data);
+      // Statements are fetched by a background job; poll until it finishes
+      let job = response.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const poll = await axios.get(`/api/v1/email/jobs/${job.job_id}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        job = poll.data;
+      }
+
+      setResult(job.status === 'completed' ? job.result : { error: true, message: job.error || 'Failed to fetch statements' });
       setStep(3);
     } catch (error) {
       setResult({